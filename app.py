@@ -1,23 +1,30 @@
 import streamlit as st
-from sections import fluxlumi, home, orbit, orbits_many, roche, escape, gravity, hyp_binary, blackhole, starchart_map, satelite_map, rt_map, parallax
 import base64
+import importlib
+import logging
+import time
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # --- Page Definitions ---
+# Pages are stored as module paths and only imported when selected, so the
+# heavy dependencies of one section (lightkurve, colour, matplotlib, astropy)
+# are not paid for on every cold start.
 ALL_PAGES = {
-    "Home": home,
-    "One Orbit": orbit,
-    "Multiple Orbit": orbits_many,
-    "Roche Limit": roche,
-    "Escape Velocity": escape,
-    "Surface Gravity": gravity,
-    "Hypothetical Binary Star": hyp_binary,
-    "Schwarzschild Radius": blackhole,
-    "Luminosity and Flux on Star": fluxlumi,
-    "Constellations on Sky": starchart_map,
-    "Satelite Map": satelite_map, 
-    "Radio Telescope" : rt_map,
-    "Parallax" : parallax
+    "Home": "sections.home",
+    "One Orbit": "sections.orbit",
+    "Multiple Orbit": "sections.orbits_many",
+    "Roche Limit": "sections.roche",
+    "Escape Velocity": "sections.escape",
+    "Surface Gravity": "sections.gravity",
+    "Hypothetical Binary Star": "sections.hyp_binary",
+    "Schwarzschild Radius": "sections.blackhole",
+    "Luminosity and Flux on Star": "sections.fluxlumi",
+    "Constellations on Sky": "sections.starchart_map",
+    "Satelite Map": "sections.satelite_map",
+    "Radio Telescope" : "sections.rt_map",
+    "Parallax" : "sections.parallax"
 }
 
 # --- Groupings Referencing ALL_PAGES ---
@@ -121,10 +128,24 @@ section[data-testid="stSidebar"] div[data-testid="stVerticalBlock"] {
 st.sidebar.title("🔭 Ace Navigation")
 search_query = st.sidebar.text_input("🔍 Search pages").lower()
 
+# --- Lazy Page Import ---
+def load_page(name):
+    """
+    Imports the section module registered under `name` (falling back to Home)
+    and logs how long the import took. Modules already in sys.modules return
+    immediately, so only the first visit to a page pays the import cost.
+    """
+    module_path = ALL_PAGES.get(name, ALL_PAGES["Home"])
+    start = time.perf_counter()
+    module = importlib.import_module(module_path)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info("Loaded page %r (%s) in %.1f ms", name, module_path, elapsed_ms)
+    return module
+
 # --- Display Buttons by Section ---
 def display_page_buttons(section_title, page_dict):
     st.sidebar.markdown(f"### {section_title}")
-    for name, module in page_dict.items():
+    for name in page_dict:
         if search_query in name.lower():
             if st.sidebar.button(f"{name}"):
                 st.session_state.page_to_load = name
@@ -143,7 +164,7 @@ display_page_buttons("Astrophysics", ASTRO_PAGES)
 display_page_buttons("Maps", MAP_PAGES)
 
 # --- Load Selected Page ---
-current_page = ALL_PAGES.get(st.session_state.page_to_load, home)
+current_page = load_page(st.session_state.page_to_load)
 current_page.app()
 
 # --- Custom Cursors ---
@@ -0,0 +1,186 @@
+"""
+Conjunction screening for the TLE catalog.
+
+The catalog is propagated on a coarse time grid with the batch propagator.
+At every step the TEME positions go into a k-d tree and only pairs closer
+than the threshold plus the distance two objects can close in half a step
+are kept. For those pairs a linear time of closest approach (TCA) is
+estimated from the relative velocity; a pair is kept for the step whose
+half-window contains its TCA, then refined with Newton iterations on fresh
+SGP4 states. Docked or co-located objects (no relative motion) are skipped.
+The time range is split into chunks screened in a process pool.
+
+Benchmark at full catalog size:
+
+    python -m helper.conjunctions --hours 1 --benchmark
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from helper.satellites import DEFAULT_TLE_PATH, julian_date
+
+SCREEN_THRESHOLD_KM = 5.0 # Report approaches closer than this
+SCREEN_STEP_S = 10.0 # Coarse propagation step
+CHUNK_STEPS = 60 # Coarse steps per process-pool task
+MAX_RELATIVE_SPEED = 18.0 # km/s, bounds how far a pair can close in half a step
+MIN_RELATIVE_SPEED = 0.001 # km/s, slower pairs are docked or co-located, not conjunctions
+REFINE_ITERATIONS = 4
+
+_worker_propagator = None
+
+
+def _init_worker(path):
+    global _worker_propagator
+    from helper.satellites import load_propagator
+    _worker_propagator = load_propagator(path)
+
+
+def _closest_approach(sat_a, sat_b, jd, fr):
+    """
+    Newton iterations on d/dt |r_b - r_a|^2 = 0 starting at (jd, fr).
+    Returns (fr, miss km, relative speed km/s) or None if SGP4 fails.
+    """
+    for _ in range(REFINE_ITERATIONS + 1):
+        err_a, r_a, v_a = sat_a.sgp4(jd, fr)
+        err_b, r_b, v_b = sat_b.sgp4(jd, fr)
+        if err_a or err_b:
+            return None
+        dr = np.subtract(r_b, r_a)
+        dv = np.subtract(v_b, v_a)
+        speed2 = dv @ dv
+        if speed2 < MIN_RELATIVE_SPEED**2:
+            return None
+        dt = -(dr @ dv) / speed2
+        if abs(dt) < 1e-3:
+            break
+        fr += dt / 86400.0
+    return fr, float(np.sqrt(dr @ dr)), float(np.sqrt(speed2))
+
+
+def screen_chunk(propagator, jd, fr, step=SCREEN_STEP_S, threshold=SCREEN_THRESHOLD_KM):
+    """
+    Screens one chunk of coarse times (jd, fr arrays). Returns candidate
+    events as arrays (i, j, fr, miss, speed) with i < j, all relative to jd[0].
+    """
+    r, v = propagator.teme(jd, fr) # Decayed and stale objects come back NaN
+    radius = threshold + MAX_RELATIVE_SPEED * step / 2
+    found = []
+    for k in range(len(fr)):
+        pos = r[:, k]
+        ok = np.nonzero(~np.isnan(pos[:, 0]))[0]
+        pairs = cKDTree(pos[ok]).query_pairs(radius, output_type="ndarray")
+        if len(pairs) == 0:
+            continue
+        i, j = ok[pairs[:, 0]], ok[pairs[:, 1]]
+        dr = r[j, k] - r[i, k]
+        dv = v[j, k] - v[i, k]
+        speed2 = np.einsum("ij,ij->i", dv, dv)
+        moving = speed2 > MIN_RELATIVE_SPEED**2
+        tau = -np.einsum("ij,ij->i", dr, dv) / np.where(moving, speed2, 1.0)
+        linear_miss = np.linalg.norm(dr + dv * tau[:, None], axis=1)
+        keep = moving & (np.abs(tau) <= step / 2) & (linear_miss < threshold + 1.0)
+        for a, b, t in zip(i[keep], j[keep], tau[keep]):
+            found.append((a, b, fr[k] + (jd[k] - jd[0]) + t / 86400.0))
+
+    events = []
+    for a, b, t in found:
+        refined = _closest_approach(propagator.satrecs[a], propagator.satrecs[b], jd[0], t)
+        if refined is not None and refined[1] < threshold:
+            events.append((min(a, b), max(a, b), *refined))
+    return np.array(events, dtype=[("i", "i4"), ("j", "i4"), ("fr", "f8"), ("miss", "f8"), ("speed", "f8")])
+
+
+def _screen_task(args):
+    jd, fr, step, threshold = args
+    return screen_chunk(_worker_propagator, jd, fr, step, threshold)
+
+
+def _merge_events(events, step):
+    """
+    Collapses repeated detections of one encounter (the same pair within two
+    steps of each other) into the closest one.
+    """
+    if len(events) == 0:
+        return events
+    events = events[np.lexsort((events["fr"], events["j"], events["i"]))]
+    new_pair = np.r_[True, (events["i"][1:] != events["i"][:-1]) | (events["j"][1:] != events["j"][:-1])]
+    new_encounter = new_pair | np.r_[True, np.diff(events["fr"]) * 86400.0 > 2 * step]
+    group = np.cumsum(new_encounter) - 1
+    order = np.lexsort((events["miss"], group))
+    first = np.r_[True, group[order][1:] != group[order][:-1]]
+    return events[order[first]]
+
+
+def screen(start=None, hours=24.0, step=SCREEN_STEP_S, threshold=SCREEN_THRESHOLD_KM,
+           path=DEFAULT_TLE_PATH, workers=None, chunk_steps=CHUNK_STEPS):
+    """
+    Screens the catalog for close approaches over `hours` from `start`
+    (datetime, Unix time or now). With workers=1 everything runs in this
+    process. Returns a dict of arrays sorted by miss distance: names, NORAD
+    numbers, TCA as Unix seconds, miss distance (km) and relative speed (km/s).
+    """
+    from helper.satellites import load_propagator
+    jd0, fr0 = julian_date(start)
+    offsets = np.arange(0.0, hours * 3600.0 + step, step) / 86400.0
+    chunks = [
+        (np.full(len(part), jd0), fr0 + part, step, threshold)
+        for part in np.array_split(offsets, max(1, int(np.ceil(len(offsets) / chunk_steps))))
+    ]
+
+    propagator = load_propagator(path) # Also compiles the store before workers open it
+    if workers == 1:
+        results = [screen_chunk(propagator, *chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+            results = list(pool.map(_screen_task, chunks))
+
+    events = _merge_events(np.concatenate(results), step)
+    events = events[np.argsort(events["miss"])]
+    elements = propagator.elements
+    return {
+        "name_a": elements["name"][events["i"]],
+        "name_b": elements["name"][events["j"]],
+        "satnum_a": elements["satnum"][events["i"]],
+        "satnum_b": elements["satnum"][events["j"]],
+        "tca": (jd0 - 2440587.5 + events["fr"]) * 86400.0,
+        "miss_km": events["miss"],
+        "speed_km_s": events["speed"],
+    }
+
+
+def _print_events(result, limit=20):
+    for k in range(min(limit, len(result["miss_km"]))):
+        tca = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(result["tca"][k]))
+        print(
+            f"{result['name_a'][k]:>24} × {result['name_b'][k]:<24} "
+            f"{tca} UTC  {result['miss_km'][k]:7.3f} km  {result['speed_km_s'][k]:6.2f} km/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screen the TLE catalog for close approaches.")
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--step", type=float, default=SCREEN_STEP_S, help="coarse step in seconds")
+    parser.add_argument("--threshold", type=float, default=SCREEN_THRESHOLD_KM, help="miss distance in km")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tle", default=DEFAULT_TLE_PATH)
+    parser.add_argument("--benchmark", action="store_true", help="time one process against the pool")
+    args = parser.parse_args()
+
+    from helper.satellites import load_propagator
+    count = len(load_propagator(args.tle))
+    steps = int(args.hours * 3600 / args.step) + 1
+    print(f"🛰️  {count} objects, {steps} steps, {count * (count - 1) // 2 * steps:,} pair checks all-pairs")
+
+    runs = [("1 process", 1), (f"{args.workers or os.cpu_count()} processes", args.workers)] if args.benchmark else [("", args.workers)]
+    for label, workers in runs:
+        started = time.perf_counter()
+        result = screen(hours=args.hours, step=args.step, threshold=args.threshold, path=args.tle, workers=workers)
+        elapsed = time.perf_counter() - started
+        print(f"⏱️  {label + ': ' if label else ''}{len(result['miss_km'])} conjunctions in {elapsed:.2f} s")
+    _print_events(result)
@@ -0,0 +1,105 @@
+"""
+Shape-preserving downsampling of long time series for the browser charts.
+
+A LightCurvePyramid keeps the raw series plus coarser levels built by
+min/max bucketing (each level keeps the lowest and highest point of every
+bucket, so transits and flares survive). A view of any time window is read
+from the finest level that fits the point budget and, if even the coarsest
+level is too dense there, reduced with LTTB (largest triangle three
+buckets), so the chart payload stays bounded however long the series is.
+"""
+import numpy as np
+
+MAX_CHART_POINTS = 2000 # Points sent to the browser per view
+LEVEL_BUCKET = 8 # Points per min/max bucket; each level is 4x smaller
+
+
+def finite(x, y):
+    """
+    Drops samples where either coordinate is NaN or infinite.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    return x[keep], y[keep]
+
+
+def minmax(x, y, bucket=LEVEL_BUCKET):
+    """
+    Keeps the minimum and maximum of every `bucket` consecutive samples, in
+    time order (two points per bucket).
+    """
+    n = len(x)
+    if n <= 2 * bucket:
+        return x, y
+    rows = -(-n // bucket)
+    padded = np.full(rows * bucket, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(rows, bucket)
+    starts = np.arange(rows) * bucket
+    keep = np.unique(np.concatenate([
+        starts + np.nanargmin(padded, axis=1),
+        starts + np.nanargmax(padded, axis=1),
+    ]))
+    return x[keep], y[keep]
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-triangle-three-buckets: `threshold` points that follow the
+    visual shape of the series, always including the first and last.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    out = np.empty(threshold, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return x[out], y[out]
+
+
+class LightCurvePyramid:
+    """
+    Raw series plus min/max levels down to about `max_points` samples.
+    """
+
+    def __init__(self, x, y, max_points=MAX_CHART_POINTS, bucket=LEVEL_BUCKET):
+        x, y = finite(x, y)
+        order = np.argsort(x, kind="stable")
+        self.levels = [(x[order], y[order])]
+        while len(self.levels[-1][0]) > max_points:
+            coarser = minmax(*self.levels[-1], bucket)
+            if len(coarser[0]) >= len(self.levels[-1][0]):
+                break
+            self.levels.append(coarser)
+        self.max_points = max_points
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    @property
+    def span(self):
+        x = self.levels[0][0]
+        return (float(x[0]), float(x[-1])) if len(x) else (0.0, 0.0)
+
+    def view(self, start=None, end=None, max_points=None):
+        """
+        Samples within [start, end] as (x, y, level), at most `max_points`
+        of them, from the finest level that fits.
+        """
+        max_points = max_points or self.max_points
+        for level, (x, y) in enumerate(self.levels):
+            lo = 0 if start is None else np.searchsorted(x, start, side="left")
+            hi = len(x) if end is None else np.searchsorted(x, end, side="right")
+            if hi - lo <= max_points or level == len(self.levels) - 1:
+                vx, vy = lttb(x[lo:hi], y[lo:hi], max_points)
+                return vx, vy, level
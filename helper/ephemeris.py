@@ -0,0 +1,64 @@
+"""
+Vectorized two-body ephemeris generator.
+
+Solves Kepler's equation for many bodies and time samples at once and
+produces position tables that the orbit visualizers only need to
+interpolate, instead of solving Kepler's equation every frame.
+"""
+import numpy as np
+
+TWO_PI = 2 * np.pi
+EPHEMERIS_SAMPLES = 360 # Samples per orbital period in exported tables
+
+
+def solve_kepler(M, e, tol=1e-12, max_iter=50):
+    """
+    Solves Kepler's equation M = E - e·sin(E) for the eccentric anomaly E.
+    M and e broadcast against each other. Uses Newton iterations on the
+    elements that have not yet converged, starting from E = π for high
+    eccentricities where E = M converges slowly or not at all.
+    """
+    M = np.asarray(M, dtype=float)
+    e = np.asarray(e, dtype=float)
+    M, e = np.broadcast_arrays(np.mod(M, TWO_PI), e)
+
+    E = np.where(e < 0.8, M, np.pi)
+    active = np.ones(E.shape, dtype=bool)
+    for _ in range(max_iter):
+        Ea, ea, Ma = E[active], e[active], M[active]
+        dE = (Ea - ea * np.sin(Ea) - Ma) / (1 - ea * np.cos(Ea))
+        E[active] = Ea - dE
+        still = np.abs(dE) > tol
+        if not still.any():
+            break
+        active[active] = still
+    return E
+
+
+def orbit_positions(a, e, T, t):
+    """
+    Positions of bodies on Keplerian orbits, with the central mass at the
+    focus and periapsis along +x (the same frame as the Love2D viewers).
+    a, e, T are per-body arrays of shape (N,); t is either shared times of
+    shape (S,) or per-body times of shape (N, S). Returns x, y of shape (N, S).
+    """
+    a = np.asarray(a, dtype=float)[..., None]
+    e = np.asarray(e, dtype=float)[..., None]
+    T = np.asarray(T, dtype=float)[..., None]
+
+    E = solve_kepler(TWO_PI * np.asarray(t, dtype=float) / T, e)
+    x = a * (np.cos(E) - e)
+    y = a * np.sqrt(1 - e**2) * np.sin(E)
+    return x, y
+
+
+def ephemeris_table(a, e, T, samples=EPHEMERIS_SAMPLES):
+    """
+    Samples one full period of every body at `samples` uniform time steps.
+    Returns a dict with per-body "t", "x" and "y" arrays of shape (N, samples);
+    row i covers 0 <= t < T[i], so the table wraps around cleanly.
+    """
+    T = np.asarray(T, dtype=float)
+    t = T[:, None] * (np.arange(samples) / samples)
+    x, y = orbit_positions(a, e, T, t)
+    return {"t": t, "x": x, "y": y}
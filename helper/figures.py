@@ -0,0 +1,71 @@
+"""
+Shared figure rendering for the matplotlib-based sections.
+
+Figures are rendered to PNG bytes with the Agg backend, kept in a bounded
+LRU cache keyed by the (normalized) inputs of the plot, and always released
+after rendering so pyplot's global figure manager never grows.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+FIGURE_CACHE_SIZE = 128 # Max number of rendered PNGs kept in memory
+
+_cache = OrderedDict()
+_lock = threading.Lock() # Streamlit runs each session in its own thread
+
+
+def normalize_key(*values, digits=6):
+    """
+    Builds a hashable cache key, rounding floats to `digits` significant
+    digits so inputs that only differ by float noise share one entry.
+    """
+    def _norm(v):
+        if isinstance(v, float):
+            return float(f"{v:.{digits}g}")
+        if isinstance(v, (list, tuple)):
+            return tuple(_norm(x) for x in v)
+        return v
+    return tuple(_norm(v) for v in values)
+
+
+def release_figure(fig):
+    """
+    Frees a figure, closing it in pyplot too if it was created there.
+    """
+    if fig.canvas.manager is not None:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    fig.clear()
+
+
+def render_png(key, draw, *args, dpi=100, **kwargs):
+    """
+    Returns the PNG bytes for `draw(*args, **kwargs)`, which must return a
+    matplotlib Figure. Cached under `key`; on a hit the figure is not drawn.
+    """
+    with _lock:
+        png = _cache.get(key)
+        if png is not None:
+            _cache.move_to_end(key)
+            return png
+
+    fig = draw(*args, **kwargs)
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi)
+        png = buf.getvalue()
+    finally:
+        release_figure(fig)
+
+    with _lock:
+        _cache[key] = png
+        _cache.move_to_end(key)
+        while len(_cache) > FIGURE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return png
+
+
+def clear_figure_cache():
+    with _lock:
+        _cache.clear()
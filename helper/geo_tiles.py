@@ -0,0 +1,184 @@
+"""
+Zoom-level cluster index for point-like GeoJSON features.
+
+For every zoom level the features' representative points are projected to
+Web Mercator pixels and grouped on a uniform grid of CLUSTER_CELL_PX cells.
+Groups of one stay features, larger ones become cluster points (count,
+bounds). Each level is written as coarse tiles so the map only fetches what
+is in view, and the popup HTML is kept in separate detail tiles fetched on
+demand:
+
+    <out>/index.json              zoom range, tile offset, non-empty tiles
+    <out>/<z>/<x>-<y>.json        clusters and features for zoom z, tile x, y
+                                  at zoom max(z - TILE_OFFSET, 0)
+    <out>/details/<x>-<y>.json    id -> properties, tiles at DETAIL_ZOOM
+
+    python -m helper.geo_tiles [source.kml] [out_dir]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+
+import numpy as np
+
+from helper.handoff import atomic_write_bytes
+
+TILES_DIR = "./maps/public/data/radiotelescope"
+TILES_FORMAT = 1
+MIN_ZOOM = 2
+MAX_ZOOM = 9 # Matches the map's maxZoom; no clustering at this level
+CLUSTER_CELL_PX = 80
+TILE_OFFSET = 4 # A data tile spans 2**TILE_OFFSET map tiles per side
+DETAIL_ZOOM = 4
+COORD_DIGITS = 5 # ~1 m
+
+
+def project(lon, lat, zoom):
+    """
+    Web Mercator world pixel coordinates at `zoom` (256 px tiles).
+    """
+    size = 256 * 2**zoom
+    lat = np.clip(lat, -85.05112878, 85.05112878)
+    x = (np.asarray(lon) + 180.0) / 360.0 * size
+    y = (1 - np.log(np.tan(np.radians(lat)) + 1 / np.cos(np.radians(lat))) / math.pi) / 2 * size
+    return x, y
+
+
+def tile_of(lon, lat, zoom):
+    x, y = project(lon, lat, zoom)
+    limit = 2**zoom - 1
+    return np.clip((x // 256).astype(int), 0, limit), np.clip((y // 256).astype(int), 0, limit)
+
+
+def _flatten(coordinates):
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [coordinates]
+    return [point for part in coordinates for point in _flatten(part)]
+
+
+def anchor(geometry):
+    """
+    Representative point of a geometry: the point itself, or the mean of
+    its vertices.
+    """
+    points = np.array(_flatten(geometry["coordinates"]), dtype=float)
+    return points[:, 0].mean(), points[:, 1].mean()
+
+
+def _round(coordinates):
+    if isinstance(coordinates, (int, float)):
+        return round(coordinates, COORD_DIGITS)
+    return [_round(part) for part in coordinates]
+
+
+def cluster_level(lon, lat, zoom, cell_px=CLUSTER_CELL_PX):
+    """
+    Grid clustering at one zoom. Returns the group of every point and per
+    group its member count, centroid and bounds (west, south, east, north).
+    """
+    x, y = project(lon, lat, zoom)
+    cells = np.stack([x // cell_px, y // cell_px], axis=1)
+    _, group, count = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    group = group.ravel()
+    n = len(count)
+    centroid_lon = np.bincount(group, lon, n) / count
+    centroid_lat = np.bincount(group, lat, n) / count
+    west, south = np.full(n, np.inf), np.full(n, np.inf)
+    east, north = np.full(n, -np.inf), np.full(n, -np.inf)
+    np.minimum.at(west, group, lon)
+    np.minimum.at(south, group, lat)
+    np.maximum.at(east, group, lon)
+    np.maximum.at(north, group, lat)
+    return group, count, centroid_lon, centroid_lat, np.stack([west, south, east, north], axis=1)
+
+
+def _write_json(path, payload):
+    atomic_write_bytes(path, json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def build_tiles(features, out_dir=TILES_DIR, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """
+    Writes the cluster index for `features` (GeoJSON features with
+    properties) into `out_dir`, replacing any previous build. Returns the
+    index.
+    """
+    anchors = np.array([anchor(feature["geometry"]) for feature in features], dtype=float).reshape(-1, 2)
+    lon, lat = anchors[:, 0], anchors[:, 1]
+
+    # Clear a previous build, leaving anything else in out_dir alone
+    os.makedirs(out_dir, exist_ok=True)
+    for entry in os.listdir(out_dir):
+        if entry.isdigit() or entry == "details":
+            shutil.rmtree(os.path.join(out_dir, entry))
+
+    # Popup details, grouped by tile
+    detail_x, detail_y = tile_of(lon, lat, DETAIL_ZOOM)
+    details = {}
+    for i, feature in enumerate(features):
+        key = f"{detail_x[i]}-{detail_y[i]}"
+        details.setdefault(key, {})[i] = feature["properties"]
+    for key, payload in details.items():
+        _write_json(os.path.join(out_dir, "details", f"{key}.json"), payload)
+
+    tiles = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        tile_zoom = max(zoom - TILE_OFFSET, 0)
+        if zoom < max_zoom:
+            group, count, c_lon, c_lat, bounds = cluster_level(lon, lat, zoom)
+        else:
+            group, count = np.arange(len(features)), np.ones(len(features), dtype=int)
+            c_lon, c_lat, bounds = lon, lat, None
+
+        out = {}
+        singles = count[group] == 1
+        for i in np.nonzero(singles)[0]:
+            feature = features[i]
+            tx, ty = tile_of(lon[i], lat[i], tile_zoom)
+            out.setdefault(f"{tx}-{ty}", []).append({
+                "type": "Feature",
+                "geometry": {"type": feature["geometry"]["type"], "coordinates": _round(feature["geometry"]["coordinates"])},
+                "properties": {
+                    "id": int(i),
+                    "name": feature["properties"].get("name", ""),
+                    "detail": f"{detail_x[i]}-{detail_y[i]}",
+                },
+            })
+        for g in np.nonzero(count > 1)[0]:
+            tx, ty = tile_of(c_lon[g], c_lat[g], tile_zoom)
+            out.setdefault(f"{tx}-{ty}", []).append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": _round([float(c_lon[g]), float(c_lat[g])])},
+                "properties": {"cluster": True, "count": int(count[g]), "bounds": _round(bounds[g].tolist())},
+            })
+
+        for key, items in out.items():
+            _write_json(os.path.join(out_dir, str(zoom), f"{key}.json"), {"type": "FeatureCollection", "features": items})
+        tiles[str(zoom)] = sorted(out)
+
+    index = {
+        "format": TILES_FORMAT,
+        "count": len(features),
+        "minZoom": min_zoom,
+        "maxZoom": max_zoom,
+        "tileOffset": TILE_OFFSET,
+        "bounds": [float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())] if len(features) else None,
+        "tiles": tiles,
+    }
+    _write_json(os.path.join(out_dir, "index.json"), index)
+    return index
+
+
+if __name__ == "__main__":
+    from helper.telescopes import KML_PATH, read_features
+
+    parser = argparse.ArgumentParser(description="Convert a KML site list into clustered GeoJSON tiles.")
+    parser.add_argument("source", nargs="?", default=KML_PATH)
+    parser.add_argument("out_dir", nargs="?", default=TILES_DIR)
+    args = parser.parse_args()
+
+    features = read_features(args.source)
+    index = build_tiles(features, args.out_dir)
+    files = sum(len(keys) for keys in index["tiles"].values())
+    print(f"🗺️  {index['count']} features, {files} tiles in {args.out_dir}")
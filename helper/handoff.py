@@ -0,0 +1,221 @@
+"""
+Binary handoff format between the Streamlit sections and the Love2D visuals.
+
+A file is a small fixed header followed by named records, all little-endian:
+
+    magic    4s   b"ACEB"
+    version  u16  HANDOFF_VERSION
+    flags    u16  reserved, 0
+    count    u32  number of records
+
+    record:
+    name_len u16, name (utf-8), kind u8, payload
+        kind 0  float64 scalar
+        kind 1  u32 count + count packed float64 values
+        kind 2  u32 length + utf-8 string
+
+Nested dicts and lists are flattened into dotted names ("planets.1.eccentricity",
+1-based like Lua tables) and rebuilt by the readers, so dict keys must be
+non-empty and free of dots. Lists and arrays of numbers, empty ones included,
+become packed float64 arrays.
+
+Only the orbits viewer reads this format so far (visual/orbits/handoff.lua);
+the other viewers still read data.json, written with write_json().
+"""
+import json
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+HANDOFF_MAGIC = b"ACEB"
+HANDOFF_VERSION = 1
+SEQUENCE_SUFFIX = ".seq" # Sidecar the viewers poll for changes (visual/shared/reload.lua)
+
+SCALAR, ARRAY, STRING = 0, 1, 2
+
+_HEADER = struct.Struct("<4sHHI")
+
+
+def _is_number_list(value):
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind in "biuf"
+    return (
+        isinstance(value, (list, tuple))
+        and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+    )
+
+
+def _flatten(value, name, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            key = str(key)
+            if not key or "." in key:
+                raise ValueError(f"Handoff key {key!r} under '{name}' must be non-empty and contain no '.'")
+            _flatten(item, f"{name}.{key}" if name else key, out)
+    elif _is_number_list(value):
+        out.append((name, ARRAY, np.ascontiguousarray(value, dtype="<f8").ravel()))
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value, start=1):
+            _flatten(item, f"{name}.{i}", out)
+    elif isinstance(value, str):
+        out.append((name, STRING, value))
+    elif isinstance(value, (bool, int, float, np.number)):
+        out.append((name, SCALAR, float(value)))
+    elif value is not None:
+        raise TypeError(f"Unsupported handoff value for '{name}': {type(value).__name__}")
+
+
+def encode(data):
+    """
+    Serializes a (possibly nested) dict into handoff bytes.
+    """
+    records = []
+    _flatten(data, "", records)
+
+    parts = [_HEADER.pack(HANDOFF_MAGIC, HANDOFF_VERSION, 0, len(records))]
+    for name, kind, value in records:
+        name_bytes = name.encode("utf-8")
+        parts.append(struct.pack("<H", len(name_bytes)))
+        parts.append(name_bytes)
+        parts.append(struct.pack("<B", kind))
+        if kind == SCALAR:
+            parts.append(struct.pack("<d", value))
+        elif kind == ARRAY:
+            parts.append(struct.pack("<I", value.size))
+            parts.append(value.tobytes())
+        else:
+            text = value.encode("utf-8")
+            parts.append(struct.pack("<I", len(text)))
+            parts.append(text)
+    return b"".join(parts)
+
+
+def _unflatten(records):
+    root = {}
+    for name, value in records:
+        node = root
+        *parents, leaf = name.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+
+    def _listify(node):
+        if not isinstance(node, dict):
+            return node
+        items = {key: _listify(value) for key, value in node.items()}
+        if items and all(key.isdigit() for key in items) and sorted(map(int, items)) == list(range(1, len(items) + 1)):
+            return [items[str(i)] for i in range(1, len(items) + 1)]
+        return items
+
+    return _listify(root)
+
+
+def decode(buffer):
+    """
+    Parses handoff bytes back into a nested dict. Arrays are returned as
+    read-only float64 NumPy views into `buffer`.
+    """
+    buffer = memoryview(buffer)
+    magic, version, _flags, count = _HEADER.unpack_from(buffer, 0)
+    if magic != HANDOFF_MAGIC:
+        raise ValueError("Not a handoff file (bad magic)")
+    if version != HANDOFF_VERSION:
+        raise ValueError(f"Unsupported handoff version {version}")
+
+    pos = _HEADER.size
+    records = []
+    for _ in range(count):
+        (name_len,) = struct.unpack_from("<H", buffer, pos)
+        pos += 2
+        name = bytes(buffer[pos:pos + name_len]).decode("utf-8")
+        pos += name_len
+        kind = buffer[pos]
+        pos += 1
+        if kind == SCALAR:
+            (value,) = struct.unpack_from("<d", buffer, pos)
+            pos += 8
+        elif kind == ARRAY:
+            (n,) = struct.unpack_from("<I", buffer, pos)
+            pos += 4
+            value = np.frombuffer(buffer, dtype="<f8", count=n, offset=pos)
+            pos += 8 * n
+        elif kind == STRING:
+            (n,) = struct.unpack_from("<I", buffer, pos)
+            pos += 4
+            value = bytes(buffer[pos:pos + n]).decode("utf-8")
+            pos += n
+        else:
+            raise ValueError(f"Unknown handoff record kind {kind} for '{name}'")
+        records.append((name, value))
+    return _unflatten(records)
+
+
+def _replace(src, dst, retries=10, delay=0.05):
+    # On Windows the rename fails while a viewer has the target open for reading
+    for attempt in range(retries):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(delay)
+
+
+def atomic_write_bytes(path, payload):
+    """
+    Writes `payload` to a temp file in the same directory and renames it over
+    `path`, so a reader never sees a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _bump_sequence(path):
+    # Written after the data file, so a viewer seeing the new stamp finds the
+    # new data. Increases on every write, unlike the 1 s modtime
+    sequence_path = path + SEQUENCE_SUFFIX
+    try:
+        with open(sequence_path, "r", encoding="ascii") as f:
+            last = int(f.read())
+    except (OSError, ValueError):
+        last = 0
+    atomic_write_bytes(sequence_path, str(max(last + 1, time.time_ns())).encode("ascii"))
+
+
+def write(path, data):
+    """
+    Atomically writes `data` to `path` in the handoff format.
+    """
+    atomic_write_bytes(path, encode(data))
+    _bump_sequence(path)
+
+
+def write_json(path, data):
+    """
+    Atomically writes `data` as pretty-printed JSON, for the viewers that
+    still read data.json.
+    """
+    atomic_write_bytes(path, json.dumps(data, indent=4).encode("utf-8"))
+    _bump_sequence(path)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
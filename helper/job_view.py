@@ -0,0 +1,72 @@
+"""
+Streamlit side of helper.jobs: the page keeps a job id in its session state
+and track() draws the job's progress bar and cancel button, refreshing only
+that fragment while the job runs and rerunning the page once it finishes.
+"""
+import uuid
+
+import streamlit as st
+
+from helper import jobs
+
+POLL_SECONDS = 1.0
+
+
+def owner_id():
+    """
+    Id of the current browser session, used as the owner of its jobs.
+    """
+    if "job_owner" not in st.session_state:
+        st.session_state["job_owner"] = uuid.uuid4().hex
+    return st.session_state["job_owner"]
+
+
+def start(state_key, fn, *args, name=None, key=None, **kwargs):
+    """
+    Submits fn(job, *args, **kwargs) for this session and remembers the job
+    id under st.session_state[state_key]. Returns the Job, or None (with an
+    error shown) when the session has too many jobs already.
+    """
+    try:
+        job = jobs.submit(fn, *args, name=name, owner=owner_id(), key=key, **kwargs)
+    except jobs.JobLimitError as e:
+        st.error(f"⏳ {e}.")
+        return None
+    st.session_state[state_key] = job.id
+    return job
+
+
+def track(state_key, show_partial=None):
+    """
+    The finished Job whose id is kept under `state_key`, removing the id so
+    it is handled once. While the job is queued or running its progress is
+    shown instead, with show_partial(job.partial) once the job has published
+    one, and None is returned; None also when there is no job.
+    """
+    job = jobs.get(st.session_state.get(state_key))
+    if job is None:
+        st.session_state.pop(state_key, None)
+        return None
+    if job.done:
+        del st.session_state[state_key]
+        return job
+    _progress(state_key, job.id, show_partial)
+    return None
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _progress(state_key, job_id, show_partial):
+    job = jobs.get(job_id)
+    if job is None or job.done:
+        st.rerun() # Let the page pick up the result
+    waiting = "queued" if job.status == jobs.QUEUED else f"{job.elapsed:.0f} s"
+    st.progress(job.progress, text=f"⏳ {job.name}: {job.message or job.status} ({waiting})")
+    if job.cancel_requested:
+        st.caption("🛑 Cancelling...")
+    elif st.button("🛑 Cancel", key=f"{state_key}_cancel"):
+        if not jobs.cancel(job_id, owner_id()):
+            # Still running for another session: stop following it here
+            st.session_state.pop(state_key, None)
+            st.rerun()
+    if show_partial is not None and job.partial is not None:
+        show_partial(job.partial)
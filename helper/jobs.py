@@ -0,0 +1,222 @@
+"""
+Background jobs for long computations in the Streamlit sections.
+
+A section submits a function once and keeps only the job id in its session
+state. Every rerun then reads the job's status, progress and result instead
+of recomputing, so widget interaction no longer restarts the work. Jobs from
+all sessions share one runner pool capped at MAX_RUNNERS, and CPU-bound work
+inside a job goes to the one shared process pool from process_pool(), so
+concurrent users queue behind each other instead of each starting their own
+pools. A session may have at most MAX_ACTIVE_PER_OWNER unfinished jobs.
+
+A job function receives its Job as first argument and publishes progress,
+and optionally a partial result to show while it runs, with job.report().
+Once cancel() has been requested, report() raises JobCancelled, so
+cancellation takes effect at the next report. A job shared through its key
+keeps running until every session attached to it has cancelled. Finished
+jobs are kept for RESULT_TTL seconds (at most MAX_RETAINED of them).
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MAX_RUNNERS = 4 # Jobs running at once across all sessions
+PROCESS_WORKERS = os.cpu_count() or 1 # Shared pool for the CPU-bound parts of jobs
+MAX_ACTIVE_PER_OWNER = 4 # Queued or running jobs per session
+RESULT_TTL = 3600 # Seconds a finished job (and its result) is kept
+MAX_RETAINED = 64 # Finished jobs kept at most, oldest dropped first
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_jobs = {} # id -> Job, in submit order
+_lock = threading.Lock()
+_runners = None
+_processes = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLimitError(RuntimeError):
+    pass
+
+
+class Job:
+    """
+    One submitted computation. Status, progress and message are written by
+    the runner thread and read by the pages.
+    """
+
+    def __init__(self, name, owner=None, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.owner = owner
+        self.owners = {owner} # Sessions attached to this job, through its key
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.partial = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.ended = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.time()) - self.started
+
+    def report(self, progress=None, message=None, partial=None):
+        """
+        Publishes progress (0 to 1), a status message and/or a partial
+        result. Raises JobCancelled when the job has been cancelled.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+
+def _runner_pool():
+    global _runners
+    with _lock:
+        if _runners is None:
+            _runners = ThreadPoolExecutor(MAX_RUNNERS, thread_name_prefix="job")
+        return _runners
+
+
+def process_pool():
+    """
+    The process pool shared by every job, created on first use.
+    """
+    global _processes
+    with _lock:
+        if _processes is None:
+            _processes = ProcessPoolExecutor(PROCESS_WORKERS)
+        return _processes
+
+
+def _prune_locked(now):
+    finished = [job for job in _jobs.values() if job.done]
+    expired = {job.id for job in finished if now - job.ended > RESULT_TTL}
+    expired.update(job.id for job in finished[:max(0, len(finished) - MAX_RETAINED)])
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def _run(job, fn, args, kwargs):
+    if job._cancel.is_set():
+        job.status, job.ended = CANCELLED, time.time()
+        return
+    job.status, job.started = RUNNING, time.time()
+    try:
+        job.result = fn(job, *args, **kwargs)
+        job.progress = 1.0
+        job.status = DONE
+    except JobCancelled:
+        job.status = CANCELLED
+    except Exception as e:
+        logger.warning("Job %s (%s) failed: %s", job.id, job.name, e)
+        job.error = e
+        job.status = FAILED
+    finally:
+        job.ended = time.time()
+
+
+def submit(fn, *args, name=None, owner=None, key=None, **kwargs):
+    """
+    Queues fn(job, *args, **kwargs) and returns its Job. When `key` is given
+    and a job with that key is queued, running or finished successfully, that
+    job is returned instead (with `owner` attached to it), so a repeated
+    request shares the first one's work. Raises JobLimitError when `owner`
+    already has too many jobs.
+    """
+    with _lock:
+        _prune_locked(time.time())
+        if key is not None:
+            for job in _jobs.values():
+                if job.key == key and job.status in (QUEUED, RUNNING, DONE) and not job.cancel_requested:
+                    job.owners.add(owner)
+                    return job
+        if owner is not None and sum(owner in job.owners and not job.done for job in _jobs.values()) >= MAX_ACTIVE_PER_OWNER:
+            raise JobLimitError(f"Already {MAX_ACTIVE_PER_OWNER} jobs running, wait for one to finish or cancel it")
+        job = Job(name or fn.__name__, owner, key)
+        _jobs[job.id] = job
+    job._future = _runner_pool().submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get(job_id):
+    """
+    The Job with this id, or None when it is unknown or has expired.
+    """
+    with _lock:
+        _prune_locked(time.time())
+        return _jobs.get(job_id)
+
+
+def jobs(owner=None):
+    """
+    Known jobs, oldest first, optionally only those of one owner.
+    """
+    with _lock:
+        _prune_locked(time.time())
+        return [job for job in _jobs.values() if owner is None or owner in job.owners]
+
+
+def cancel(job_id, owner=None):
+    """
+    Requests cancellation. A queued job never starts; a running one stops at
+    its next report(). With an `owner`, that session is only detached while
+    other sessions are still attached to the job. Returns True when the job
+    is being cancelled, False when it is unknown, finished or kept running
+    for other sessions.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        if owner is not None:
+            job.owners.discard(owner)
+            if job.owners:
+                return False
+    job._cancel.set()
+    if job._future is not None and job._future.cancel():
+        job.status, job.ended = CANCELLED, time.time()
+    return True
+
+
+def forget(job_id):
+    """
+    Drops a finished job and its result. Returns whether it was removed.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or not job.done:
+            return False
+        del _jobs[job_id]
+        return True
@@ -0,0 +1,98 @@
+"""
+Long-lived Love2D viewers, one per visualization folder.
+
+Instead of starting a new Love2D process on every Launch click, a running
+viewer is reused: the section rewrites its data file atomically and the viewer
+(see visual/shared/reload.lua) notices the change and updates in place. The number
+of concurrent viewers is capped and exited processes are reaped on every call.
+"""
+import atexit
+import logging
+import os
+import subprocess
+import threading
+
+from helper.constant import LOVE_PATH
+
+logger = logging.getLogger(__name__)
+
+MAX_VIEWERS = 3 # Oldest viewer is closed when launching one more
+STOP_TIMEOUT = 2.0 # Seconds to wait after terminate() before kill()
+
+_viewers = {} # abs folder -> Popen, in launch order
+_lock = threading.Lock()
+
+
+def _stop(proc):
+    if proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _reap_locked():
+    exited = [folder for folder, proc in _viewers.items() if proc.poll() is not None]
+    for folder in exited:
+        del _viewers[folder]
+    return len(exited)
+
+
+def reap():
+    """
+    Forgets viewers whose window has been closed. Returns how many were reaped.
+    """
+    with _lock:
+        return _reap_locked()
+
+
+def is_running(folder):
+    with _lock:
+        _reap_locked()
+        return os.path.abspath(folder) in _viewers
+
+
+def launch(folder):
+    """
+    Makes sure a viewer is running for `folder`.
+    Returns True if a new process was started, False if a viewer was already
+    running (it hot-reloads the data file by itself). Raises FileNotFoundError
+    when Love2D is not installed, like subprocess.Popen.
+    """
+    folder = os.path.abspath(folder)
+    with _lock:
+        _reap_locked()
+        if folder in _viewers:
+            return False
+
+        while len(_viewers) >= MAX_VIEWERS:
+            oldest = next(iter(_viewers))
+            logger.info("Closing viewer %s to stay within %d viewers", oldest, MAX_VIEWERS)
+            _stop(_viewers.pop(oldest))
+
+        _viewers[folder] = subprocess.Popen([LOVE_PATH, folder])
+        return True
+
+
+def close(folder):
+    with _lock:
+        proc = _viewers.pop(os.path.abspath(folder), None)
+    if proc is not None:
+        _stop(proc)
+
+
+def shutdown():
+    """
+    Closes every viewer started by this process.
+    """
+    with _lock:
+        procs = list(_viewers.values())
+        _viewers.clear()
+    for proc in procs:
+        _stop(proc)
+
+
+atexit.register(shutdown)
@@ -0,0 +1,143 @@
+"""
+Concurrent multi-target, multi-quarter light-curve builds.
+
+Searches and downloads are I/O bound and run on a small thread pool (through
+helper.tpf_cache, so cached quarters cost nothing). Aperture photometry with
+to_lightcurve() is CPU bound and runs on a process pool as soon as each
+file arrives. Quarters are stitched into one light curve per target, and
+results are yielded as they complete so the page can show them one by one.
+
+    python -m helper.lightcurve_batch "KIC 8462852" --quarters 1-17
+"""
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from helper.tpf_cache import cache_key, fetch_tpf_path, normalize_target, pin, unpin
+
+FETCH_WORKERS = 4 # Concurrent MAST searches / downloads
+APERTURE_MASK = "pipeline"
+
+
+def parse_quarters(text):
+    """
+    "1-4, 7" -> [1, 2, 3, 4, 7].
+    """
+    quarters = []
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        quarters.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(quarters))
+
+
+def extract_lightcurve(path, aperture_mask=APERTURE_MASK):
+    """
+    Aperture photometry for one cached target pixel file.
+    """
+    from lightkurve import read
+    return read(path).to_lightcurve(aperture_mask=aperture_mask)
+
+
+def stitch(parts):
+    """
+    One normalized light curve from {quarter: LightCurve}, in quarter order.
+    """
+    from lightkurve import LightCurveCollection
+    if not parts:
+        return None
+    return LightCurveCollection([parts[q] for q in sorted(parts)]).stitch()
+
+
+def fetch_batch(targets, quarters, mission="Kepler", offline=False,
+                fetch_workers=FETCH_WORKERS, extract_workers=None, extract_pool=None):
+    """
+    Builds a stitched light curve for every target over `quarters`. Yields
+    event dicts as work completes:
+
+        {"kind": "quarter", "target", "quarter", "lightcurve" or "error"}
+        {"kind": "target", "target", "lightcurve" (None if every quarter
+         failed), "quarters" (the ones that succeeded)}
+
+    With extract_workers=1 photometry runs on a thread instead of a process,
+    and an `extract_pool` (left running afterwards) replaces the new pool.
+    Closing the generator early cancels the work that has not started.
+    """
+    targets = list(dict.fromkeys(normalize_target(t) for t in targets if str(t).strip()))
+    quarters = sorted(set(int(q) for q in quarters))
+    if not quarters:
+        raise ValueError("No quarters requested")
+    remaining = {target: len(quarters) for target in targets}
+    parts = {target: {} for target in targets}
+
+    own_pool = None
+    if extract_pool is None:
+        extract_pool = own_pool = ThreadPoolExecutor(1) if extract_workers == 1 else ProcessPoolExecutor(extract_workers)
+    fetch_pool = ThreadPoolExecutor(fetch_workers)
+    waiting = set()
+    # Files handed to photometry must outlive evictions from later downloads
+    keys = [cache_key(target, quarter, mission) for target in targets for quarter in quarters]
+    pin(keys)
+    try:
+        downloads = {
+            fetch_pool.submit(fetch_tpf_path, target, quarter, mission, offline): (target, quarter)
+            for target in targets for quarter in quarters
+        }
+        extracts = {}
+        waiting = set(downloads)
+        while waiting:
+            done, waiting = wait(waiting, return_when=FIRST_COMPLETED)
+            for future in done:
+                target, quarter = downloads.get(future) or extracts[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield {"kind": "quarter", "target": target, "quarter": quarter, "error": e}
+                else:
+                    if future in downloads:
+                        # Downloaded (or cached): hand the file to the photometry pool
+                        extract = extract_pool.submit(extract_lightcurve, result)
+                        extracts[extract] = (target, quarter)
+                        waiting.add(extract)
+                        continue
+                    parts[target][quarter] = result
+                    yield {"kind": "quarter", "target": target, "quarter": quarter, "lightcurve": result}
+
+                remaining[target] -= 1
+                if remaining[target] == 0:
+                    yield {
+                        "kind": "target",
+                        "target": target,
+                        "lightcurve": stitch(parts[target]),
+                        "quarters": sorted(parts[target]),
+                    }
+    finally:
+        for future in waiting:
+            future.cancel()
+        fetch_pool.shutdown(cancel_futures=True)
+        if own_pool is not None:
+            own_pool.shutdown(cancel_futures=True)
+        unpin(keys)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch and stitch light curves for several targets and quarters.")
+    parser.add_argument("targets", nargs="+")
+    parser.add_argument("--quarters", default="1-17", help='e.g. "1-17" or "14,15,16"')
+    parser.add_argument("--mission", default="Kepler")
+    parser.add_argument("--offline", action="store_true", help="use cached files only")
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    parser.add_argument("--extract-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for event in fetch_batch(args.targets, parse_quarters(args.quarters), args.mission, args.offline,
+                             args.fetch_workers, args.extract_workers):
+        elapsed = time.perf_counter() - started
+        if event["kind"] == "quarter":
+            status = f"❌ {event['error']}" if "error" in event else f"✅ {len(event['lightcurve'])} cadences"
+            print(f"[{elapsed:6.1f} s] {event['target']} Q{event['quarter']}: {status}")
+        elif event["lightcurve"] is None:
+            print(f"[{elapsed:6.1f} s] 💥 {event['target']}: no quarters available")
+        else:
+            print(f"[{elapsed:6.1f} s] 🌟 {event['target']}: {len(event['lightcurve'])} cadences from quarters {event['quarters']}")
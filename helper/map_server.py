@@ -0,0 +1,304 @@
+"""
+Local HTTP server backing the map pages.
+
+Everything outside /api/ is the built map bundle from maps/dist (see
+helper.static_files), so the Streamlit sections embed the maps from this
+server instead of a remote host.
+
+Endpoints (all GET, CORS-enabled so the map iframe can call them):
+
+    /api/satellites              catalog order: names and NORAD numbers
+    /api/positions?t=<unix>      lat/lon/alt arrays for every satellite
+    /api/positions?format=bin    same, as little-endian float32 blocks
+                                 [lat * N][lon * N][alt * N]
+    /api/stream                  server-sent events with delta-encoded frames
+                                 (see helper.position_stream), base64 data:
+                                 "sync" keyframe, "trail" ring snapshot, then
+                                 one "delta" per second; "catalog" when the
+                                 TLE store changed and the client must reload
+    /api/sky?lat=&lon=&tier=<n>  stars of sky catalog tier n above the horizon
+             [&height=&t=]       at a site (see helper.visibility), binary:
+                                 u32 count, u32 t, f32 matrix[9] (ICRS to
+                                 east/north/up, row-major), u32 index[count],
+                                 i16 alt[count], u16 az[count] in 0.01 degree
+
+Positions are propagated for the whole catalog in one vectorized pass and
+shared between clients asking for the same second.
+"""
+import base64
+import json
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+
+import numpy as np
+
+from helper.position_stream import PositionStream
+from helper.static_files import DIST_DIR, choose_encoding, copy_range, headers_for, parse_range, precompress, resolve
+
+logger = logging.getLogger(__name__)
+
+MAP_SERVER_HOST = "127.0.0.1"
+MAP_SERVER_PORT = 8765
+
+_server_lock = threading.Lock()
+_server = None # Set once this process serves the maps
+_frame_lock = threading.Lock()
+_last_frame = (None, None) # ((unix second, catalog revision), (lat, lon, alt))
+
+SKY_STEP_S = 10 # Sky requests are rounded to this, so clients share matrices
+SKY_PREFETCH_S = 600 # Rotation matrices computed ahead in one astropy call
+
+
+def map_url(page, **params):
+    """
+    URL of a map page (skymap, satelite, radiotelescope) on this server,
+    starting the server first if needed (e.g. under `streamlit run app.py`).
+    """
+    ensure_map_server()
+    url = f"http://{MAP_SERVER_HOST}:{MAP_SERVER_PORT}/{page}/"
+    return f"{url}?{urlencode(params)}" if params else url
+
+
+def _propagator():
+    # Imported lazily so starting the server does not pull in sgp4 / numpy work
+    from helper.satellites import load_propagator
+    return load_propagator()
+
+
+def positions_at(second, propagator=None):
+    """
+    Geodetic positions for the whole catalog (or `propagator`'s catalog) at a
+    whole Unix second, cached for the most recent second and catalog revision.
+    """
+    global _last_frame
+    propagator = propagator or _propagator()
+    key = (second, propagator.revision)
+    with _frame_lock:
+        if _last_frame[0] == key:
+            return _last_frame[1]
+        frame = propagator.geodetic(second)
+        _last_frame = (key, frame)
+        return frame
+
+
+position_stream = PositionStream(positions_at, _propagator)
+
+
+def _rounded(values, digits):
+    return [None if math.isnan(v) else v for v in np.round(values, digits).tolist()]
+
+
+class MapRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(status, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    def do_HEAD(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/api/"):
+            self._send(405, b"")
+        else:
+            self._static(url.path, head=True)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith("/api/"):
+            self._static(url.path)
+            return
+        query = parse_qs(url.query)
+        routes = {
+            "/api/satellites": self._satellites,
+            "/api/positions": self._positions,
+            "/api/stream": self._stream,
+            "/api/sky": self._sky,
+        }
+        handler = routes.get(url.path)
+        if handler is None:
+            self._send_json({"error": "not found"}, status=404)
+            return
+        try:
+            handler(query)
+        except Exception as e:
+            logger.exception("Map server error on %s", self.path)
+            self._send_json({"error": str(e)}, status=500)
+
+    def _static(self, url_path, head=False):
+        path = resolve(unquote(url_path))
+        if path is None:
+            message = "Not found" if os.path.isdir(DIST_DIR) else "Map bundle not built: run `npm run build` in maps/"
+            self._send(404, message.encode("utf-8"), "text/plain; charset=utf-8")
+            return
+
+        headers = headers_for(path, url_path)
+        size = os.path.getsize(path)
+        byte_range = parse_range(self.headers.get("Range"), size)
+        if_range = self.headers.get("If-Range")
+        if byte_range is not None and if_range and if_range != headers["ETag"]:
+            byte_range = None # Changed since the client's partial copy: send it whole
+
+        if byte_range == "invalid":
+            self._send(416, b"", headers={"Content-Range": f"bytes */{size}"})
+            return
+        if byte_range is not None:
+            # Ranges address the uncompressed bytes
+            status, send_path, encoding = 206, path, None
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            send_path, encoding = choose_encoding(path, self.headers.get("Accept-Encoding"))
+            status, start, end = 200, 0, os.path.getsize(send_path) - 1
+            if encoding:
+                headers["Content-Encoding"] = encoding
+                headers["ETag"] = headers["ETag"][:-1] + f'-{encoding}"'
+            if headers["ETag"] in (self.headers.get("If-None-Match") or ""):
+                status = 304
+
+        self.send_response(status)
+        headers["Access-Control-Allow-Origin"] = "*"
+        if status != 304:
+            headers["Content-Length"] = str(end - start + 1)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if head or status == 304:
+            return
+        try:
+            with open(send_path, "rb") as f:
+                f.seek(start)
+                copy_range(f, self.wfile, end - start + 1)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client went away
+
+    def _satellites(self, query):
+        elements = _propagator().elements
+        self._send_json({
+            "count": len(elements),
+            "names": elements["name"].tolist(),
+            "satnums": elements["satnum"].tolist(),
+        })
+
+    def _positions(self, query):
+        second = int(float(query.get("t", [time.time()])[0]))
+        lat, lon, alt = positions_at(second)
+        if query.get("format", ["json"])[0] == "bin":
+            body = np.concatenate([lat, lon, alt]).astype("<f4").tobytes()
+            self._send(200, body, "application/octet-stream", {"X-Count": str(len(lat)), "X-Time": str(second)})
+        else:
+            self._send_json({
+                "t": second,
+                "lat": _rounded(lat, 4),
+                "lon": _rounded(lon, 4),
+                "alt": _rounded(alt, 2),
+            })
+
+    def _sky(self, query):
+        from helper.visibility import altaz_matrices, visible_stars
+
+        lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        height = float(query.get("height", [0.0])[0])
+        tier = int(query.get("tier", [0])[0])
+        second = int(float(query.get("t", [time.time()])[0])) // SKY_STEP_S * SKY_STEP_S
+        altaz_matrices(second + np.arange(0, SKY_PREFETCH_S, SKY_STEP_S), lat, lon, height)
+
+        frame = visible_stars(lat, lon, height, start=second, tiers=[tier])[0]
+        stars = frame["tiers"][tier]
+        count = len(stars["index"])
+        body = b"".join([
+            struct.pack("<II", count, second),
+            frame["matrix"].astype("<f4").tobytes(),
+            stars["index"].astype("<u4").tobytes(),
+            np.round(stars["alt"] * 100).astype("<i2").tobytes(),
+            (np.round(stars["az"] * 100) % 36000).astype("<u2").tobytes(),
+        ])
+        self._send(200, body + b"\0" * (-len(body) % 4), "application/octet-stream")
+
+    def _event(self, name, payload):
+        data = base64.b64encode(payload).decode("ascii")
+        self.wfile.write(f"event: {name}\ndata: {data}\n\n".encode("ascii"))
+        self.wfile.flush()
+
+    def _sync(self):
+        seq, version, keyframe, trail = position_stream.sync()
+        self._event("sync", keyframe)
+        self._event("trail", trail)
+        return seq, version
+
+    def _stream(self, query):
+        position_stream.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(b"retry: 2000\n\n")
+            seq, version = self._sync()
+            while True:
+                update = position_stream.next_frame(seq, version)
+                if update is None:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                kind, seq, frame = update
+                if kind == "catalog":
+                    self._event("catalog", b"")
+                    return
+                if kind == "sync":
+                    seq, version = self._sync()
+                else:
+                    self._event("delta", frame)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client went away
+        finally:
+            position_stream.unsubscribe()
+
+
+def _serve(server):
+    if os.path.isdir(DIST_DIR):
+        try:
+            precompress(DIST_DIR) # Only touches files changed since the last run
+        except OSError as e:
+            logger.warning("Could not precompress the map bundle: %s", e)
+    server.serve_forever()
+
+
+def ensure_map_server(host=MAP_SERVER_HOST, port=MAP_SERVER_PORT):
+    """
+    Starts the map server in a background thread unless this process has
+    started it already. While the port is taken (by the server of another app
+    process) that one is used, and the next call tries again. Returns whether
+    the maps are served by this process.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return True
+        try:
+            server = ThreadingHTTPServer((host, port), MapRequestHandler)
+        except OSError as e:
+            logger.info("Map server port %s:%s not available (%s), using the server already there", host, port, e)
+            return False
+        server.daemon_threads = True
+        threading.Thread(target=_serve, args=(server,), name="map-server", daemon=True).start()
+        _server = server
+    print(f"🛰️  Map server listening at http://{host}:{port}/ (data under /api/)")
+    return True
+
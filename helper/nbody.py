@@ -0,0 +1,389 @@
+"""
+N-body integration for the orbit pages.
+
+State is kept as structure-of-arrays NumPy: masses m of shape (N,) and
+barycentric positions and velocities of shape (3, N) in SI units, with the
+central star first. Forces are summed directly over all pairs (O(N²), fully
+vectorized), so a few hundred bodies integrate interactively. Bodies with
+zero mass are attracted but attract nothing, which keeps test-particle belts
+cheap.
+
+    whfast    Wisdom-Holman map in democratic heliocentric coordinates. Between
+              kicks from the other bodies every body follows its exact Kepler
+              orbit around the star (universal variables), so large steps stay
+              accurate while the star dominates. Symplectic.
+    leapfrog  Kick-drift-kick leapfrog in barycentric coordinates. Symplectic and
+              needs no dominant body, but many more steps.
+    dop853    Adaptive 8th order Dormand-Prince (scipy), for close encounters
+              and systems without a dominant body.
+
+integrate() yields evenly spaced samples while it runs, so pages can plot a
+trajectory, and the Love2D viewer play it back, before the run has finished.
+
+    python -m helper.nbody --belt 300 --years 20 --method whfast
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from helper.ephemeris import solve_kepler
+
+G = 6.67430e-11 # m^3 kg^-1 s^-2
+AU = 1.496e11
+YEAR = 365.25 * 86400
+METHODS = ("whfast", "leapfrog", "dop853")
+STEPS_PER_ORBIT = {"whfast": 40, "leapfrog": 1000} # Fixed steps per shortest orbit
+DOP853_RTOL = 1e-10
+KEPLER_TOL = 1e-14
+KEPLER_MAX_ITER = 30
+VIEWER_SAMPLES = 1000 # Samples per body sent to the Love2D viewer
+
+
+def accelerations(pos, m, softening=0.0, g=G):
+    """
+    Acceleration of every body due to every body with mass, shape (3, N).
+    """
+    sources = np.flatnonzero(m)
+    if len(sources) == 0:
+        return np.zeros_like(pos)
+    dx = pos[:, None, sources] - pos[:, :, None] # (3, N, K): from each body to each source
+    r2 = np.einsum("kij,kij->ij", dx, dx) + softening**2
+    with np.errstate(divide="ignore"):
+        inv_r3 = np.where(r2 > 0, r2**-1.5, 0.0) # No self-force
+    inv_r3 *= g * m[sources]
+    return np.einsum("kij,ij->ki", dx, inv_r3)
+
+
+def energy(pos, vel, m, softening=0.0, g=G):
+    """
+    Total (kinetic + potential) energy in joules.
+    """
+    kinetic = 0.5 * np.sum(m * np.sum(vel**2, axis=0))
+    sources = np.flatnonzero(m)
+    dx = pos[:, sources, None] - pos[:, None, sources]
+    first, second = np.triu_indices(len(sources), 1)
+    r = np.sqrt(np.sum(dx[:, first, second]**2, axis=0) + softening**2)
+    return kinetic - g * np.sum(m[sources][first] * m[sources][second] / r)
+
+
+def from_elements(central_mass, m, a, e, omega=0.0, mean_anomaly=0.0, g=G):
+    """
+    Barycentric state for bodies on planar orbits around a central mass, from
+    heliocentric elements (a in m, argument of periapsis and mean anomaly in
+    radians). Returns (m, pos, vel) with the central body first.
+    """
+    m, a, e, omega, mean_anomaly = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (m, a, e, omega, mean_anomaly)))
+    E = solve_kepler(mean_anomaly, e)
+    mu = g * (central_mass + m)
+    r = a * (1 - e * np.cos(E))
+    x, y = a * (np.cos(E) - e), a * np.sqrt(1 - e**2) * np.sin(E)
+    vx, vy = -np.sqrt(mu * a) / r * np.sin(E), np.sqrt(mu * a * (1 - e**2)) / r * np.cos(E)
+
+    cos_w, sin_w = np.cos(omega), np.sin(omega)
+    Q = np.stack([x * cos_w - y * sin_w, x * sin_w + y * cos_w, np.zeros_like(x)])
+    U = np.stack([vx * cos_w - vy * sin_w, vx * sin_w + vy * cos_w, np.zeros_like(x)])
+
+    masses = np.concatenate([[float(central_mass)], m])
+    x0 = -(Q @ m) / masses.sum()
+    v0 = -(U @ m) / masses.sum()
+    pos = np.concatenate([x0[:, None], Q + x0[:, None]], axis=1)
+    vel = np.concatenate([v0[:, None], U + v0[:, None]], axis=1)
+    return masses, pos, vel
+
+
+def random_belt(count, a_min, a_max, e_max=0.05, seed=0):
+    """
+    Elements (a, e, omega, mean_anomaly) for `count` bodies spread uniformly
+    between a_min and a_max, for from_elements().
+    """
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(a_min, a_max, count),
+        rng.uniform(0.0, e_max, count),
+        rng.uniform(0.0, 2 * np.pi, count),
+        rng.uniform(0.0, 2 * np.pi, count),
+    )
+
+
+def default_step(pos, m, method, g=G):
+    """
+    Fixed step for whfast / leapfrog: STEPS_PER_ORBIT steps per circular
+    period at the current distance from the most massive body, for the body
+    closest to it.
+    """
+    center = int(np.argmax(m))
+    others = np.arange(len(m)) != center
+    r = np.sqrt(np.sum((pos[:, others] - pos[:, center:center + 1])**2, axis=0))
+    period = 2 * np.pi * np.sqrt(r**3 / (g * (m[center] + m[others])))
+    return float(period.min()) / STEPS_PER_ORBIT[method]
+
+
+def _stumpff(psi):
+    # c2 and c3 of the universal variable formulation, with series near 0
+    c2, c3 = np.empty_like(psi), np.empty_like(psi)
+    small = np.abs(psi) < 1e-2
+    ps = psi[small]
+    c2[small] = 1/2 - ps * (1/24 - ps * (1/720 - ps * (1/40320 - ps / 3628800)))
+    c3[small] = 1/6 - ps * (1/120 - ps * (1/5040 - ps * (1/362880 - ps / 39916800)))
+    pos, neg = psi > 0, psi < 0
+    pos &= ~small
+    neg &= ~small
+    s = np.sqrt(psi[pos])
+    c2[pos] = (1 - np.cos(s)) / psi[pos]
+    c3[pos] = (s - np.sin(s)) / s**3
+    s = np.sqrt(-psi[neg])
+    c2[neg] = (np.cosh(s) - 1) / -psi[neg]
+    c3[neg] = (np.sinh(s) - s) / s**3
+    return c2, c3
+
+
+def kepler_drift(Q, V, mu, dt):
+    """
+    Advances positions Q and velocities V (3, N) by dt along their two-body
+    orbits around a mass with G·M = mu, for elliptic and hyperbolic orbits
+    alike (universal variables with f and g functions).
+    """
+    r0 = np.sqrt(np.sum(Q**2, axis=0))
+    sqrt_mu = math.sqrt(mu)
+    alpha = 2 / r0 - np.sum(V**2, axis=0) / mu # 1 / a
+    sigma0 = np.sum(Q * V, axis=0) / sqrt_mu
+    chi = sqrt_mu * dt / r0 # Good start for steps short against the orbit
+    # Long steps on eccentric orbits overshoot from near periapsis: start no
+    # further out than the mean-motion guess, which Newton converges from
+    elliptic = alpha > 0
+    chi[elliptic] = np.sign(dt) * np.minimum(np.abs(chi[elliptic]), sqrt_mu * abs(dt) * alpha[elliptic])
+    for _ in range(KEPLER_MAX_ITER):
+        psi = alpha * chi**2
+        c2, c3 = _stumpff(psi)
+        r = chi**2 * c2 + sigma0 * chi * (1 - psi * c3) + r0 * (1 - psi * c2)
+        delta = (sigma0 * chi**2 * c2 + (1 - alpha * r0) * chi**3 * c3 + r0 * chi - sqrt_mu * dt) / r
+        chi = chi - delta
+        if np.all(np.abs(delta) <= KEPLER_TOL * np.maximum(np.abs(chi), 1e-300)):
+            break
+    psi = alpha * chi**2
+    c2, c3 = _stumpff(psi)
+    r = chi**2 * c2 + sigma0 * chi * (1 - psi * c3) + r0 * (1 - psi * c2)
+    f = 1 - chi**2 * c2 / r0
+    g = dt - chi**3 * c3 / sqrt_mu
+    f_dot = sqrt_mu / (r * r0) * chi * (psi * c3 - 1)
+    g_dot = 1 - chi**2 * c2 / r
+    return f * Q + g * V, f_dot * Q + g_dot * V
+
+
+def _to_democratic(pos, vel, m):
+    # Heliocentric positions, barycentric velocities
+    return pos[:, 1:] - pos[:, :1], vel[:, 1:] - (vel @ m / m.sum())[:, None]
+
+
+def _from_democratic(Q, V, m):
+    x0 = -(Q @ m[1:]) / m.sum()
+    v0 = -(V @ m[1:]) / m[0]
+    return (np.concatenate([x0[:, None], Q + x0[:, None]], axis=1),
+            np.concatenate([v0[:, None], V], axis=1))
+
+
+def _fixed_step(m, pos, vel, dt, steps_per_sample, method, softening, g):
+    # Yields (pos, vel) after every steps_per_sample steps; half kicks are merged across steps
+    if method == "whfast":
+        planets = m[1:]
+        Q, V = _to_democratic(pos, vel, m)
+        acc = accelerations(Q, planets, softening, g)
+        while True:
+            for _ in range(steps_per_sample):
+                V += 0.5 * dt * acc
+                Q += 0.5 * dt * ((V @ planets) / m[0])[:, None]
+                Q, V = kepler_drift(Q, V, g * m[0], dt)
+                Q += 0.5 * dt * ((V @ planets) / m[0])[:, None]
+                acc = accelerations(Q, planets, softening, g)
+                V += 0.5 * dt * acc
+            yield _from_democratic(Q, V, m)
+    else:
+        pos, vel = pos.copy(), vel.copy()
+        acc = accelerations(pos, m, softening, g)
+        while True:
+            for _ in range(steps_per_sample):
+                vel += 0.5 * dt * acc
+                pos += dt * vel
+                acc = accelerations(pos, m, softening, g)
+                vel += 0.5 * dt * acc
+            yield pos, vel
+
+
+def _adaptive(m, pos, vel, times, rtol, softening, g):
+    # Yields (pos, vel, steps) at each of `times` (after the first) from DOP853's dense output
+    from scipy.integrate import DOP853
+
+    n = pos.size
+    def rhs(_t, y):
+        return np.concatenate([y[n:], accelerations(y[:n].reshape(3, -1), m, softening, g).ravel()])
+
+    # Absolute tolerance on the scale of the system so that small coordinates do not force tiny steps
+    scale_pos = np.abs(pos).max() or 1.0
+    scale_vel = np.abs(vel).max() or 1.0
+    atol = np.concatenate([np.full(n, rtol * scale_pos), np.full(n, rtol * scale_vel)])
+    solver = DOP853(rhs, times[0], np.concatenate([pos.ravel(), vel.ravel()]), times[-1], rtol=rtol, atol=atol)
+    steps, i = 0, 1
+    while i < len(times):
+        message = solver.step()
+        if solver.status == "failed":
+            raise RuntimeError(f"DOP853 failed: {message}")
+        steps += 1
+        dense = solver.dense_output()
+        while i < len(times) and times[i] <= solver.t:
+            y = dense(times[i])
+            yield y[:n].reshape(3, -1), y[n:].reshape(3, -1), steps
+            i += 1
+
+
+def integrate(m, pos, vel, duration, method="whfast", samples=1000, dt=None, softening=0.0,
+              rtol=DOP853_RTOL, g=G):
+    """
+    Integrates for `duration` seconds and yields samples + 1 evenly spaced
+    frames, t = 0 first, as dicts with t, pos, vel ((3, N) copies), steps so
+    far and energy_error (relative to the start). whfast needs the dominant
+    body first. dt overrides the fixed step of whfast / leapfrog, which is
+    rounded down to divide the sample interval.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {', '.join(METHODS)}")
+    m = np.asarray(m, dtype=float)
+    pos = np.array(pos, dtype=float)
+    vel = np.array(vel, dtype=float)
+    if method == "whfast" and (len(m) < 2 or m[0] <= 0 or m[0] < m[1:].max()):
+        raise ValueError("whfast needs the dominant body first")
+
+    e0 = energy(pos, vel, m, softening, g)
+    times = np.linspace(0.0, float(duration), int(samples) + 1)
+    def frame(i, p, v, steps):
+        error = (energy(p, v, m, softening, g) - e0) / abs(e0) if e0 else 0.0
+        return {"t": times[i], "pos": p.copy(), "vel": v.copy(), "steps": steps, "energy_error": error}
+
+    yield frame(0, pos, vel, 0)
+    if method == "dop853":
+        for i, (p, v, steps) in enumerate(_adaptive(m, pos, vel, times, rtol, softening, g), start=1):
+            yield frame(i, p, v, steps)
+        return
+
+    interval = times[1] - times[0]
+    steps_per_sample = max(1, math.ceil(interval / (dt or default_step(pos, m, method, g))))
+    stepper = _fixed_step(m, pos, vel, interval / steps_per_sample, steps_per_sample, method, softening, g)
+    for i in range(1, len(times)):
+        p, v = next(stepper)
+        yield frame(i, p, v, i * steps_per_sample)
+
+
+class Trajectory:
+    """
+    Preallocated storage for the frames of integrate(); the filled part can
+    be read (e.g. by a page polling a job) while it grows.
+    """
+
+    def __init__(self, m, names, samples):
+        self.m = np.asarray(m, dtype=float)
+        self.names = list(names)
+        self.t = np.zeros(samples + 1)
+        self.pos = np.zeros((samples + 1, 3, len(self.m)))
+        self.energy_error = np.zeros(samples + 1)
+        self.steps = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, frame):
+        i = self.count
+        self.t[i] = frame["t"]
+        self.pos[i] = frame["pos"]
+        self.energy_error[i] = frame["energy_error"]
+        self.steps = frame["steps"]
+        self.count = i + 1
+
+    def snapshot(self):
+        """
+        An independent copy of the filled part, safe to keep while this one
+        is still being appended to.
+        """
+        count = self.count
+        copy = Trajectory(self.m, self.names, max(count - 1, 0))
+        copy.t[:count] = self.t[:count]
+        copy.pos[:count] = self.pos[:count]
+        copy.energy_error[:count] = self.energy_error[:count]
+        copy.steps = self.steps
+        copy.count = count
+        return copy
+
+    def relative(self):
+        """
+        Positions relative to the central body, shape (samples, 3, N).
+        """
+        pos = self.pos[:self.count]
+        return pos - pos[:, :, :1]
+
+
+def orbital_periods(t, rel):
+    """
+    Mean period of every body around the central one from the slope of its
+    unwrapped heliocentric angle (NaN for the central body and for bodies
+    that have not moved).
+    """
+    angle = np.unwrap(np.arctan2(rel[:, 1, :], rel[:, 0, :]), axis=0)
+    if len(t) < 2:
+        return np.full(rel.shape[2], np.nan)
+    rate = np.polyfit(t, angle, 1)[0]
+    with np.errstate(divide="ignore"):
+        period = 2 * np.pi / np.abs(rate)
+    period[0] = np.nan
+    return np.where(np.isfinite(period), period, np.nan)
+
+
+def handoff_payload(trajectory, max_samples=VIEWER_SAMPLES):
+    """
+    The part of a handoff file that the Love2D orbit viewer plays back: the
+    sample interval and per-body name, mass and heliocentric x / y, thinned
+    to at most `max_samples` samples.
+    """
+    count = len(trajectory)
+    stride = max(1, math.ceil(count / max_samples))
+    rel = trajectory.relative()[::stride]
+    interval = (trajectory.t[1] - trajectory.t[0]) * stride if count > 1 else 0.0
+    return {
+        "interval": interval,
+        "samples": len(rel),
+        "bodies": [
+            {"name": name, "mass": mass, "x": rel[:, 0, i], "y": rel[:, 1, i]}
+            for i, (name, mass) in enumerate(zip(trajectory.names, trajectory.m))
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Integrate the Sun, Jupiter, Saturn and a test belt.")
+    parser.add_argument("--belt", type=int, default=200, help="number of belt bodies")
+    parser.add_argument("--belt-mass", type=float, default=0.0, help="kg per belt body (0 = test particles)")
+    parser.add_argument("--years", type=float, default=20.0)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--method", choices=METHODS, default="whfast")
+    args = parser.parse_args()
+
+    a, e, omega, mean_anomaly = random_belt(args.belt, 2.2 * AU, 3.3 * AU)
+    m, pos, vel = from_elements(
+        1.989e30,
+        np.concatenate([[1.898e27, 5.683e26], np.full(args.belt, args.belt_mass)]),
+        np.concatenate([[5.204 * AU, 9.583 * AU], a]),
+        np.concatenate([[0.0489, 0.0565], e]),
+        np.concatenate([[0.257, 1.613], omega]),
+        np.concatenate([[0.6, 5.5], mean_anomaly]),
+    )
+    names = ["Sun", "Jupiter", "Saturn"] + [""] * args.belt
+    trajectory = Trajectory(m, names, args.samples)
+    started = time.perf_counter()
+    for sample in integrate(m, pos, vel, args.years * YEAR, args.method, args.samples):
+        trajectory.append(sample)
+    elapsed = time.perf_counter() - started
+
+    periods = orbital_periods(trajectory.t[:len(trajectory)], trajectory.relative())
+    print(f"⏱️  {len(m)} bodies, {args.years:g} years, {trajectory.steps} steps with {args.method} in {elapsed:.2f} s")
+    print(f"⚖️  Max relative energy error {np.abs(trajectory.energy_error).max():.2e}")
+    print(f"🪐 Jupiter {periods[1] / YEAR:.3f} yr, Saturn {periods[2] / YEAR:.3f} yr")
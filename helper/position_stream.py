@@ -0,0 +1,227 @@
+"""
+Delta-encoded live position frames for the satellite map.
+
+Once per second while at least one client is listening, the whole catalog is
+propagated, quantized and diffed against the previous frame. Every client
+receives the same frame, so the cost is paid once however many maps are open.
+Trails live server-side in a ring buffer of the last TRAIL_LENGTH quantized
+positions per satellite; a client seeds its copy from sync() once and then
+extends it with each frame.
+
+Quantization: latitude / longitude in 0.01 degree (int16), altitude in
+0.1 km (int32). One second of motion fits in int8 deltas for every orbit in
+the catalog; anything larger is sent as a reset with absolute values.
+
+Frame layout, little-endian, sections aligned so the browser can view them
+with typed arrays:
+
+    header    u32 seq, u32 t, u32 n_delta, u32 n_reset, u32 n_gone, u32 count
+    u8  moved[ceil(count / 8)]   bitmap (LSB first) of satellites with a delta,
+                                 padded to 4 bytes
+    u32 reset_idx[n_reset]       satellites (re)appearing or moving too far
+    u32 gone_idx[n_gone]         satellites that disappeared (SGP4 failure)
+    i32 reset_alt[n_reset]
+    i16 reset_lat[n_reset], reset_lon[n_reset]
+    i8  dlat[n_delta], dlon[n_delta], dalt[n_delta]   in bitmap order
+    (padded to a multiple of 4 bytes)
+
+Longitude deltas wrap around the antimeridian. Satellites whose quantized
+position did not change cost one bit. A keyframe is the same layout diffed
+against an empty state.
+"""
+import logging
+import struct
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STREAM_INTERVAL = 1.0 # Seconds between frames
+TRAIL_LENGTH = 50 # Positions kept per satellite
+IDLE_TIMEOUT = 30.0 # Stop propagating this long after the last client leaves
+
+LATLON_SCALE = 100 # 0.01 degree
+ALT_SCALE = 10 # 0.1 km
+MISSING = -32768 # Quantized latitude of a satellite with no position
+
+_FRAME_HEADER = struct.Struct("<IIIIII")
+_TRAIL_HEADER = struct.Struct("<IIII") # seq, trail length, head, count
+
+
+def quantize(lat, lon, alt):
+    """
+    Quantizes float positions; NaN positions come back with valid False.
+    """
+    valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnan(alt))
+    qlat = np.full(lat.shape, MISSING, dtype=np.int16)
+    qlon = np.zeros(lon.shape, dtype=np.int16)
+    qalt = np.zeros(alt.shape, dtype=np.int32)
+    qlat[valid] = np.round(lat[valid] * LATLON_SCALE)
+    qlon[valid] = np.mod(np.round(lon[valid] * LATLON_SCALE) + 18000, 36000) - 18000
+    qalt[valid] = np.clip(np.round(alt[valid] * ALT_SCALE), -2**31, 2**31 - 1)
+    return qlat, qlon, qalt, valid
+
+
+def encode_frame(seq, t, previous, current):
+    """
+    Diffs two quantized states (qlat, qlon, qalt, valid) into frame bytes.
+    """
+    plat, plon, palt, pvalid = previous
+    qlat, qlon, qalt, valid = current
+
+    dlat = qlat.astype(np.int32) - plat
+    dlon = np.mod(qlon.astype(np.int32) - plon + 18000, 36000) - 18000
+    dalt = qalt.astype(np.int64) - palt
+    both = valid & pvalid
+    fits = (np.abs(dlat) < 128) & (np.abs(dlon) < 128) & (np.abs(dalt) < 128)
+    moved = (dlat != 0) | (dlon != 0) | (dalt != 0)
+
+    delta = both & fits & moved
+    delta_idx = np.nonzero(delta)[0]
+    reset_idx = np.nonzero(valid & ~(both & fits))[0].astype("<u4")
+    gone_idx = np.nonzero(pvalid & ~valid)[0].astype("<u4")
+    mask = np.packbits(delta, bitorder="little").tobytes()
+
+    parts = [
+        _FRAME_HEADER.pack(seq, t, len(delta_idx), len(reset_idx), len(gone_idx), len(valid)),
+        mask, b"\0" * (-len(mask) % 4),
+        reset_idx.tobytes(), gone_idx.tobytes(),
+        qalt[reset_idx].astype("<i4").tobytes(),
+        qlat[reset_idx].astype("<i2").tobytes(),
+        qlon[reset_idx].astype("<i2").tobytes(),
+        dlat[delta_idx].astype("i1").tobytes(),
+        dlon[delta_idx].astype("i1").tobytes(),
+        dalt[delta_idx].astype("i1").tobytes(),
+    ]
+    body = b"".join(parts)
+    return body + b"\0" * (-len(body) % 4)
+
+
+def empty_state(count):
+    return (
+        np.full(count, MISSING, dtype=np.int16),
+        np.zeros(count, dtype=np.int16),
+        np.zeros(count, dtype=np.int32),
+        np.zeros(count, dtype=bool),
+    )
+
+
+class PositionStream:
+    """
+    Shared frame producer. Clients call subscribe(), then next_frame() in a
+    loop, and unsubscribe() when they disconnect.
+    """
+
+    def __init__(self, positions, propagator, interval=STREAM_INTERVAL, trail_length=TRAIL_LENGTH):
+        # propagator() -> current catalog (with a .revision);
+        # positions(second, catalog) -> (lat, lon, alt)
+        self._positions = positions
+        self._propagator = propagator
+        self.interval = interval
+        self.trail_length = trail_length
+
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._thread = None
+        self._idle_since = time.monotonic()
+        self.catalog_version = 0 # Bumped whenever the catalog is replaced
+        self._reset(None)
+
+    def _reset(self, catalog):
+        self._catalog = catalog
+        self._revision = getattr(catalog, "revision", None)
+        self.catalog_version += 1
+        count = len(catalog) if catalog is not None else 0
+        self.seq = 0
+        self.t = 0
+        self.frame = b""
+        self.state = empty_state(count)
+        self._trail_lat = np.full((self.trail_length, count), MISSING, dtype=np.int16)
+        self._trail_lon = np.zeros((self.trail_length, count), dtype=np.int16)
+        self._head = 0 # Next ring slot to write
+
+    def subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+            self._idle_since = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="position-stream", daemon=True)
+                self._thread.start()
+            if not self._cond.wait_for(lambda: self.seq > 0, timeout=30.0):
+                self._subscribers -= 1
+                if self._subscribers == 0:
+                    self._idle_since = time.monotonic()
+                raise RuntimeError("Position stream produced no frame")
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+            if self._subscribers == 0:
+                self._idle_since = time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._subscribers == 0 and time.monotonic() - self._idle_since > IDLE_TIMEOUT:
+                    self._reset(None)
+                    self._thread = None
+                    return
+            try:
+                self._tick(int(time.time()))
+            except Exception:
+                logger.exception("Position stream tick failed")
+            time.sleep(self.interval - time.time() % self.interval)
+
+    def _tick(self, second):
+        catalog = self._propagator()
+        lat, lon, alt = self._positions(second, catalog)
+        current = quantize(lat, lon, alt)
+        with self._cond:
+            if self._catalog is None or catalog.revision != self._revision:
+                self._reset(catalog) # Catalog changed, clients resync from a keyframe
+            frame = encode_frame(self.seq + 1, second, self.state, current)
+            self.state = current
+            self._trail_lat[self._head] = current[0]
+            self._trail_lon[self._head] = current[1]
+            self._head = (self._head + 1) % self.trail_length
+            self.seq += 1
+            self.t = second
+            self.frame = frame
+            self._cond.notify_all()
+
+    def sync(self):
+        """
+        (seq, catalog version, keyframe, trail) for a client starting from
+        scratch. The keyframe is the current state diffed against an empty
+        one; the trail is the ring as bytes: header (seq, length, head,
+        count), then int16 latitudes [length][count] and longitudes
+        [length][count] in ring order.
+        """
+        with self._cond:
+            count = len(self.state[3])
+            keyframe = encode_frame(self.seq, self.t, empty_state(count), self.state)
+            trail = b"".join([
+                _TRAIL_HEADER.pack(self.seq, self.trail_length, self._head, count),
+                self._trail_lat.astype("<i2").tobytes(),
+                self._trail_lon.astype("<i2").tobytes(),
+            ])
+            return self.seq, self.catalog_version, keyframe, trail
+
+    def next_frame(self, after_seq, catalog_version, timeout=15.0):
+        """
+        Waits for the frame following `after_seq`. Returns ("delta", seq,
+        frame), ("sync", seq, None) when the client fell behind and must
+        resync, ("catalog", seq, None) when the catalog was replaced, or None
+        on timeout.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != after_seq or self.catalog_version != catalog_version, timeout)
+            if self.catalog_version != catalog_version:
+                return "catalog", self.seq, None
+            if self.seq == after_seq:
+                return None
+            if self.seq == after_seq + 1:
+                return "delta", self.seq, self.frame
+            return "sync", self.seq, None
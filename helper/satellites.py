@@ -0,0 +1,237 @@
+"""
+Batch SGP4 propagation for the satellite map.
+
+The TLE catalog is parsed once into a NumPy structured array of orbital
+elements, and the whole catalog is propagated for a timestamp in a single
+vectorized pass with sgp4's SatrecArray, then converted to geodetic
+latitude / longitude / altitude with array math.
+"""
+import datetime as dt
+import os
+import threading
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, WGS72, jday
+
+DEFAULT_TLE_PATH = "./maps/public/data/active.tle"
+
+# WGS84 ellipsoid, as used by satellite.js eciToGeodetic
+EARTH_A_KM = 6378.137
+EARTH_F = 1 / 298.257223563
+EARTH_E2 = EARTH_F * (2 - EARTH_F)
+
+EARTH_MU = 398600.4418 # km^3/s^2
+
+# States SGP4 does not flag but that are not orbits: re-entering objects, and
+# stale element sets propagated far past their epoch that end up above their
+# own apogee (drag only ever lowers an orbit)
+REENTRY_ALTITUDE_KM = 100.0
+APOGEE_MARGIN_KM = 100.0
+
+SGP4_EPOCH_JD = 2433281.5 # 1949 Dec 31 00:00 UT, the epoch sgp4init counts days from
+
+ELEMENT_DTYPE = np.dtype([
+    ("name", "U24"),
+    ("satnum", "i4"),
+    ("epoch_jd", "f8"), # Element epoch as a split Julian date (whole + fraction)
+    ("epoch_fr", "f8"),
+    ("bstar", "f8"),
+    ("ndot", "f8"),
+    ("nddot", "f8"),
+    ("ecco", "f8"),
+    ("argpo", "f8"), # rad
+    ("inclo", "f8"), # rad
+    ("mo", "f8"), # rad
+    ("no_kozai", "f8"), # rad/min
+    ("nodeo", "f8"), # rad
+])
+
+
+def parse_tle(text):
+    """
+    Parses 3-line (name + two element lines) or bare 2-line TLE text into an
+    ELEMENT_DTYPE array. Invalid element sets are skipped.
+    """
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    rows = []
+    i = 0
+    while i < len(lines) - 1:
+        if lines[i].startswith("1 ") and lines[i + 1].startswith("2 "):
+            name, line1, line2 = "", lines[i], lines[i + 1]
+            i += 2
+        elif i + 2 < len(lines) and lines[i + 1].startswith("1 ") and lines[i + 2].startswith("2 "):
+            name, line1, line2 = lines[i].strip(), lines[i + 1], lines[i + 2]
+            i += 3
+        else:
+            i += 1
+            continue
+        try:
+            sat = Satrec.twoline2rv(line1, line2)
+        except ValueError:
+            continue
+        rows.append((
+            name or str(sat.satnum), sat.satnum, sat.jdsatepoch, sat.jdsatepochF,
+            sat.bstar, sat.ndot, sat.nddot, sat.ecco, sat.argpo, sat.inclo,
+            sat.mo, sat.no_kozai, sat.nodeo,
+        ))
+    return np.array(rows, dtype=ELEMENT_DTYPE)
+
+
+def read_tle(path=DEFAULT_TLE_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_tle(f.read())
+
+
+def satrecs_from_elements(elements):
+    """
+    Builds Satrec objects straight from element columns with sgp4init,
+    without going back through TLE text.
+    """
+    satrecs = []
+    for row in elements:
+        sat = Satrec()
+        sat.sgp4init(
+            WGS72, "i", int(row["satnum"]),
+            float(row["epoch_jd"] - SGP4_EPOCH_JD + row["epoch_fr"]),
+            float(row["bstar"]), float(row["ndot"]), float(row["nddot"]),
+            float(row["ecco"]), float(row["argpo"]), float(row["inclo"]),
+            float(row["mo"]), float(row["no_kozai"]), float(row["nodeo"]),
+        )
+        satrecs.append(sat)
+    return satrecs
+
+
+def apogee_radius(elements):
+    """
+    Apogee distance from the Earth's centre (km) of each element set.
+    """
+    semi_major = (EARTH_MU / (elements["no_kozai"] / 60.0)**2)**(1 / 3)
+    return semi_major * (1 + elements["ecco"])
+
+
+def julian_date(when=None):
+    """
+    Split Julian date (jd, fr) for a datetime (UTC assumed if naive), a
+    Unix timestamp, or now.
+    """
+    if when is None:
+        when = dt.datetime.now(dt.timezone.utc)
+    elif isinstance(when, (int, float)):
+        when = dt.datetime.fromtimestamp(when, dt.timezone.utc)
+    seconds = when.second + when.microsecond * 1e-6
+    return jday(when.year, when.month, when.day, when.hour, when.minute, seconds)
+
+
+def gmst(jd, fr):
+    """
+    Greenwich mean sidereal time in radians (IAU 1982), vectorized.
+    """
+    tut1 = (np.asarray(jd) - 2451545.0 + np.asarray(fr)) / 36525.0
+    seconds = (
+        -6.2e-6 * tut1**3 + 0.093104 * tut1**2
+        + (876600.0 * 3600 + 8640184.812866) * tut1 + 67310.54841
+    )
+    return np.mod(np.radians(seconds / 240.0), 2 * np.pi)
+
+
+def teme_to_geodetic(r, theta):
+    """
+    Converts TEME positions (..., 3) in km to geodetic latitude / longitude in
+    degrees and altitude in km, rotating by the sidereal angle `theta`
+    (broadcast against r[..., 0]).
+    """
+    x, y, z = r[..., 0], r[..., 1], r[..., 2]
+    p = np.hypot(x, y)
+    lon = np.mod(np.arctan2(y, x) - theta + np.pi, 2 * np.pi) - np.pi
+
+    lat = np.arctan2(z, p)
+    for _ in range(5):
+        C = 1 / np.sqrt(1 - EARTH_E2 * np.sin(lat)**2)
+        lat = np.arctan2(z + EARTH_A_KM * C * EARTH_E2 * np.sin(lat), p)
+    C = 1 / np.sqrt(1 - EARTH_E2 * np.sin(lat)**2)
+    alt = p / np.cos(lat) - EARTH_A_KM * C
+    return np.degrees(lat), np.degrees(lon), alt
+
+
+class BatchPropagator:
+    """
+    Propagates a whole element catalog at once. `revision` identifies the
+    store contents it was built from (see load_propagator).
+    """
+
+    def __init__(self, elements, revision=None):
+        self.elements = elements
+        self.revision = revision
+        self.satrecs = satrecs_from_elements(elements)
+        self._satrecs = SatrecArray(self.satrecs)
+        self._max_radius = apogee_radius(elements) + APOGEE_MARGIN_KM
+
+    def __len__(self):
+        return len(self.elements)
+
+    def teme(self, jd, fr):
+        """
+        TEME position (km) and velocity (km/s) for every satellite at every
+        time, shapes (N, T, 3). States SGP4 fails on (decayed, bad elements)
+        and states that are not orbits (below REENTRY_ALTITUDE_KM, or above
+        the element set's apogee from a stale TLE) are NaN.
+        """
+        jd = np.atleast_1d(np.asarray(jd, dtype=float))
+        fr = np.atleast_1d(np.asarray(fr, dtype=float))
+        err, r, v = self._satrecs.sgp4(jd, fr)
+        radius = np.linalg.norm(r, axis=2)
+        failed = (err != 0) | (radius < EARTH_A_KM + REENTRY_ALTITUDE_KM) | (radius > self._max_radius[:, None])
+        r[failed] = np.nan
+        v[failed] = np.nan
+        return r, v
+
+    def geodetic(self, when=None):
+        """
+        Latitude, longitude (degrees) and altitude (km) arrays of shape (N,)
+        for one instant.
+        """
+        jd, fr = julian_date(when)
+        r, _ = self.teme(jd, fr)
+        return teme_to_geodetic(r[:, 0], gmst(jd, fr))
+
+
+_propagators = {} # TLE path -> (file stamp, store revision, BatchPropagator)
+_propagators_lock = threading.Lock()
+
+
+def _store_stamp(path, store_dir):
+    # Changes whenever the source file or the store metadata is rewritten
+    from helper.tle_store import META_FILE
+    stamps = []
+    for file in (path, os.path.join(store_dir, META_FILE)):
+        try:
+            stat = os.stat(file)
+            stamps.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def load_propagator(path=DEFAULT_TLE_PATH):
+    """
+    Returns a BatchPropagator over the compiled store for the TLE file (see
+    helper.tle_store), with the elements copied into memory so the store
+    files can be replaced while it is in use. Calls that find the source
+    file and the store metadata unchanged (two stat calls) return the cached
+    propagator; otherwise the store is reopened, and the propagator rebuilt
+    only when the store revision changed, e.g. after a nightly merge_update().
+    """
+    from helper.tle_store import STORE_DIR, open_store
+    with _propagators_lock:
+        cached = _propagators.get(path)
+        if cached is not None and cached[0] == _store_stamp(path, STORE_DIR):
+            return cached[2]
+        store = open_store(path)
+        revision = (store.meta.get("source_hash"), store.meta.get("revision", 0))
+        if cached is None or cached[1] != revision:
+            propagator = BatchPropagator(np.array(store.elements), revision)
+        else:
+            propagator = cached[2]
+        del store # Release the memory maps
+        _propagators[path] = (_store_stamp(path, STORE_DIR), revision, propagator)
+        return propagator
@@ -0,0 +1,232 @@
+"""
+Sky map catalog: the HYG star database and the constellation lines as
+little-endian binary chunks the browser reads with typed arrays.
+
+Stars are split into magnitude tiers so the map loads the bright ones first
+and fetches fainter tiers only when zoomed in far enough to see them.
+Positions are stored as unit vectors on the celestial sphere (x towards
+RA 0h, z towards the north pole), so the client projects them with a few
+multiplications instead of parsing and converting RA / Dec.
+
+Chunk layout, sections aligned to 4 bytes:
+
+    header   4s magic b"SKYC", u16 version, u16 kind, u32 count,
+             u32 lines, u32 vertices, u32 text_bytes
+
+    kind 0, stars (count stars, lines = vertices = 0)
+        f32 xyz[count * 3]
+        f32 mag[count]
+        utf-8 text: one "name|constellation" entry per star, "\\n"-separated
+
+    kind 1, constellation lines (count constellations)
+        u32 first_line[count + 1]        into the line table
+        u32 first_vertex[lines + 1]      into the vertex table
+        f32 label_xyz[count * 3]         label anchor per constellation
+        f32 xyz[vertices * 3]
+        utf-8 text: constellation ids, "\\n"-separated
+
+Line segments are densified along great circles so straight screen segments
+follow the same curves d3 would draw.
+
+    <out>/index.json        tiers with magnitude limit, min zoom and count
+    <out>/stars-<n>.bin     one chunk per tier
+    <out>/constellations.bin
+
+    python -m helper.sky_catalog [hygdata_v37.csv] [out_dir]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import struct
+
+import numpy as np
+
+from helper.handoff import atomic_write_bytes
+
+HYG_PATH = "./maps/public/data/hygdata_v37.csv"
+LINES_PATH = "./maps/public/data/constellations.lines.json"
+CATALOG_DIR = "./maps/public/data/sky"
+
+CHUNK_MAGIC = b"SKYC"
+CHUNK_VERSION = 1
+STARS, LINES = 0, 1
+
+# (faintest magnitude, zoom factor from which the tier is drawn)
+MAGNITUDE_TIERS = ((4.0, 0.0), (5.5, 1.5), (6.5, 3.0))
+MAX_SEGMENT_DEG = 2.0 # Longer constellation segments are split along the great circle
+
+_CHUNK_HEADER = struct.Struct("<4sHHIIII")
+
+
+def unit_vectors(ra_deg, dec_deg):
+    """
+    Unit vectors (n, 3) for equatorial coordinates in degrees.
+    """
+    ra, dec = np.radians(ra_deg), np.radians(dec_deg)
+    return np.stack([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def _pad(payload):
+    return payload + b"\0" * (-len(payload) % 4)
+
+
+def _chunk(kind, count, sections, text, lines=0, vertices=0):
+    text = text.encode("utf-8")
+    header = _CHUNK_HEADER.pack(CHUNK_MAGIC, CHUNK_VERSION, kind, count, lines, vertices, len(text))
+    body = b"".join(_pad(np.ascontiguousarray(section).tobytes()) for section in sections)
+    return header + body + text
+
+
+def _label(row):
+    name = row["proper"].strip() or row["bf"].strip() or (f"HIP {row['hip']}" if row["hip"] else "")
+    return f"{name}|{row['con'].strip()}".replace("\n", " ")
+
+
+def read_stars(path=HYG_PATH, max_mag=MAGNITUDE_TIERS[-1][0]):
+    """
+    Stars up to `max_mag` from the HYG CSV as (xyz float32 (n, 3), mag
+    float32, labels), brightest first. The Sun is skipped.
+    """
+    ra, dec, mag, labels = [], [], [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                star_mag = float(row["mag"])
+                star_ra, star_dec = float(row["ra"]), float(row["dec"])
+            except ValueError:
+                continue
+            if star_mag > max_mag or row["proper"] == "Sol" or not (math.isfinite(star_ra) and math.isfinite(star_dec)):
+                continue
+            ra.append(star_ra * 15.0)
+            dec.append(star_dec)
+            mag.append(star_mag)
+            labels.append(_label(row))
+
+    order = np.argsort(mag, kind="stable")
+    xyz = unit_vectors(np.array(ra), np.array(dec)).reshape(-1, 3)[order].astype("<f4")
+    return xyz, np.array(mag, dtype="<f4")[order], [labels[i] for i in order]
+
+
+def _densify(points, max_step=MAX_SEGMENT_DEG):
+    """
+    Inserts great-circle points so no segment of the polyline (unit vectors)
+    is longer than `max_step` degrees.
+    """
+    out = [points[0]]
+    for a, b in zip(points[:-1], points[1:]):
+        angle = math.acos(float(np.clip(a @ b, -1.0, 1.0)))
+        steps = max(1, math.ceil(math.degrees(angle) / max_step))
+        if steps > 1 and angle > 0:
+            for t in np.arange(1, steps) / steps:
+                out.append((np.sin((1 - t) * angle) * a + np.sin(t * angle) * b) / np.sin(angle))
+        out.append(b)
+    return out
+
+
+def read_lines(path=LINES_PATH):
+    """
+    Constellation polylines as (ids, first_line, first_vertex, label_xyz, xyz).
+    """
+    with open(path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+
+    ids, first_line, first_vertex, labels, vertices = [], [0], [0], [], []
+    for feature in features:
+        feature_vertices = []
+        for line in feature["geometry"]["coordinates"]:
+            points = unit_vectors(*np.array(line, dtype=float).T)
+            dense = _densify(list(points))
+            feature_vertices.extend(dense)
+            first_vertex.append(first_vertex[-1] + len(dense))
+        first_line.append(len(first_vertex) - 1)
+        vertices.extend(feature_vertices)
+
+        anchor = np.mean(feature_vertices, axis=0)
+        labels.append(anchor / np.linalg.norm(anchor))
+        ids.append(str(feature.get("id") or feature.get("properties", {}).get("name", "")))
+
+    return (
+        ids,
+        np.array(first_line, dtype="<u4"),
+        np.array(first_vertex, dtype="<u4"),
+        np.array(labels, dtype="<f4").reshape(-1, 3),
+        np.array(vertices, dtype="<f4").reshape(-1, 3),
+    )
+
+
+def read_chunk(path):
+    """
+    Decodes a chunk file into a dict of NumPy arrays (xyz, mag or the line
+    tables) and the list of text entries.
+    """
+    with open(path, "rb") as f:
+        buffer = f.read()
+    magic, version, kind, count, lines, vertices, text_bytes = _CHUNK_HEADER.unpack_from(buffer, 0)
+    if magic != CHUNK_MAGIC or version != CHUNK_VERSION:
+        raise ValueError(f"Unsupported sky chunk {magic!r} v{version}")
+
+    offset = _CHUNK_HEADER.size
+    chunk = {"kind": kind, "count": count}
+
+    def take(name, dtype, n, shape=None):
+        nonlocal offset
+        array = np.frombuffer(buffer, dtype=dtype, count=n, offset=offset)
+        chunk[name] = array.reshape(shape) if shape else array
+        offset += -(-array.nbytes // 4) * 4
+
+    if kind == STARS:
+        take("xyz", "<f4", count * 3, (-1, 3))
+        take("mag", "<f4", count)
+    else:
+        take("first_line", "<u4", count + 1)
+        take("first_vertex", "<u4", lines + 1)
+        take("label_xyz", "<f4", count * 3, (-1, 3))
+        take("xyz", "<f4", vertices * 3, (-1, 3))
+    chunk["text"] = buffer[offset:offset + text_bytes].decode("utf-8").split("\n")
+    return chunk
+
+
+def build_catalog(source=HYG_PATH, lines_source=LINES_PATH, out_dir=CATALOG_DIR, tiers=MAGNITUDE_TIERS):
+    """
+    Writes the tiered star chunks, the constellation chunk and index.json
+    into `out_dir`. Returns the index.
+    """
+    xyz, mag, labels = read_stars(source, tiers[-1][0])
+
+    index = {"format": CHUNK_VERSION, "tiers": [], "lines": None}
+    start = 0
+    for n, (max_mag, min_zoom) in enumerate(tiers):
+        end = int(np.searchsorted(mag, max_mag, side="right"))
+        name = f"stars-{n}.bin"
+        atomic_write_bytes(
+            os.path.join(out_dir, name),
+            _chunk(STARS, end - start, [xyz[start:end], mag[start:end]], "\n".join(labels[start:end])),
+        )
+        index["tiers"].append({"file": name, "maxMag": max_mag, "minZoom": min_zoom, "count": end - start})
+        start = end
+
+    ids, first_line, first_vertex, label_xyz, vertices = read_lines(lines_source)
+    atomic_write_bytes(
+        os.path.join(out_dir, "constellations.bin"),
+        _chunk(LINES, len(ids), [first_line, first_vertex, label_xyz, vertices], "\n".join(ids),
+               lines=len(first_vertex) - 1, vertices=len(vertices)),
+    )
+    index["lines"] = {"file": "constellations.bin", "count": len(ids), "vertices": len(vertices)}
+
+    atomic_write_bytes(os.path.join(out_dir, "index.json"), json.dumps(index, indent=2).encode("utf-8"))
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the HYG star CSV and constellation lines into sky map chunks.")
+    parser.add_argument("source", nargs="?", default=HYG_PATH)
+    parser.add_argument("out_dir", nargs="?", default=CATALOG_DIR)
+    parser.add_argument("--lines", default=LINES_PATH, help="constellation lines GeoJSON")
+    args = parser.parse_args()
+
+    index = build_catalog(args.source, args.lines, args.out_dir)
+    for tier in index["tiers"]:
+        print(f"✨ {tier['file']}: {tier['count']} stars up to mag {tier['maxMag']}")
+    print(f"🌌 {index['lines']['count']} constellations, {index['lines']['vertices']} vertices in {args.out_dir}")
@@ -0,0 +1,157 @@
+"""
+Static hosting of the Vite-built map bundle (maps/dist) for the map server.
+
+Text assets are precompressed once next to the originals (<file>.gz, and
+<file>.br when the optional brotli package is installed) and picked by the
+client's Accept-Encoding. Vite's content-hashed files under assets/ are sent
+as immutable for a year; everything else is revalidated with an ETag.
+Byte-range requests are answered from the uncompressed file, so large data
+files (TLE catalog, star chunks) can be fetched in pieces.
+
+Build the bundle and precompress it with
+
+    cd maps && npm run build && cd .. && python -m helper.static_files
+"""
+import argparse
+import gzip
+import mimetypes
+import os
+import re
+
+from helper.handoff import atomic_write_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIST_DIR = "./maps/dist"
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".tle", ".kml", ".csv", ".bin", ".map"}
+MIN_COMPRESS_BYTES = 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COPY_CHUNK = 64 * 1024
+
+# Vite's default asset names: assets/<name>-<8 char hash>.<ext>
+_HASHED = re.compile(r"(^|/)assets/.+-[A-Za-z0-9_-]{8}\.[a-z0-9]+$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+mimetypes.add_type("text/javascript", ".js")
+mimetypes.add_type("text/javascript", ".mjs")
+mimetypes.add_type("application/geo+json", ".geojson")
+mimetypes.add_type("application/vnd.google-earth.kml+xml", ".kml")
+
+
+def _variants():
+    return [(".br", "br")] if brotli is not None else []
+
+
+def precompress(root=DIST_DIR):
+    """
+    Writes .gz (and .br) siblings for compressible files in `root` that are
+    missing or older than their source, and only when compression saves
+    space. Returns the number of files written.
+    """
+    written = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE or os.path.getsize(path) < MIN_COMPRESS_BYTES:
+                continue
+            source_mtime = os.path.getmtime(path)
+            data = None
+            for suffix, _encoding in [(".gz", "gzip")] + _variants():
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                packed = gzip.compress(data, 9, mtime=0) if suffix == ".gz" else brotli.compress(data, quality=11)
+                if len(packed) < len(data):
+                    atomic_write_bytes(target, packed)
+                    written += 1
+    return written
+
+
+def resolve(url_path, root=DIST_DIR):
+    """
+    File for a URL path inside `root`, with directories mapped to their
+    index.html. None when it does not exist or escapes `root`.
+    """
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, url_path.lstrip("/")))
+    if path != root and not path.startswith(root + os.sep):
+        return None
+    if os.path.isdir(path):
+        path = os.path.join(path, "index.html")
+    return path if os.path.isfile(path) else None
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None when the header
+    is absent or not a single byte range, and "invalid" when it cannot be
+    satisfied.
+    """
+    match = _RANGE.match((header or "").strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return "invalid"
+    return start, end
+
+
+def choose_encoding(path, accept_encoding):
+    """
+    (file to send, Content-Encoding or None) for the client's Accept-Encoding.
+    """
+    accepted = {part.split(";")[0].strip() for part in (accept_encoding or "").split(",")}
+    for suffix, encoding in _variants() + [(".gz", "gzip")]:
+        if encoding in accepted and os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= os.path.getmtime(path):
+            return path + suffix, encoding
+    return path, None
+
+
+def headers_for(path, url_path):
+    """
+    Content-Type, Cache-Control and ETag for a resolved file.
+    """
+    stat = os.stat(path)
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type.endswith("json"):
+        content_type += "; charset=utf-8"
+    return {
+        "Content-Type": content_type,
+        "Cache-Control": IMMUTABLE if _HASHED.search(url_path) else REVALIDATE,
+        "ETag": f'"{stat.st_size:x}-{int(stat.st_mtime_ns):x}"',
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def copy_range(f, out, length):
+    while length > 0:
+        data = f.read(min(COPY_CHUNK, length))
+        if not data:
+            break
+        out.write(data)
+        length -= len(data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompress the built map bundle for the map server.")
+    parser.add_argument("root", nargs="?", default=DIST_DIR)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        raise SystemExit(f"❌ {args.root} not found, run `npm run build` in maps/ first")
+    count = precompress(args.root)
+    print(f"🗜️  {count} compressed files written in {args.root}" + ("" if brotli else " (gzip only, brotli not installed)"))
@@ -0,0 +1,153 @@
+"""
+Radio-telescope sites from the ClimateViewer KML dataset.
+"""
+import html
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+
+KML_PATH = "./maps/public/data/Radio-Telescope-Arrays-Worldwide-ClimateViewer-3D.kml"
+KML_NS = {"kml": "http://www.opengis.net/kml/2.2"}
+
+
+def _text(element, path):
+    found = element.find(path, KML_NS)
+    return found.text.strip() if found is not None and found.text else ""
+
+
+def _walk(folder, path, out):
+    for placemark in folder.findall("kml:Placemark", KML_NS):
+        out.append((placemark, path))
+    for child in folder.findall("kml:Folder", KML_NS):
+        _walk(child, path + [_text(child, "kml:name")], out)
+
+
+def read_placemarks(path=KML_PATH):
+    """
+    (Placemark element, folder path) pairs for every placemark inside a
+    folder. Top-level placemarks (the dataset license) are skipped.
+    """
+    document = ET.parse(path).getroot().find("kml:Document", KML_NS)
+    out = []
+    for folder in document.findall("kml:Folder", KML_NS):
+        _walk(folder, [_text(folder, "kml:name")], out)
+    return out
+
+
+def read_sites(path=KML_PATH):
+    """
+    Point placemarks as dicts with name, folder, lat, lon (degrees) and
+    alt (km above the ellipsoid).
+    """
+    sites = []
+    for placemark, folders in read_placemarks(path):
+        coordinates = _text(placemark, "kml:Point/kml:coordinates")
+        if not coordinates:
+            continue
+        lon, lat, *alt = (float(v) for v in coordinates.split(","))
+        sites.append({
+            "name": _text(placemark, "kml:name"),
+            "folder": " / ".join(folders),
+            "lat": lat,
+            "lon": lon,
+            "alt": (alt[0] if alt else 0.0) / 1000.0,
+        })
+    return sites
+
+
+# Popup HTML allowlist: tag -> allowed attributes
+ALLOWED_TAGS = {
+    "a": {"href", "title"}, "img": {"src", "alt", "title"},
+    "p": set(), "br": set(), "div": set(), "span": set(), "h3": set(), "h4": set(),
+    "b": set(), "strong": set(), "i": set(), "em": set(), "ul": set(), "ol": set(), "li": set(),
+    "table": set(), "thead": set(), "tbody": set(), "tr": set(), "td": set(), "th": set(),
+}
+DROP_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed"}
+VOID_TAGS = {"br", "img"}
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self._dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self._dropping += 1
+            return
+        if self._dropping or tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_TAGS[tag] or value is None:
+                continue
+            if name in ("href", "src") and not value.strip().lower().startswith(("http://", "https://")):
+                continue
+            kept.append(f' {name}="{html.escape(value, quote=True)}"')
+        if tag == "a":
+            kept.append(' target="_blank" rel="noopener"')
+        self.out.append(f"<{tag}{''.join(kept)}>")
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self._dropping = max(self._dropping - 1, 0)
+        elif not self._dropping and tag in ALLOWED_TAGS and tag not in VOID_TAGS:
+            self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self._dropping:
+            self.out.append(html.escape(data, quote=False))
+
+
+def sanitize_description(text):
+    """
+    Reduces KML balloon HTML to an allowlist of tags and attributes: no
+    scripts, iframes, inline styles, fixed sizes or non-http links.
+    """
+    sanitizer = _Sanitizer()
+    sanitizer.feed(text or "")
+    sanitizer.close()
+    return "".join(sanitizer.out).strip()
+
+
+def _coordinates(element, precision=6):
+    points = []
+    for chunk in (element.text or "").split():
+        lon, lat, *_ = (float(v) for v in chunk.split(","))
+        points.append([round(lon, precision), round(lat, precision)])
+    return points
+
+
+def _geometry(placemark):
+    point = placemark.find(".//kml:Point/kml:coordinates", KML_NS)
+    if point is not None:
+        return {"type": "Point", "coordinates": _coordinates(point)[0]}
+    ring = placemark.find(".//kml:Polygon/kml:outerBoundaryIs/kml:LinearRing/kml:coordinates", KML_NS)
+    if ring is not None:
+        return {"type": "Polygon", "coordinates": [_coordinates(ring)]}
+    line = placemark.find(".//kml:LineString/kml:coordinates", KML_NS)
+    if line is not None:
+        return {"type": "LineString", "coordinates": _coordinates(line)}
+    return None
+
+
+def read_features(path=KML_PATH):
+    """
+    Placemarks as GeoJSON features (Point, Polygon or LineString) with
+    name, folder and sanitized description properties.
+    """
+    features = []
+    for placemark, folders in read_placemarks(path):
+        geometry = _geometry(placemark)
+        if geometry is None:
+            continue
+        features.append({
+            "type": "Feature",
+            "geometry": geometry,
+            "properties": {
+                "name": _text(placemark, "kml:name") or "Unnamed site",
+                "folder": " / ".join(folders),
+                "description": sanitize_description(_text(placemark, "kml:description")),
+            },
+        })
+    return features
@@ -0,0 +1,290 @@
+"""
+Compiled, memory-mapped TLE store.
+
+active.tle is parsed once into a columnar NumPy structured array
+(helper.satellites.ELEMENT_DTYPE) saved as .npy next to a name index and a
+NORAD-number index. Later opens memory-map those files, so propagation,
+search and filtering pay no parsing cost. The store is rebuilt only when the
+source file's SHA-256 changes.
+
+New TLE drops are merged incrementally with merge_update(), which diffs by
+NORAD number and epoch without reparsing the source, rewrites the store
+through write_store() only when something changed and keeps the last few
+superseded epochs per object in a history file. A drop that would
+remove more than MAX_DECAY_FRACTION of the catalog (usually a truncated
+download) is refused unless forced:
+
+    python -m helper.tle_store update path/to/new_drop.tle [--replace-source] [--force]
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+
+from helper.handoff import atomic_write_bytes
+from helper.satellites import DEFAULT_TLE_PATH, ELEMENT_DTYPE, read_tle
+
+STORE_DIR = "./cache/tle"
+STORE_FORMAT = 1 # Bump when the on-disk layout or ELEMENT_DTYPE changes
+
+ELEMENTS_FILE = "elements.npy"
+NAME_INDEX_FILE = "name_index.npy" # argsort of upper-cased names
+SORTED_NAMES_FILE = "sorted_names.npy" # upper-cased names in name-index order
+SATNUM_INDEX_FILE = "satnum_index.npy" # argsort of NORAD numbers
+HISTORY_FILE = "history.npy" # superseded and decayed element sets
+META_FILE = "meta.json"
+
+HISTORY_DEPTH = 5 # Previous epochs kept per object
+MAX_DECAY_FRACTION = 0.05 # Share of the catalog one drop may remove without force=True
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_npy(path, array):
+    buf = io.BytesIO()
+    np.save(buf, array, allow_pickle=False)
+    atomic_write_bytes(path, buf.getvalue())
+
+
+def _read_meta(store_dir):
+    try:
+        with open(os.path.join(store_dir, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(store_dir, meta):
+    atomic_write_bytes(os.path.join(store_dir, META_FILE), json.dumps(meta, indent=4).encode("utf-8"))
+
+
+def _write_name_index(elements, store_dir):
+    upper_names = np.char.upper(elements["name"])
+    name_index = np.argsort(upper_names, kind="stable")
+    _save_npy(os.path.join(store_dir, NAME_INDEX_FILE), name_index)
+    _save_npy(os.path.join(store_dir, SORTED_NAMES_FILE), upper_names[name_index])
+
+
+def write_store(elements, store_dir=STORE_DIR, meta=None):
+    """
+    Writes elements plus their indexes and metadata. The metadata is written
+    last, so an interrupted write is detected and rebuilt on the next open.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    _save_npy(os.path.join(store_dir, ELEMENTS_FILE), elements)
+    _write_name_index(elements, store_dir)
+    _save_npy(os.path.join(store_dir, SATNUM_INDEX_FILE), np.argsort(elements["satnum"], kind="stable"))
+    meta = {**(meta or {}), "format": STORE_FORMAT, "count": int(len(elements))}
+    _write_meta(store_dir, meta)
+    return meta
+
+
+def compile_store(source=DEFAULT_TLE_PATH, store_dir=STORE_DIR, force=False):
+    """
+    Rebuilds the store from `source` if its content changed. The size/mtime
+    pair is checked first so an unchanged file is not even hashed.
+    Returns True if the store was rebuilt.
+    """
+    stat = os.stat(source)
+    meta = _read_meta(store_dir)
+    up_to_date = meta.get("format") == STORE_FORMAT and os.path.exists(os.path.join(store_dir, ELEMENTS_FILE))
+    if not force and up_to_date and meta.get("source_size") == stat.st_size and meta.get("source_mtime_ns") == stat.st_mtime_ns:
+        return False
+
+    source_hash = file_sha256(source)
+    source_meta = {"source_hash": source_hash, "source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+    if not force and up_to_date and meta.get("source_hash") == source_hash:
+        # Touched but unchanged: refresh the fast-path stamp only
+        _write_meta(store_dir, {**meta, **source_meta})
+        return False
+
+    write_store(read_tle(source), store_dir, {**source_meta, "revision": meta.get("revision", 0) + 1})
+    return True
+
+
+class TLEStore:
+    """
+    Read-only, memory-mapped view of a compiled store.
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        self.meta = _read_meta(store_dir)
+        self.elements = np.load(os.path.join(store_dir, ELEMENTS_FILE), mmap_mode="r")
+        self._name_index = np.load(os.path.join(store_dir, NAME_INDEX_FILE), mmap_mode="r")
+        self._sorted_names = np.load(os.path.join(store_dir, SORTED_NAMES_FILE), mmap_mode="r")
+        self._satnum_index = np.load(os.path.join(store_dir, SATNUM_INDEX_FILE), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.elements)
+
+    @property
+    def epoch(self):
+        """
+        Element epochs as Julian dates.
+        """
+        return self.elements["epoch_jd"] + self.elements["epoch_fr"]
+
+    def find_name(self, prefix):
+        """
+        Row indexes of satellites whose name starts with `prefix`
+        (case-insensitive), found by binary search on the name index.
+        """
+        prefix = prefix.upper()
+        lo = np.searchsorted(self._sorted_names, prefix, side="left")
+        hi = np.searchsorted(self._sorted_names, prefix + "\uffff", side="left")
+        return np.sort(self._name_index[lo:hi])
+
+    def find_satnum(self, satnums):
+        """
+        Row index for each NORAD number, or -1 where it is not in the store.
+        """
+        satnums = np.atleast_1d(np.asarray(satnums))
+        sorted_satnums = self.elements["satnum"][self._satnum_index]
+        pos = np.clip(np.searchsorted(sorted_satnums, satnums), 0, len(sorted_satnums) - 1)
+        rows = np.asarray(self._satnum_index[pos])
+        return np.where(sorted_satnums[pos] == satnums, rows, -1)
+
+    def epoch_between(self, start_jd, end_jd):
+        epoch = self.epoch
+        return np.nonzero((epoch >= start_jd) & (epoch < end_jd))[0]
+
+    def history(self, satnum):
+        """
+        Superseded element sets for one object, oldest first.
+        """
+        history = load_history(self.store_dir)
+        return history[history["satnum"] == satnum]
+
+
+def open_store(source=DEFAULT_TLE_PATH, store_dir=STORE_DIR):
+    """
+    Compiles the store if needed and opens it.
+    """
+    compile_store(source, store_dir)
+    return TLEStore(store_dir)
+
+
+def load_history(store_dir=STORE_DIR):
+    try:
+        return np.load(os.path.join(store_dir, HISTORY_FILE), mmap_mode="r")
+    except OSError:
+        return np.empty(0, dtype=ELEMENT_DTYPE)
+
+
+def _epoch(elements):
+    return elements["epoch_jd"] + elements["epoch_fr"]
+
+
+def _append_history(store_dir, superseded, depth=HISTORY_DEPTH):
+    """
+    Adds superseded element sets to the history, keeping the newest `depth`
+    epochs per NORAD number.
+    """
+    history = np.concatenate([np.array(load_history(store_dir)), superseded])
+    history = history[np.lexsort((_epoch(history), history["satnum"]))]
+    _, starts, counts = np.unique(history["satnum"], return_index=True, return_counts=True)
+    position = np.arange(len(history)) - np.repeat(starts, counts)
+    _save_npy(os.path.join(store_dir, HISTORY_FILE), history[position >= np.repeat(counts, counts) - depth])
+
+
+def merge_update(drop, source=DEFAULT_TLE_PATH, store_dir=STORE_DIR, replace_source=False, force=False):
+    """
+    Merges a new TLE drop into the store by NORAD number and epoch.
+
+    Element sets with a newer epoch replace the stored ones, unknown objects
+    are added and objects missing from the drop are treated as decayed and
+    removed. Replaced and removed sets go to the history. The store files are
+    replaced atomically (write_store), never modified in place, since running
+    readers may have them memory-mapped. With `replace_source` the drop also becomes the new source file,
+    stamped in the metadata so it does not trigger a full recompile.
+
+    Raises ValueError for an empty drop, and for one that would remove more
+    than MAX_DECAY_FRACTION of the stored objects unless `force` is set;
+    nothing is written in either case.
+
+    Returns counts of added, updated, decayed and unchanged objects.
+    """
+    new = read_tle(drop)
+    if len(new) == 0:
+        raise ValueError(f"TLE drop '{drop}' contains no element sets")
+    new = new[np.lexsort((_epoch(new), new["satnum"]))]
+    new = new[np.r_[new["satnum"][1:] != new["satnum"][:-1], True]] # Newest set per object
+
+    compile_store(source, store_dir)
+    store = TLEStore(store_dir)
+    meta = dict(store.meta)
+    current = np.array(store.elements)
+    rows = store.find_satnum(new["satnum"])
+    del store # Release the memory maps before files are replaced
+
+    known = rows >= 0
+    updated = known.copy()
+    updated[known] = _epoch(new[known]) > _epoch(current[rows[known]])
+    updated_rows = rows[updated]
+    present = np.zeros(len(current), dtype=bool)
+    present[rows[known]] = True
+    decayed_rows = np.nonzero(~present)[0]
+    added = new[~known]
+    if len(decayed_rows) > MAX_DECAY_FRACTION * len(current) and not force:
+        raise ValueError(
+            f"TLE drop '{drop}' would remove {len(decayed_rows)} of {len(current)} objects as decayed, "
+            "which looks like a truncated drop; pass force=True to merge it anyway"
+        )
+
+    superseded = np.concatenate([current[updated_rows], current[decayed_rows]])
+    if len(superseded):
+        _append_history(store_dir, superseded)
+
+    if len(updated_rows) or len(added) or len(decayed_rows):
+        current[updated_rows] = new[updated]
+        current = np.concatenate([np.delete(current, decayed_rows), added])
+        meta = write_store(current, store_dir, meta)
+
+    report = {
+        "added": int(len(added)),
+        "updated": int(len(updated_rows)),
+        "decayed": int(len(decayed_rows)),
+        "unchanged": int(known.sum() - len(updated_rows)),
+    }
+
+    if replace_source:
+        with open(drop, "rb") as f:
+            atomic_write_bytes(source, f.read())
+        stat = os.stat(source)
+        meta.update({"source_hash": file_sha256(source), "source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns})
+    if report["added"] or report["updated"] or report["decayed"]:
+        meta["revision"] = meta.get("revision", 0) + 1
+    meta["last_update"] = report
+    _write_meta(store_dir, meta)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile or update the TLE store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile", help="rebuild the store from the source TLE file if it changed")
+    compile_parser.add_argument("--force", action="store_true")
+    update_parser = commands.add_parser("update", help="merge a new TLE drop into the store")
+    update_parser.add_argument("drop")
+    update_parser.add_argument("--replace-source", action="store_true", help="make the drop the new source TLE file")
+    update_parser.add_argument("--force", action="store_true", help="merge even if the drop removes a large share of the catalog")
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        print("🛰️  Store rebuilt" if compile_store(force=args.force) else "🛰️  Store up to date")
+    else:
+        try:
+            report = merge_update(args.drop, replace_source=args.replace_source, force=args.force)
+        except ValueError as e:
+            raise SystemExit(f"❌ {e}")
+        print("🛰️  " + ", ".join(f"{key}: {value}" for key, value in report.items()))
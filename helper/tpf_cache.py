@@ -0,0 +1,328 @@
+"""
+Persistent on-disk cache for lightkurve target pixel files.
+
+Downloads are keyed by (target, quarter, mission), where "quarter" is the
+Kepler quarter, K2 campaign or TESS sector. A hit skips both the MAST search
+and the download. The cache is capped by size and evicts the least recently
+used files first, skipping files pinned by a running read or batch. In
+offline mode only cached files are served. The index is updated under a lock
+file, so several app or CLI processes can share one cache directory.
+
+    python -m helper.tpf_cache warm "KIC 8462852" "KIC 11446443" --quarters 16 17
+    python -m helper.tpf_cache list
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from helper.handoff import atomic_write_bytes
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+CACHE_DIR = "./cache/tpf"
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+MAX_CACHE_BYTES = 2 * 1024**3
+MISSIONS = ("Kepler", "K2", "TESS")
+
+# The search keyword that selects one observing period per mission
+_PERIOD_KEYWORD = {"Kepler": "quarter", "K2": "campaign", "TESS": "sector"}
+
+_index_lock = threading.Lock() # Index updates in this process, held with the lock file
+_state_lock = threading.Lock() # _key_locks and _pins, never held while waiting on the lock file
+_key_locks = {} # key -> [lock, users], dropped when the last user is done
+_pins = {} # key -> number of reads / batches using the file
+
+
+def normalize_target(target):
+    return " ".join(str(target).upper().split())
+
+
+def cache_key(target, quarter, mission="Kepler"):
+    return f"{mission}|{normalize_target(target)}|{int(quarter)}"
+
+
+def _file_name(key):
+    mission, target, quarter = key.split("|")
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", target)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+    return f"{mission.lower()}-{slug}-{quarter}-{digest}.fits"
+
+
+def _read_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(cache_dir, index):
+    atomic_write_bytes(os.path.join(cache_dir, INDEX_FILE), json.dumps(index, indent=4).encode("utf-8"))
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass # LK_LOCK gives up after 10 s, keep waiting
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def _locked(cache_dir):
+    # Index read-modify-write, exclusive across threads and processes
+    with _index_lock:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, LOCK_FILE), "a+b") as f:
+            f.seek(0)
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+
+@contextlib.contextmanager
+def _key_locked(key):
+    with _state_lock:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _state_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _key_locks[key]
+
+
+def pin(keys):
+    """
+    Protects the files of these cache keys from evict() in this process
+    until unpin() is called with the same keys.
+    """
+    with _state_lock:
+        for key in keys:
+            _pins[key] = _pins.get(key, 0) + 1
+
+
+def unpin(keys):
+    with _state_lock:
+        for key in keys:
+            _pins[key] -= 1
+            if _pins[key] <= 0:
+                del _pins[key]
+
+
+@contextlib.contextmanager
+def pinned(keys):
+    keys = list(keys)
+    pin(keys)
+    try:
+        yield
+    finally:
+        unpin(keys)
+
+
+def cached_path(target, quarter, mission="Kepler", cache_dir=CACHE_DIR):
+    """
+    Path of the cached FITS file, or None.
+    """
+    entry = _read_index(cache_dir).get(cache_key(target, quarter, mission))
+    if entry is None:
+        return None
+    path = os.path.join(cache_dir, entry["file"])
+    return path if os.path.isfile(path) else None
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, keep=()):
+    """
+    Removes least recently used files until the cache fits in `max_bytes`.
+    FITS files missing from the index (left by an interrupted run) count
+    towards the size and go first, by modification time. Keys in `keep` and
+    pinned keys are never removed. Returns the evicted keys, and the names
+    of the evicted files that were missing from the index.
+    """
+    # _state_lock only once the lock file is held: no file is pinned mid-eviction
+    with _locked(cache_dir), _state_lock:
+        index = _read_index(cache_dir)
+        protected = set(keep) | set(_pins)
+        protected_files = {_file_name(key) for key in protected}
+        indexed = {entry["file"] for entry in index.values()}
+        candidates = [(entry["last_used"], key, entry["file"], entry["size"]) for key, entry in index.items()]
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if name.endswith(".fits") and name not in indexed and name not in protected_files and os.path.isfile(path):
+                stat = os.stat(path)
+                candidates.append((stat.st_mtime, None, name, stat.st_size))
+        total = sum(size for _, _, _, size in candidates)
+        evicted = []
+        # Orphans sort first: they are never read again
+        for _, key, name, size in sorted(candidates, key=lambda c: (c[1] is not None, c[0])):
+            if total <= max_bytes:
+                break
+            if key in protected:
+                continue
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue # Still open elsewhere (Windows), try again next time
+            total -= size
+            if key is None:
+                evicted.append(name)
+            else:
+                evicted.append(key)
+                del index[key]
+        if len(index) < len(indexed):
+            _write_index(cache_dir, index)
+    return evicted
+
+
+def _touch_locked(cache_dir, key, entry=None):
+    index = _read_index(cache_dir)
+    if entry is not None:
+        index[key] = entry
+    elif key not in index:
+        return
+    index[key]["last_used"] = time.time()
+    _write_index(cache_dir, index)
+
+
+def _touch(cache_dir, key, entry=None):
+    with _locked(cache_dir):
+        _touch_locked(cache_dir, key, entry)
+
+
+def _download(target, quarter, mission, cache_dir, key):
+    from lightkurve import search_targetpixelfile
+
+    if mission not in _PERIOD_KEYWORD:
+        raise ValueError(f"Unknown mission '{mission}', expected one of {', '.join(MISSIONS)}")
+    result = search_targetpixelfile(target, mission=mission, **{_PERIOD_KEYWORD[mission]: int(quarter)})
+    if len(result) == 0:
+        raise ValueError(f"No {mission} target pixel file for '{target}' in {_PERIOD_KEYWORD[mission]} {quarter}")
+
+    # Download next to the cache so the final move is a rename
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix=".download-")
+    try:
+        tpf = result[0].download(download_dir=staging)
+        path = os.path.join(cache_dir, _file_name(key))
+        with _locked(cache_dir): # Indexed before another process's evict() could take it for an orphan
+            os.replace(tpf.path, path)
+            _touch_locked(cache_dir, key, {
+                "file": os.path.basename(path),
+                "size": os.path.getsize(path),
+                "target": normalize_target(target),
+                "quarter": int(quarter),
+                "mission": mission,
+            })
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return path
+
+
+def fetch_tpf_path(target, quarter, mission="Kepler", offline=False, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Path of the cached FITS file for (target, quarter, mission), searched and
+    downloaded from MAST first when it is not cached. With offline=True a
+    miss raises FileNotFoundError instead of downloading.
+    """
+    key = cache_key(target, quarter, mission)
+    with _key_locked(key): # Concurrent requests for one file download it once
+        path = cached_path(target, quarter, mission, cache_dir)
+        if path is None:
+            if offline:
+                raise FileNotFoundError(f"{normalize_target(target)} ({mission} {quarter}) is not cached and offline mode is on")
+            path = _download(target, quarter, mission, cache_dir, key)
+            evict(cache_dir, max_bytes, keep={key})
+        else:
+            _touch(cache_dir, key)
+        return path
+
+
+def fetch_tpf(target, quarter, mission="Kepler", offline=False, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Target pixel file for (target, quarter, mission) through the cache; see
+    fetch_tpf_path(). The file is pinned until it has been read.
+    """
+    from lightkurve import read
+    with pinned([cache_key(target, quarter, mission)]):
+        return read(fetch_tpf_path(target, quarter, mission, offline, cache_dir, max_bytes))
+
+
+def cache_entries(cache_dir=CACHE_DIR):
+    """
+    Cached files as a list of index entries, most recently used first.
+    """
+    index = _read_index(cache_dir)
+    return sorted(index.values(), key=lambda entry: entry["last_used"], reverse=True)
+
+
+def warm(targets, quarters, mission="Kepler", cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Downloads every (target, quarter) pair that is not cached yet. Yields
+    (target, quarter, status) with status "cached", "downloaded" or the error.
+    """
+    for target in targets:
+        for quarter in quarters:
+            if cached_path(target, quarter, mission, cache_dir):
+                yield target, quarter, "cached"
+                continue
+            try:
+                fetch_tpf_path(target, quarter, mission, cache_dir=cache_dir, max_bytes=max_bytes)
+                yield target, quarter, "downloaded"
+            except Exception as e:
+                yield target, quarter, f"failed: {e}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the target pixel file cache.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--max-gb", type=float, default=MAX_CACHE_BYTES / 1024**3)
+    commands = parser.add_subparsers(dest="command", required=True)
+    warm_parser = commands.add_parser("warm", help="download targets ahead of time")
+    warm_parser.add_argument("targets", nargs="+")
+    warm_parser.add_argument("--quarters", type=int, nargs="+", required=True)
+    warm_parser.add_argument("--mission", choices=MISSIONS, default="Kepler")
+    commands.add_parser("list", help="show cached files")
+    args = parser.parse_args()
+
+    max_bytes = int(args.max_gb * 1024**3)
+    if args.command == "warm":
+        for target, quarter, status in warm(args.targets, args.quarters, args.mission, args.cache_dir, max_bytes):
+            icon = "✅" if status in ("cached", "downloaded") else "❌"
+            print(f"{icon} {normalize_target(target)} {args.mission} {quarter}: {status}")
+    else:
+        entries = cache_entries(args.cache_dir)
+        for entry in entries:
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_used"]))
+            print(f"📦 {entry['target']:<20} {entry['mission']:<6} {entry['quarter']:>3}  {entry['size'] / 1e6:8.1f} MB  last used {used}")
+        print(f"💾 {len(entries)} files, {sum(e['size'] for e in entries) / 1e6:.1f} MB of {max_bytes / 1e6:.0f} MB")
@@ -0,0 +1,169 @@
+"""
+Observer-based alt/az for the sky map's star catalog.
+
+Transforming every star with astropy is accurate but costs far more than
+the map can afford per frame. The full ICRS -> AltAz chain (precession,
+nutation, Earth rotation, polar motion) is a rotation for a given site and
+instant, so astropy is asked only for that rotation, by transforming the
+three basis vectors, and the whole catalog is then rotated with one matrix
+product. Matrices are cached per (site, second), so replaying a time range
+or serving several maps costs astropy nothing after the first pass.
+
+Annual aberration (up to ~20") is direction dependent and only averaged into
+the best-fit rotation, so positions are good to about half an arcminute, far
+below a pixel on the map. Refraction is not applied (pressure 0), so
+altitudes are geometric.
+
+    python -m helper.visibility --lat 50.52 --lon 6.88 --hours 2
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from helper.sky_catalog import CATALOG_DIR, read_chunk
+
+MATRIX_CACHE_SIZE = 4096 # (site, second) rotations kept
+VISIBILITY_STEP_S = 60.0
+MIN_ALTITUDE_DEG = 0.0
+
+_matrix_cache = OrderedDict()
+_matrix_lock = threading.Lock()
+_catalogs = {}
+_catalog_lock = threading.Lock()
+
+
+def _site_key(lat, lon, height):
+    return round(float(lat), 6), round(float(lon), 6), round(float(height), 3)
+
+
+def _fit_rotation(columns):
+    # Nearest proper rotation to the transformed basis (Kabsch)
+    u, _, vt = np.linalg.svd(columns)
+    return u @ vt
+
+
+def _astropy_matrices(seconds, lat, lon, height):
+    import astropy.units as u
+    from astropy.coordinates import ICRS, AltAz, CartesianRepresentation, EarthLocation, SkyCoord
+    from astropy.time import Time
+
+    location = EarthLocation.from_geodetic(lon * u.deg, lat * u.deg, height * u.km)
+    n = len(seconds)
+    obstime = Time(np.repeat(seconds, 3), format="unix")
+    basis = np.tile(np.eye(3), (n, 1))
+    altaz = SkyCoord(CartesianRepresentation(*basis.T), frame=ICRS).transform_to(
+        AltAz(obstime=obstime, location=location, pressure=0 * u.hPa)
+    )
+    alt, az = altaz.alt.rad, altaz.az.rad
+    # Local east, north, up for each transformed basis vector
+    enu = np.stack([np.cos(alt) * np.sin(az), np.cos(alt) * np.cos(az), np.sin(alt)], axis=-1)
+    columns = enu.reshape(n, 3, 3).transpose(0, 2, 1)
+    return np.array([_fit_rotation(m) for m in columns])
+
+
+def altaz_matrices(times, lat, lon, height=0.0):
+    """
+    Rotation matrices (T, 3, 3) taking ICRS unit vectors to local east,
+    north, up at a site (degrees, km) for Unix `times`, rounded to the
+    second. Missing matrices are computed in one astropy call and cached.
+    """
+    seconds = np.round(np.atleast_1d(np.asarray(times, dtype=float)))
+    site = _site_key(lat, lon, height)
+    out = np.empty((len(seconds), 3, 3))
+    missing = []
+    with _matrix_lock:
+        for k, second in enumerate(seconds):
+            matrix = _matrix_cache.get((site, second))
+            if matrix is None:
+                missing.append(k)
+            else:
+                _matrix_cache.move_to_end((site, second))
+                out[k] = matrix
+
+    if missing:
+        unique = np.unique(seconds[missing])
+        computed = dict(zip(unique, _astropy_matrices(unique, *site)))
+        with _matrix_lock:
+            for second, matrix in computed.items():
+                _matrix_cache[(site, second)] = matrix
+            while len(_matrix_cache) > MATRIX_CACHE_SIZE:
+                _matrix_cache.popitem(last=False)
+        for k in missing:
+            out[k] = computed[seconds[k]]
+    return out
+
+
+def to_altaz(xyz, matrices):
+    """
+    Altitude and azimuth in degrees (T, N) of unit vectors xyz (N, 3);
+    azimuth is measured from north through east.
+    """
+    enu = np.einsum("tij,nj->tni", matrices, xyz)
+    alt = np.degrees(np.arcsin(np.clip(enu[..., 2], -1.0, 1.0)))
+    az = np.degrees(np.arctan2(enu[..., 0], enu[..., 1])) % 360.0
+    return alt, az
+
+
+def load_catalog(catalog_dir=CATALOG_DIR):
+    """
+    The sky map's star tiers (see helper.sky_catalog) as a list of chunks,
+    read once per directory.
+    """
+    with _catalog_lock:
+        if catalog_dir not in _catalogs:
+            with open(os.path.join(catalog_dir, "index.json"), encoding="utf-8") as f:
+                index = json.load(f)
+            _catalogs[catalog_dir] = [read_chunk(os.path.join(catalog_dir, tier["file"])) for tier in index["tiers"]]
+        return _catalogs[catalog_dir]
+
+
+def visible_stars(lat, lon, height=0.0, start=None, hours=0.0, step=VISIBILITY_STEP_S,
+                  min_altitude=MIN_ALTITUDE_DEG, tiers=None, catalog_dir=CATALOG_DIR):
+    """
+    Stars above `min_altitude` for a site over `hours` from `start` (Unix
+    time, default now) every `step` seconds. Returns one dict per time with
+    "time" and, per tier, the visible star indexes into that tier with their
+    alt / az in degrees, plus the ICRS -> east/north/up "matrix".
+    """
+    catalog = load_catalog(catalog_dir)
+    start = time.time() if start is None else float(start)
+    times = start + np.arange(0.0, hours * 3600.0 + step / 2, step)
+    matrices = altaz_matrices(times, lat, lon, height)
+    tiers = range(len(catalog)) if tiers is None else tiers
+
+    frames = [{"time": float(t), "matrix": m, "tiers": {}} for t, m in zip(times, matrices)]
+    for tier in tiers:
+        alt, az = to_altaz(catalog[tier]["xyz"], matrices)
+        for k, frame in enumerate(frames):
+            index = np.nonzero(alt[k] > min_altitude)[0]
+            frame["tiers"][tier] = {"index": index, "alt": alt[k, index], "az": az[k, index]}
+    return frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the catalog stars above the horizon at a site.")
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--height", type=float, default=0.0, help="km above the ellipsoid")
+    parser.add_argument("--hours", type=float, default=0.0)
+    parser.add_argument("--step", type=float, default=VISIBILITY_STEP_S)
+    parser.add_argument("--catalog", default=CATALOG_DIR)
+    args = parser.parse_args()
+
+    start = time.time()
+    for label in ("astropy + transform", "cached matrices"):
+        started = time.perf_counter()
+        frames = visible_stars(args.lat, args.lon, args.height, start, args.hours, args.step, catalog_dir=args.catalog)
+        elapsed = time.perf_counter() - started
+        print(f"⏱️  {label}: {len(frames)} times in {elapsed * 1000:.1f} ms")
+
+    total = sum(len(chunk["mag"]) for chunk in load_catalog(args.catalog))
+    for frame in frames[:: max(1, len(frames) // 10)]:
+        visible = sum(len(tier["index"]) for tier in frame["tiers"].values())
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.gmtime(frame["time"]))
+        print(f"🔭 {stamp} UTC: {visible} of {total} stars above the horizon")
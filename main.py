@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 import time
@@ -45,31 +46,42 @@ def start_shutdown_server():
     print("🛎️  Listening for shutdown command at http://localhost:9999/shutdown")
     server.serve_forever()
 
-# ✅ Start shutdown listener in background
-threading.Thread(target=start_shutdown_server, daemon=True).start()
-
-# ✅ Launch Streamlit directly
-import streamlit.web.cli as cli
-
-# Set proper Streamlit context
-os.environ["STREAMLIT_SERVER_FILE_WATCHER_TYPE"] = "none"
-os.environ["STREAMLIT_GLOBAL_DEVELOPMENT_MODE"] = "false"  # <- Fixes the error
-
-# Use appropriate path depending on whether frozen or not
-if getattr(sys, 'frozen', False):
-    app_path = os.path.join(os.path.dirname(sys.executable), "_internal", "app.py")
-else:
-    app_path = os.path.join(os.path.dirname(__file__), "app.py")
-
-print(f"[DEBUG] app.py path: {app_path}")
-print(f"[DEBUG] Exists: {os.path.exists(app_path)}")
-
-sys.argv = [
-    "streamlit", "run", app_path,
-    "--server.headless=true",
-    "--server.port=8501",
-    "--server.address=127.0.0.1",
-    "--server.baseUrlPath=9e7de3"
-]
-
-cli.main()
+# Everything below only runs in the launching process: job worker processes
+# (helper.jobs, spawn start method on Windows/macOS and in the PyInstaller
+# build) re-import this module and must not start servers or Streamlit again
+if __name__ == "__main__":
+    # ✅ Let frozen worker processes run their task instead of the app
+    multiprocessing.freeze_support()
+
+    # ✅ Start shutdown listener in background
+    threading.Thread(target=start_shutdown_server, daemon=True).start()
+
+    # ✅ Start local map data server (satellite positions) in background
+    from helper.map_server import ensure_map_server
+    ensure_map_server()
+
+    # ✅ Launch Streamlit directly
+    import streamlit.web.cli as cli
+
+    # Set proper Streamlit context
+    os.environ["STREAMLIT_SERVER_FILE_WATCHER_TYPE"] = "none"
+    os.environ["STREAMLIT_GLOBAL_DEVELOPMENT_MODE"] = "false"  # <- Fixes the error
+
+    # Use appropriate path depending on whether frozen or not
+    if getattr(sys, 'frozen', False):
+        app_path = os.path.join(os.path.dirname(sys.executable), "_internal", "app.py")
+    else:
+        app_path = os.path.join(os.path.dirname(__file__), "app.py")
+
+    print(f"[DEBUG] app.py path: {app_path}")
+    print(f"[DEBUG] Exists: {os.path.exists(app_path)}")
+
+    sys.argv = [
+        "streamlit", "run", app_path,
+        "--server.headless=true",
+        "--server.port=8501",
+        "--server.address=127.0.0.1",
+        "--server.baseUrlPath=9e7de3"
+    ]
+
+    cli.main()
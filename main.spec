@@ -16,9 +16,9 @@ hidden_imports = (
     + ['streamlit.runtime.scriptrunner.magic_funcs']         # <-- Explicit fallback
 )
 
-# Include local folders like love/, visual/, images/
+# Include local folders like love/, visual/, images/ and the built maps (npm run build in maps/)
 datas = []
-for folder in ['sections', 'helper', 'love', 'visual', 'images']:
+for folder in ['sections', 'helper', 'love', 'visual', 'images', 'maps/dist']:
     if os.path.isdir(folder):
         for root, _, files in os.walk(folder):
             for file in files:
@@ -16,13 +16,11 @@ const DefaultIcon = L.icon({
 L.Marker.prototype.options.icon = DefaultIcon;
 
 
-// Utility: Clean up raw KML HTML
-function cleanDescription(desc) {
-  return desc
-    .replace(/<iframe.*?<\/iframe>/g, '')
-    .replace(/style=".*?"/g, '')
-    .replace(/width="\d+"/g, 'width="100%"')
-    .replace(/height="\d+"/g, '');
+// Clustered GeoJSON tiles built from the KML by helper/geo_tiles.py
+const TILES_URL = "/data/radiotelescope";
+
+function escapeHtml(text) {
+  return text.replace(/[&<>"']/g, (c) => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;" }[c]));
 }
 
 // Create the map
@@ -40,28 +38,103 @@ L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
   attribution: '© OpenStreetMap contributors'
 }).addTo(map);
 
-// Load KML and bind styled popups
-omnivore.kml("/data/Radio-Telescope-Arrays-Worldwide-ClimateViewer-3D.kml")
-  .on("ready", function () {
-    map.fitBounds(this.getBounds());
-
-    this.eachLayer(function (layer) {
-      const props = layer.feature?.properties || {};
-      const name = props.name || props.Name || "Unnamed Radio Telescope";
-      const rawDesc = props.description || "";
-      const cleanedDesc = cleanDescription(rawDesc);
-
-      const popupContent = `
-        <div class="popup-wrapper">
-          <h3>${name}</h3>
-          <div class="desc-content">${cleanedDesc}</div>
-        </div>
-      `;
-
-      layer.bindPopup(popupContent, {
-        maxWidth: 320,
-        className: "custom-popup"
-      });
-    });
-  })
-  .addTo(map);
+const siteLayer = L.layerGroup().addTo(map);
+const tileCache = new Map(); // url -> Promise of parsed JSON
+
+function fetchJson(url) {
+  if (!tileCache.has(url)) {
+    tileCache.set(url, fetch(url).then((res) => {
+      if (!res.ok) throw new Error(`HTTP ${res.status} for ${url}`);
+      return res.json();
+    }));
+  }
+  return tileCache.get(url);
+}
+
+// Same projection as helper/geo_tiles.py tile_of()
+function tileOf(lat, lng, zoom) {
+  const n = 2 ** zoom;
+  const clamped = Math.max(Math.min(lat, 85.05112878), -85.05112878) * Math.PI / 180;
+  const x = Math.floor((lng + 180) / 360 * n);
+  const y = Math.floor((1 - Math.log(Math.tan(clamped) + 1 / Math.cos(clamped)) / Math.PI) / 2 * n);
+  return [Math.min(Math.max(x, 0), n - 1), Math.min(Math.max(y, 0), n - 1)];
+}
+
+function clusterMarker(feature) {
+  const [lng, lat] = feature.geometry.coordinates;
+  const { count, bounds } = feature.properties;
+  const size = count < 10 ? 30 : count < 100 ? 38 : 46;
+  const marker = L.marker([lat, lng], {
+    icon: L.divIcon({
+      html: `<div class="cluster-count">${count}</div>`,
+      className: "site-cluster",
+      iconSize: [size, size],
+    }),
+  });
+  const [west, south, east, north] = bounds;
+  marker.on("click", () => map.fitBounds([[south, west], [north, east]], { padding: [40, 40], maxZoom: map.getMaxZoom() }));
+  return marker;
+}
+
+function siteLayerFor(feature) {
+  const { name, id, detail } = feature.properties;
+  const layer = L.geoJSON(feature);
+  layer.bindPopup(`<div class="popup-wrapper"><h3>${escapeHtml(name)}</h3></div>`, {
+    maxWidth: 320,
+    className: "custom-popup",
+  });
+  // Descriptions are sanitized at build time and loaded on first open
+  layer.on("popupopen", async (event) => {
+    const details = await fetchJson(`${TILES_URL}/details/${detail}.json`);
+    const props = details[id] || {};
+    event.popup.setContent(`
+      <div class="popup-wrapper">
+        <h3>${escapeHtml(props.name || name)}</h3>
+        <div class="desc-content">${props.description || ""}</div>
+      </div>
+    `);
+  });
+  return layer;
+}
+
+function startTiles(index) {
+  let generation = 0;
+
+  async function loadViewport() {
+    const current = ++generation;
+    const zoom = Math.min(Math.max(map.getZoom(), index.minZoom), index.maxZoom);
+    const tileZoom = Math.max(zoom - index.tileOffset, 0);
+    const available = new Set(index.tiles[zoom] || []);
+    const bounds = map.getBounds();
+    const [x0, y0] = tileOf(bounds.getNorth(), bounds.getWest(), tileZoom);
+    const [x1, y1] = tileOf(bounds.getSouth(), bounds.getEast(), tileZoom);
+
+    const requests = [];
+    for (let x = x0; x <= x1; x++) {
+      for (let y = y0; y <= y1; y++) {
+        const key = `${x}-${y}`;
+        if (available.has(key)) requests.push(fetchJson(`${TILES_URL}/${zoom}/${key}.json`));
+      }
+    }
+    const collections = await Promise.all(requests);
+    if (current !== generation) return; // A newer move superseded this one
+
+    siteLayer.clearLayers();
+    for (const collection of collections) {
+      for (const feature of collection.features) {
+        siteLayer.addLayer(feature.properties.cluster ? clusterMarker(feature) : siteLayerFor(feature));
+      }
+    }
+  }
+
+  map.on("moveend", loadViewport);
+  if (index.bounds) {
+    const [west, south, east, north] = index.bounds;
+    map.fitBounds([[south, west], [north, east]]);
+  }
+  loadViewport();
+}
+
+fetchJson(`${TILES_URL}/index.json`)
+  .then(startTiles)
+  .catch((err) => console.error("Could not load radio-telescope tiles", err));
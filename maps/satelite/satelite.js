@@ -69,71 +69,279 @@ function getLatLngFromSatrec(satrec, time = new Date()) {
 
 const colorScale = d3.scaleOrdinal(d3.schemeCategory10);
 
-// Load TLE
-fetch("/data/active.tle")
-  .then(res => res.text())
-  .then(tleText => {
-    const satellites = parseTLE(tleText).slice(0, 200);
-    loadingScreen.remove();
-
-    const trailsLayer = L.layerGroup().addTo(map);
-    const markers = satellites.map((sat) => {
-      const latlngData = getLatLngFromSatrec(sat.satrec);
-      if (!latlngData) return null;
-      const [lat, lon, alt] = latlngData;
-      const category = sat.name.toLowerCase().includes("starlink")
-        ? "Starlink"
-        : sat.name.toLowerCase().includes("iss")
-        ? "ISS"
-        : "Other";
-
-      const marker = L.circleMarker([lat, lon], {
-        radius: 6,
-        color: colorScale(category),
-        fillOpacity: 0.9,
-      })
-        .addTo(map)
-        .bindTooltip(() => `Name: ${sat.name}<br/>Lat: ${lat.toFixed(2)}&deg;<br/>Lon: ${lon.toFixed(2)}&deg;<br/>Alt: ${alt.toFixed(1)} km`);
-
-      marker.on("click", () => {
-        L.popup()
-          .setLatLng([lat, lon])
-          .setContent(
-            `<strong>${sat.name}</strong><br/>` +
-            `Latitude: ${lat.toFixed(2)}&deg;<br/>` +
-            `Longitude: ${lon.toFixed(2)}&deg;<br/>` +
-            `Altitude: ${alt.toFixed(1)} km`
-          )
-          .openOn(map);
-      });
-
-      sat.marker = marker;
-      sat.trail = [];
-      return sat;
-    }).filter(Boolean);
-
-    function updateSatellitePositions() {
-      const now = new Date();
-      trailsLayer.clearLayers();
-
-      for (const sat of markers) {
-        const latlngData = getLatLngFromSatrec(sat.satrec, now);
-        if (!latlngData) continue;
-        const [lat, lon, alt] = latlngData;
+// Local Python propagation server (helper/map_server.py); override with ?api=
+const API_BASE = new URLSearchParams(window.location.search).get("api") || "http://127.0.0.1:8765";
+
+// Must match helper/position_stream.py
+const LATLON_SCALE = 100;
+const ALT_SCALE = 10;
+const MISSING = -32768;
+const MAX_TRAILS = 500; // Trails drawn at most for this many satellites in view
+
+function satelliteCategory(name) {
+  const lower = name.toLowerCase();
+  return lower.includes("starlink") ? "Starlink" : lower.includes("iss") ? "ISS" : "Other";
+}
+
+function decodeBase64(data) {
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  return bytes.buffer;
+}
+
+// Whole catalog, propagated server-side and streamed as delta frames;
+// the browser only applies the changes
+function startServerPropagation(catalog) {
+  loadingScreen.remove();
+
+  const renderer = L.canvas({ padding: 0.5 });
+  const count = catalog.count;
+
+  // Quantized state mirrored from the server
+  const qlat = new Int16Array(count).fill(MISSING);
+  const qlon = new Int16Array(count);
+  const qalt = new Int32Array(count);
+  const valid = new Uint8Array(count);
+
+  // Trail ring mirrored from the server: [trailLength][count] per axis
+  let trailLat = null;
+  let trailLon = null;
+  let trailLength = 0;
+  let trailHead = 0;
+  const trailsLine = L.polyline([], { renderer, color: "lime", opacity: 0.4, weight: 1 }).addTo(map);
+
+  const markers = catalog.names.map((name, i) => {
+    const marker = L.circleMarker([0, 0], {
+      renderer,
+      radius: 3,
+      color: colorScale(satelliteCategory(name)),
+      fillOpacity: 0.9,
+    });
+    marker.on("click", () => {
+      const { lat, lng } = marker.getLatLng();
+      L.popup()
+        .setLatLng([lat, lng])
+        .setContent(
+          `<strong>${name}</strong><br/>` +
+          `Latitude: ${lat.toFixed(2)}&deg;<br/>` +
+          `Longitude: ${lng.toFixed(2)}&deg;<br/>` +
+          `Altitude: ${(qalt[i] / ALT_SCALE).toFixed(1)} km`
+        )
+        .openOn(map);
+    });
+    return marker;
+  });
 
-        sat.marker.setLatLng([lat, lon]);
-        sat.trail.push([lat, lon]);
-        if (sat.trail.length > 50) sat.trail.shift();
+  function moveMarker(i) {
+    const marker = markers[i];
+    marker.setLatLng([qlat[i] / LATLON_SCALE, qlon[i] / LATLON_SCALE]);
+    if (!map.hasLayer(marker)) marker.addTo(map);
+  }
+
+  function applyFrame(buffer) {
+    const [, , nDelta, nReset, nGone] = new Uint32Array(buffer, 0, 6);
+    let offset = 24;
+    const take = (Type, n) => {
+      const values = new Type(buffer, offset, n);
+      offset += n * Type.BYTES_PER_ELEMENT;
+      return values;
+    };
+    const moved = take(Uint8Array, Math.ceil(count / 8));
+    offset += -offset & 3;
+    const resetIdx = take(Uint32Array, nReset);
+    const goneIdx = take(Uint32Array, nGone);
+    const resetAlt = take(Int32Array, nReset);
+    const resetLat = take(Int16Array, nReset);
+    const resetLon = take(Int16Array, nReset);
+    const dLat = take(Int8Array, nDelta);
+    const dLon = take(Int8Array, nDelta);
+    const dAlt = take(Int8Array, nDelta);
+
+    let d = 0;
+    for (let byte = 0; byte < moved.length; byte++) {
+      let bits = moved[byte];
+      while (bits) {
+        const bit = 31 - Math.clz32(bits & -bits); // Lowest set bit
+        bits &= bits - 1;
+        const i = byte * 8 + bit;
+        let lon = qlon[i] + dLon[d];
+        if (lon >= 18000) lon -= 36000;
+        else if (lon < -18000) lon += 36000;
+        qlat[i] += dLat[d];
+        qlon[i] = lon;
+        qalt[i] += dAlt[d];
+        d++;
+        moveMarker(i);
+      }
+    }
+    for (let k = 0; k < nReset; k++) {
+      const i = resetIdx[k];
+      qlat[i] = resetLat[k];
+      qlon[i] = resetLon[k];
+      qalt[i] = resetAlt[k];
+      valid[i] = 1;
+      moveMarker(i);
+    }
+    for (let k = 0; k < nGone; k++) {
+      const i = goneIdx[k];
+      qlat[i] = MISSING;
+      valid[i] = 0;
+      markers[i].remove();
+    }
+  }
 
-        if (sat.trail.length > 1) {
-          L.polyline(sat.trail, {
-            color: "lime",
-            opacity: 0.4,
-            weight: 1,
-          }).addTo(trailsLayer);
+  function drawTrails() {
+    if (!trailLat) return;
+    const bounds = map.getBounds();
+    const segments = [];
+    let drawn = 0;
+    for (let i = 0; i < count && drawn < MAX_TRAILS; i++) {
+      if (!valid[i] || !bounds.contains([qlat[i] / LATLON_SCALE, qlon[i] / LATLON_SCALE])) continue;
+      drawn++;
+      let segment = [];
+      let previousLon = null;
+      for (let step = 0; step < trailLength; step++) {
+        const slot = ((trailHead + step) % trailLength) * count + i; // Oldest first
+        const lat = trailLat[slot];
+        const lon = trailLon[slot];
+        // Break the line at gaps and where it crosses the antimeridian
+        if (lat === MISSING || (previousLon !== null && Math.abs(lon - previousLon) > 18000)) {
+          if (segment.length > 1) segments.push(segment);
+          segment = [];
         }
+        if (lat !== MISSING) segment.push([lat / LATLON_SCALE, lon / LATLON_SCALE]);
+        previousLon = lat === MISSING ? null : lon;
       }
+      if (segment.length > 1) segments.push(segment);
+    }
+    trailsLine.setLatLngs(segments);
+  }
+
+  const source = new EventSource(`${API_BASE}/api/stream`);
+
+  // Keyframe against an empty state: everything not in it is gone
+  source.addEventListener("sync", (event) => {
+    const wasValid = valid.slice();
+    valid.fill(0);
+    qlat.fill(MISSING);
+    applyFrame(decodeBase64(event.data));
+    for (let i = 0; i < count; i++) {
+      if (wasValid[i] && !valid[i]) markers[i].remove();
     }
+  });
+
+  source.addEventListener("trail", (event) => {
+    const buffer = decodeBase64(event.data);
+    const [, length, head, trailCount] = new Uint32Array(buffer, 0, 4);
+    if (trailCount !== count) {
+      // The TLE store changed between /api/satellites and the stream
+      source.close();
+      window.location.reload();
+      return;
+    }
+    trailLength = length;
+    trailHead = head;
+    trailLat = new Int16Array(buffer, 16, length * count).slice();
+    trailLon = new Int16Array(buffer, 16 + 2 * length * count, length * count).slice();
+    drawTrails();
+  });
+
+  source.addEventListener("delta", (event) => {
+    applyFrame(decodeBase64(event.data));
+    if (!trailLat) return;
+    trailLat.set(qlat, trailHead * count);
+    trailLon.set(qlon, trailHead * count);
+    trailHead = (trailHead + 1) % trailLength;
+    drawTrails();
+  });
+
+  source.addEventListener("catalog", () => {
+    source.close();
+    window.location.reload();
+  });
+
+  map.on("moveend", drawTrails);
+}
+
+// Fallback when the local server is not running: propagate in the browser
+function startBrowserPropagation() {
+  fetch("/data/active.tle")
+    .then(res => res.text())
+    .then(tleText => {
+      const satellites = parseTLE(tleText).slice(0, 200);
+      loadingScreen.remove();
+
+      const trailsLayer = L.layerGroup().addTo(map);
+      const markers = satellites.map((sat) => {
+        const latlngData = getLatLngFromSatrec(sat.satrec);
+        if (!latlngData) return null;
+        const [lat, lon, alt] = latlngData;
+        const category = sat.name.toLowerCase().includes("starlink")
+          ? "Starlink"
+          : sat.name.toLowerCase().includes("iss")
+          ? "ISS"
+          : "Other";
+
+        const marker = L.circleMarker([lat, lon], {
+          radius: 6,
+          color: colorScale(category),
+          fillOpacity: 0.9,
+        })
+          .addTo(map)
+          .bindTooltip(() => `Name: ${sat.name}<br/>Lat: ${lat.toFixed(2)}&deg;<br/>Lon: ${lon.toFixed(2)}&deg;<br/>Alt: ${alt.toFixed(1)} km`);
+
+        marker.on("click", () => {
+          L.popup()
+            .setLatLng([lat, lon])
+            .setContent(
+              `<strong>${sat.name}</strong><br/>` +
+              `Latitude: ${lat.toFixed(2)}&deg;<br/>` +
+              `Longitude: ${lon.toFixed(2)}&deg;<br/>` +
+              `Altitude: ${alt.toFixed(1)} km`
+            )
+            .openOn(map);
+        });
+
+        sat.marker = marker;
+        sat.trail = [];
+        return sat;
+      }).filter(Boolean);
+
+      function updateSatellitePositions() {
+        const now = new Date();
+        trailsLayer.clearLayers();
+
+        for (const sat of markers) {
+          const latlngData = getLatLngFromSatrec(sat.satrec, now);
+          if (!latlngData) continue;
+          const [lat, lon, alt] = latlngData;
+
+          sat.marker.setLatLng([lat, lon]);
+          sat.trail.push([lat, lon]);
+          if (sat.trail.length > 50) sat.trail.shift();
+
+          if (sat.trail.length > 1) {
+            L.polyline(sat.trail, {
+              color: "lime",
+              opacity: 0.4,
+              weight: 1,
+            }).addTo(trailsLayer);
+          }
+        }
+      }
+
+      setInterval(updateSatellitePositions, 1000);
+    });
+}
 
-    setInterval(updateSatellitePositions, 1000);
+fetch(`${API_BASE}/api/satellites`)
+  .then(res => {
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    return res.json();
+  })
+  .then(startServerPropagation)
+  .catch(err => {
+    console.warn("Propagation server unavailable, falling back to in-browser SGP4", err);
+    startBrowserPropagation();
   });
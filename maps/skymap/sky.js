@@ -2,9 +2,25 @@ import * as d3 from "d3";
 
 const width = window.innerWidth;
 const height = window.innerHeight;
+const SCALE = 500;
+
+// Built by `python -m helper.sky_catalog`
+const SKY_URL = "/data/sky";
+const CHUNK_MAGIC = "SKYC";
+const CHUNK_VERSION = 1;
+
+// ?lat=&lon=[&height=] switches to the sky seen from a site: stars above the
+// horizon from the map server (helper.visibility), zenith at the centre,
+// north up and east to the left
+const params = new URLSearchParams(window.location.search);
+const API_BASE = params.get("api") || "http://127.0.0.1:8765";
+const observer = params.has("lat") && params.has("lon")
+  ? { lat: +params.get("lat"), lon: +params.get("lon"), height: +(params.get("height") || 0) }
+  : null;
+const OBSERVER_REFRESH_MS = 10000;
 
 const projection = d3.geoAzimuthalEquidistant()
-  .scale(500)
+  .scale(SCALE)
   .translate([width / 2, height / 2])
   .rotate([0, -90]);
 
@@ -35,17 +51,20 @@ const loadingScreen = d3.select("body")
 
 const zoomLayer = svg.append("g");
 const rotateLayer = zoomLayer.append("g");
+const starLayer = rotateLayer.append("g");
+const constellationLayer = rotateLayer.append("g");
 
 // Setup zoom
 const zoom = d3.zoom()
   .scaleExtent([0.5, 10])
   .on("zoom", (event) => {
     zoomLayer.attr("transform", event.transform);
+    updateTiers(event.transform.k).catch((err) => console.error("Error loading stars:", err));
   });
 svg.call(zoom);
 
 // Rotation control
-let rotationEnabled = true;
+let rotationEnabled = !observer; // The observer view turns with real time
 d3.timer((elapsed) => {
   if (rotationEnabled) {
     const angle = (elapsed * 0.005) % 360;
@@ -72,36 +91,323 @@ const tooltip = d3.select("body")
   .style("font-size", "12px")
   .style("display", "none");
 
-Promise.all([
-  d3.csv("/data/hygdata_v37.csv"),
-  d3.json("/data/constellations.lines.json")
-]).then(([starData, constellationGeoJSON]) => {
+function escapeHtml(text) {
+  return text.replace(/[&<>"']/g, (c) => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;" }[c]));
+}
+
+// Reads a catalog chunk into typed-array views over the response buffer
+function decodeChunk(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  const version = view.getUint16(4, true);
+  if (magic !== CHUNK_MAGIC || version !== CHUNK_VERSION) {
+    throw new Error(`Unsupported sky chunk ${magic} v${version}`);
+  }
+  const kind = view.getUint16(6, true);
+  const count = view.getUint32(8, true);
+  const lines = view.getUint32(12, true);
+  const vertices = view.getUint32(16, true);
+  const textBytes = view.getUint32(20, true);
+
+  let offset = 24;
+  const take = (Type, n) => {
+    const array = new Type(buffer, offset, n);
+    offset += Math.ceil(n * Type.BYTES_PER_ELEMENT / 4) * 4;
+    return array;
+  };
+  const chunk = { kind, count };
+  if (kind === 0) {
+    chunk.xyz = take(Float32Array, count * 3);
+    chunk.mag = take(Float32Array, count);
+  } else {
+    chunk.firstLine = take(Uint32Array, count + 1);
+    chunk.firstVertex = take(Uint32Array, lines + 1);
+    chunk.labelXyz = take(Float32Array, count * 3);
+    chunk.xyz = take(Float32Array, vertices * 3);
+  }
+  chunk.text = new TextDecoder().decode(new Uint8Array(buffer, offset, textBytes)).split("\n");
+  return chunk;
+}
+
+// Same result as projection([ra, dec]) for the pole-centred azimuthal
+// equidistant view, computed from unit vectors: the screen distance from
+// the centre is the angle from the pole. With an ICRS -> east/north/up
+// matrix the centre is the zenith instead and points below the horizon
+// come back as NaN.
+function projectUnit(xyz, matrix = null) {
+  const n = xyz.length / 3;
+  const out = new Float32Array(n * 2);
+  for (let i = 0; i < n; i++) {
+    let x = xyz[3 * i], y = xyz[3 * i + 1], z = xyz[3 * i + 2];
+    if (matrix) {
+      const east = matrix[0] * x + matrix[1] * y + matrix[2] * z;
+      const north = matrix[3] * x + matrix[4] * y + matrix[5] * z;
+      const up = matrix[6] * x + matrix[7] * y + matrix[8] * z;
+      if (up < 0) {
+        out[2 * i] = out[2 * i + 1] = NaN;
+        continue;
+      }
+      [x, y, z] = [-north, -east, up];
+    }
+    z = Math.max(-1, Math.min(1, z));
+    const s = Math.sqrt(1 - z * z);
+    const k = SCALE * (s > 1e-9 ? Math.acos(z) / s : 1);
+    out[2 * i] = width / 2 + k * y;
+    out[2 * i + 1] = height / 2 + k * x;
+  }
+  return out;
+}
+
+function fetchChunk(file) {
+  return fetch(`${SKY_URL}/${file}`).then((res) => {
+    if (!res.ok) throw new Error(`${res.status} ${file}`);
+    return res.arrayBuffer();
+  }).then(decodeChunk);
+}
+
+function drawConstellations(chunk, matrix = null) {
+  const screen = projectUnit(chunk.xyz, matrix);
+  const labels = projectUnit(chunk.labelXyz, matrix);
+  const features = d3.range(chunk.count).map((c) => {
+    let d = "";
+    for (let l = chunk.firstLine[c]; l < chunk.firstLine[c + 1]; l++) {
+      let drawing = false;
+      for (let v = chunk.firstVertex[l]; v < chunk.firstVertex[l + 1]; v++) {
+        if (isNaN(screen[2 * v])) {
+          drawing = false; // Below the horizon
+          continue;
+        }
+        d += `${drawing ? "L" : "M"}${screen[2 * v].toFixed(1)},${screen[2 * v + 1].toFixed(1)}`;
+        drawing = true;
+      }
+    }
+    return { id: chunk.text[c], d, x: labels[2 * c], y: labels[2 * c + 1] };
+  });
+
+  constellationLayer.selectAll("path.constellation-line")
+    .data(features)
+    .join("path")
+    .attr("class", "constellation-line")
+    .attr("d", (f) => f.d)
+    .attr("stroke", "#3399ff")
+    .attr("stroke-width", 2)
+    .attr("fill", "none")
+    .attr("opacity", 0.6);
+
+  constellationLayer.selectAll("text.constellation-label")
+    .data(features)
+    .join("text")
+    .attr("class", "constellation-label")
+    .attr("display", (f) => (isNaN(f.x) ? "none" : null))
+    .attr("x", (f) => f.x)
+    .attr("y", (f) => f.y)
+    .attr("fill", "#88ccff")
+    .attr("font-size", "10px")
+    .attr("font-weight", "bold")
+    .attr("text-anchor", "middle")
+    .attr("pointer-events", "none")
+    .text((f) => f.id || "Unnamed");
+}
+
+function drawStars(tier, chunk) {
+  const screen = projectUnit(chunk.xyz);
+  tier.chunk = chunk;
+  tier.layer.selectAll("circle.star")
+    .data(d3.range(chunk.count))
+    .enter()
+    .append("circle")
+    .attr("class", "star")
+    .attr("cx", (i) => screen[2 * i])
+    .attr("cy", (i) => screen[2 * i + 1])
+    .attr("r", (i) => Math.max(0.5, 6 - chunk.mag[i]))
+    .attr("fill", "white")
+    .attr("opacity", 0.8)
+    .attr("display", observer ? "none" : null) // Placed by placeStars
+    .on("mouseover", (event, i) => {
+      const [name, con] = chunk.text[i].split("|");
+      const altAz = tier.altAz?.get(i);
+      tooltip.style("display", "block")
+        .html(`<strong>${escapeHtml(name || "Unnamed star")}</strong><br>Mag: ${chunk.mag[i].toFixed(2)}<br>Con: ${escapeHtml(con || "-")}`
+          + (altAz ? `<br>Alt: ${altAz[0].toFixed(1)}° Az: ${altAz[1].toFixed(1)}°` : ""));
+    })
+    .on("mousemove", (event) => {
+      tooltip.style("left", `${event.pageX + 10}px`)
+        .style("top", `${event.pageY - 20}px`);
+    })
+    .on("mouseout", () => {
+      tooltip.style("display", "none");
+    });
+}
+
+// Moves a tier's stars to their alt/az at a site; returns the ICRS ->
+// east/north/up matrix the server used
+async function placeStars(tier, second) {
+  const query = `lat=${observer.lat}&lon=${observer.lon}&height=${observer.height}&tier=${tier.index}&t=${second}`;
+  const res = await fetch(`${API_BASE}/api/sky?${query}`);
+  if (!res.ok) throw new Error(`${res.status} /api/sky`);
+  const buffer = await res.arrayBuffer();
+  const count = new DataView(buffer).getUint32(0, true);
+  const matrix = new Float32Array(buffer, 8, 9);
+  const index = new Uint32Array(buffer, 44, count);
+  const alt = new Int16Array(buffer, 44 + 4 * count, count);
+  const az = new Uint16Array(buffer, 44 + 6 * count, count);
+
+  const nodes = tier.layer.selectAll("circle.star").nodes();
+  const shown = new Uint8Array(nodes.length);
+  tier.altAz = new Map();
+  for (let k = 0; k < count; k++) {
+    const i = index[k];
+    const a = alt[k] / 100, z = az[k] / 100;
+    const r = SCALE * (90 - a) * Math.PI / 180;
+    nodes[i].setAttribute("cx", width / 2 - r * Math.sin(z * Math.PI / 180));
+    nodes[i].setAttribute("cy", height / 2 - r * Math.cos(z * Math.PI / 180));
+    nodes[i].removeAttribute("display");
+    tier.altAz.set(i, [a, z]);
+    shown[i] = 1;
+  }
+  nodes.forEach((node, i) => { if (!shown[i]) node.setAttribute("display", "none"); });
+  return matrix;
+}
+
+let constellations = null;
+async function refreshObserver() {
+  const second = Math.floor(Date.now() / 1000);
+  const loaded = tiers.filter((tier) => tier.chunk);
+  const matrices = await Promise.all(loaded.map((tier) => placeStars(tier, second)));
+  if (constellations && matrices.length) drawConstellations(constellations, matrices[0]);
+}
+
+// Magnitude tiers: fetched the first time the zoom reaches them, hidden below
+let tiers = [];
+function updateTiers(k) {
+  return Promise.all(tiers.map((tier) => {
+    const visible = k >= tier.minZoom;
+    tier.layer.style("display", visible ? null : "none");
+    if (visible && !tier.loaded) {
+      tier.loaded = fetchChunk(tier.file).then((chunk) => {
+        drawStars(tier, chunk);
+        if (observer) return placeStars(tier, Math.floor(Date.now() / 1000));
+      });
+    }
+    return tier.loaded;
+  }));
+}
+
+// Altitude rings and compass points around the zenith
+function drawHorizonGrid() {
+  for (const alt of [0, 30, 60]) {
+    rotateLayer.append("circle")
+      .attr("cx", width / 2)
+      .attr("cy", height / 2)
+      .attr("r", SCALE * (90 - alt) * Math.PI / 180)
+      .attr("stroke", "white")
+      .attr("stroke-width", alt === 0 ? 1.5 : 0.5)
+      .attr("fill", "none")
+      .attr("opacity", alt === 0 ? 0.6 : 0.3);
+  }
+  const horizon = SCALE * Math.PI / 2 + 14;
+  [["N", 0, -1], ["E", -1, 0], ["S", 0, 1], ["W", 1, 0]].forEach(([label, dx, dy]) => {
+    rotateLayer.append("text")
+      .attr("x", width / 2 + dx * horizon)
+      .attr("y", height / 2 + dy * horizon + 5)
+      .attr("fill", "white")
+      .attr("font-size", "14px")
+      .attr("text-anchor", "middle")
+      .text(label);
+  });
+}
+
+// Visible note over the map, e.g. when the built catalog is missing
+function showMessage(text) {
+  d3.select("body")
+    .append("div")
+    .attr("class", "sky-message")
+    .style("position", "absolute")
+    .style("top", "8px")
+    .style("left", "50%")
+    .style("transform", "translateX(-50%)")
+    .style("max-width", "80%")
+    .style("padding", "6px 12px")
+    .style("background", "rgba(120, 80, 0, 0.85)")
+    .style("color", "white")
+    .style("border-radius", "4px")
+    .style("font-size", "14px")
+    .text(text);
+}
+
+function drawGraticule() {
+  // Latitude and longitude lines
+  const graticule = d3.geoGraticule();
+  rotateLayer.append("path")
+    .datum(graticule())
+    .attr("d", pathGenerator)
+    .attr("stroke", "white")
+    .attr("stroke-width", 0.5)
+    .attr("fill", "none")
+    .attr("opacity", 0.3);
+}
+
+async function loadChunks(index) {
+  // Fainter tiers go underneath the brighter ones
+  tiers = index.tiers.map((tier, i) => ({ ...tier, index: i, loaded: null }));
+  for (let i = tiers.length - 1; i >= 0; i--) {
+    tiers[i].layer = starLayer.append("g").attr("class", `star-tier-${i}`);
+  }
+  await Promise.all([
+    updateTiers(d3.zoomTransform(svg.node()).k),
+    fetchChunk(index.lines.file).then((chunk) => { constellations = chunk; }),
+  ]);
+
+  if (observer) {
+    await refreshObserver();
+    setInterval(() => refreshObserver().catch((err) => console.error("Error updating sky:", err)), OBSERVER_REFRESH_MS);
+  } else {
+    drawConstellations(constellations);
+  }
+
   // Remove loading screen
   loadingScreen.remove();
 
-  const stars = starData
-    .filter(d => d.proper && isFinite(d.ra) && isFinite(d.dec))
-    .map(d => ({
-      name: d.proper.trim(),
-      ra: +d.ra,
-      dec: +d.dec,
-      mag: +d.mag,
-      con: d.con
-    }));
-
-  rotateLayer.selectAll("circle.star")
-    .data(stars.filter(d => d.mag < 6))
+  if (observer) {
+    drawHorizonGrid();
+  } else {
+    drawGraticule();
+  }
+}
+
+// Without the built chunks: the HYG CSV and the constellation GeoJSON drawn
+// through d3 as before, full sky only
+async function loadLegacy() {
+  const [starData, constellationGeoJSON] = await Promise.all([
+    // A dev server may answer a missing file with index.html: no "ra" column
+    d3.csv("/data/hygdata_v37.csv").then((rows) => (rows.columns.includes("ra") ? rows : null), () => null),
+    d3.json("/data/constellations.lines.json"),
+  ]);
+  loadingScreen.remove();
+  rotationEnabled = true;
+
+  const notes = ["Sky catalog chunks not built: run `python -m helper.sky_catalog` for the fast tiered map."];
+  if (!starData) notes.push("Star catalog hygdata_v37.csv not found, showing constellation lines only.");
+  if (observer) notes.push("The observer view needs the built catalog, showing the full sky.");
+  showMessage(notes.join(" "));
+
+  const stars = (starData || [])
+    .filter((d) => d.proper && isFinite(d.ra) && isFinite(d.dec) && +d.mag < 6)
+    .map((d) => ({ name: d.proper.trim(), ra: +d.ra, dec: +d.dec, mag: +d.mag, con: d.con }));
+
+  starLayer.selectAll("circle.star")
+    .data(stars)
     .enter()
     .append("circle")
     .attr("class", "star")
-    .attr("cx", d => projection([d.ra * 15, d.dec])[0])
-    .attr("cy", d => projection([d.ra * 15, d.dec])[1])
-    .attr("r", d => Math.max(0.5, 6 - d.mag))
+    .attr("cx", (d) => projection([d.ra * 15, d.dec])[0])
+    .attr("cy", (d) => projection([d.ra * 15, d.dec])[1])
+    .attr("r", (d) => Math.max(0.5, 6 - d.mag))
     .attr("fill", "white")
     .attr("opacity", 0.8)
     .on("mouseover", (event, d) => {
       tooltip.style("display", "block")
-        .html(`<strong>${d.name}</strong><br>Mag: ${d.mag}<br>Con: ${d.con}`);
+        .html(`<strong>${escapeHtml(d.name)}</strong><br>Mag: ${d.mag}<br>Con: ${escapeHtml(d.con || "-")}`);
     })
     .on("mousemove", (event) => {
       tooltip.style("left", `${event.pageX + 10}px`)
@@ -111,41 +417,40 @@ Promise.all([
       tooltip.style("display", "none");
     });
 
-  rotateLayer.selectAll("path.constellation-line")
+  constellationLayer.selectAll("path.constellation-line")
     .data(constellationGeoJSON.features)
     .enter()
     .append("path")
     .attr("class", "constellation-line")
-    .attr("d", d => pathGenerator(d))
+    .attr("d", (d) => pathGenerator(d))
     .attr("stroke", "#3399ff")
     .attr("stroke-width", 2)
     .attr("fill", "none")
     .attr("opacity", 0.6);
 
-  rotateLayer.selectAll("text.constellation-label")
+  constellationLayer.selectAll("text.constellation-label")
     .data(constellationGeoJSON.features)
     .enter()
     .append("text")
     .attr("class", "constellation-label")
-    .attr("x", d => pathGenerator.centroid(d)[0])
-    .attr("y", d => pathGenerator.centroid(d)[1])
+    .attr("x", (d) => pathGenerator.centroid(d)[0])
+    .attr("y", (d) => pathGenerator.centroid(d)[1])
     .attr("fill", "#88ccff")
     .attr("font-size", "10px")
     .attr("font-weight", "bold")
     .attr("text-anchor", "middle")
     .attr("pointer-events", "none")
-    .text(d => d.id || d.properties?.name || "Unnamed");
+    .text((d) => d.id || d.properties?.name || "Unnamed");
 
-  // Latitude and longitude lines
-  const graticule = d3.geoGraticule();
-  rotateLayer.append("path")
-    .datum(graticule())
-    .attr("d", pathGenerator)
-    .attr("stroke", "white")
-    .attr("stroke-width", 0.5)
-    .attr("fill", "none")
-    .attr("opacity", 0.3);
+  drawGraticule();
+}
 
-}).catch(err => {
-  console.error("Error loading sky data:", err);
-});
\ No newline at end of file
+fetch(`${SKY_URL}/index.json`)
+  .then((res) => (res.ok ? res.json() : null))
+  .catch(() => null)
+  .then((index) => (index ? loadChunks(index) : loadLegacy()))
+  .catch((err) => {
+    console.error("Error loading sky data:", err);
+    loadingScreen.remove();
+    showMessage(`Could not load the sky map: ${err.message}`);
+  });
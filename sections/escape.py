@@ -1,7 +1,8 @@
 import streamlit as st
 import math
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from helper.figures import normalize_key, render_png
 
 G = 6.67430e-11  # gravitational constant in m^3 kg^-1 s^-2
 
@@ -30,6 +31,27 @@ def scientific_input(label, key_prefix, default_coeff, default_exp, exp_range=(1
         )
     return coeff * (10 ** exp), coeff, exp
 
+def plot_escape_progress(escape_velocity):
+    # Speeds from 0 to 1.5 * escape velocity
+    speeds = np.linspace(0, 1.5 * escape_velocity, 300)
+    escape_kinetic = 0.5 * escape_velocity ** 2
+
+    # Energy ratio: how close a speed's kinetic energy is to escape energy
+    progress = 0.5 * (speeds ** 2) / escape_kinetic * 100  # in %
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(speeds / 1000, progress, color='tomato', label="Energy toward escape")
+    ax.axvline(x=escape_velocity / 1000, color='green', linestyle='--', label="Escape Velocity")
+
+    ax.set_title("Progress Toward Escape vs. Speed")
+    ax.set_xlabel("Speed (km/s)")
+    ax.set_ylabel("Kinetic Energy (% of required to escape)")
+    ax.set_ylim(0, 160)
+    ax.grid(True)
+    ax.legend()
+    return fig
+
 def app():
     st.title("🚀 Escape Velocity Calculator")
     st.markdown("Calculate the **escape velocity**, the minimum speed needed to break free from a celestial body's gravitational pull.")
@@ -59,25 +81,7 @@ def app():
         st.markdown("---")
         st.subheader("📈 Speed vs. Escape Progress")
 
-        # Speeds from 0 to 1.5 * escape velocity
-        speeds = np.linspace(0, 1.5 * escape_velocity, 300)
-        escape_kinetic = 0.5 * escape_velocity ** 2
-
-        # Energy ratio: how close a speed's kinetic energy is to escape energy
-        progress = 0.5 * (speeds ** 2) / escape_kinetic * 100  # in %
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(speeds / 1000, progress, color='tomato', label="Energy toward escape")
-        ax.axvline(x=escape_velocity / 1000, color='green', linestyle='--', label="Escape Velocity")
-
-        ax.set_title("Progress Toward Escape vs. Speed")
-        ax.set_xlabel("Speed (km/s)")
-        ax.set_ylabel("Kinetic Energy (% of required to escape)")
-        ax.set_ylim(0, 160)
-        ax.grid(True)
-        ax.legend()
-
-        st.pyplot(fig)
+        st.image(render_png(normalize_key("escape", escape_velocity), plot_escape_progress, escape_velocity), use_container_width=True)
 
     else:
         st.warning("Mass and radius must be positive values.")
\ No newline at end of file
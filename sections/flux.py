@@ -1,9 +1,16 @@
 import streamlit as st
-from lightkurve import search_targetpixelfile
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import tempfile
 import os
 import warnings
+from helper.downsample import LightCurvePyramid
+from helper.job_view import start, track
+from helper.jobs import CANCELLED, DONE, process_pool
+from helper.lightcurve_batch import fetch_batch, parse_quarters
+from helper.periodogram import METHODS, fold, periodogram
+from helper.tpf_cache import MISSIONS, cached_path, fetch_tpf, normalize_target
 
 warnings.filterwarnings("ignore")  # Suppress Lightkurve and Matplotlib warnings
 
@@ -17,33 +24,206 @@ def app():
     """)
 
     object_id = st.text_input("🔭 Enter Target ID (e.g., KIC 8462852):", value="KIC 8462852")
-    quarter = st.number_input("📅 Enter Kepler Quarter:", min_value=0, max_value=17, step=1, value=16)
+    mission = st.selectbox("🛰️ Mission:", MISSIONS, index=0)
+    quarter = st.number_input("📅 Enter Kepler Quarter (K2 campaign / TESS sector):", min_value=0, max_value=99, step=1, value=16)
+    offline = st.checkbox("📴 Offline mode (cached downloads only)", value=False)
 
     if st.button("📥 Fetch and Visualize"):
-        with st.spinner("🔍 Downloading pixel file... Hang on, this might take time"):
-            try:
-                tpf = search_targetpixelfile(object_id, quarter=quarter).download()
-                st.success("✅ Data fetched successfully!")
-
-                # Plot the target pixel file frame
-                st.subheader("🖼️ Target Pixel Frame")
-                tpf.plot(frame=1)  # Plot onto the current figure
-                fig = plt.gcf()    # Get the current matplotlib figure
-                st.pyplot(fig)
-                plt.close(fig)
-
-                # Generate and plot light curve
-                st.subheader("📉 Light Curve")
-                lc = tpf.to_lightcurve(aperture_mask='pipeline')
-                st.line_chart(lc.flux, use_container_width=True)
-
-                st.markdown("---")
-                st.subheader("📘 Metadata")
-                st.write(lc)
-
-            except Exception as e:
-                st.error(f"❌ Failed to fetch data for '{object_id}' in Quarter {quarter}. Please ensure the ID is valid and the data is available.")
-                st.exception(e)
+        start("flux_fetch_job", _fetch_job, object_id, quarter, mission, offline,
+              name=f"Fetching {normalize_target(object_id)} ({mission} {quarter})",
+              key=("fetch", normalize_target(object_id), mission, int(quarter), offline))
+
+    job = track("flux_fetch_job")
+    if job is not None:
+        if job.status == DONE:
+            # Kept across reruns so zooming the chart does not refetch
+            st.session_state["flux_result"] = dict(job.result) # Own copy: a shared job result is not per-session
+            st.success("✅ Data loaded from the local cache!" if job.result["cached"] else "✅ Data fetched successfully!")
+        elif job.status == CANCELLED:
+            st.info("🛑 Fetch cancelled.")
+        else:
+            st.session_state.pop("flux_result", None)
+            st.error(f"❌ Failed to fetch data for '{object_id}' in Quarter {quarter}. Please ensure the ID is valid and the data is available"
+                     + (" in the offline cache." if offline else "."))
+            st.exception(job.error)
+
+    result = st.session_state.get("flux_result")
+    if result is not None:
+        _show_result(result)
+
+    st.markdown("---")
+    _batch_mode(mission, offline)
+
+
+def _fetch_job(job, object_id, quarter, mission, offline):
+    cached = cached_path(object_id, quarter, mission) is not None
+    job.report(0.1, "📦 Loading pixel file from the local cache..." if cached else "🔍 Downloading pixel file... Hang on, this might take time")
+    tpf = fetch_tpf(object_id, quarter, mission, offline=offline)
+    job.report(0.7, "📐 Aperture photometry...")
+    lc = tpf.to_lightcurve(aperture_mask='pipeline')
+    return {
+        "target": normalize_target(object_id),
+        "quarter": f"{mission} {quarter}",
+        "cached": cached,
+        "tpf": tpf,
+        "lc": lc,
+        "pyramid": LightCurvePyramid(_values(lc.time), _values(lc.flux)),
+    }
+
+
+def _show_result(result):
+    tpf, lc, pyramid = result["tpf"], result["lc"], result["pyramid"]
+
+    # Plot the target pixel file frame
+    st.subheader("🖼️ Target Pixel Frame")
+    tpf.plot(frame=1)  # Plot onto the current figure
+    fig = plt.gcf()    # Get the current matplotlib figure
+    st.pyplot(fig)
+    plt.close(fig)
+
+    # Plot the light curve from the resolution level that fits the window
+    st.subheader("📉 Light Curve")
+    if len(pyramid) == 0:
+        st.warning("⚠️ The light curve has no valid cadences.")
+    else:
+        first, last = pyramid.span
+        window = st.slider("🔎 Time window (days)", min_value=first, max_value=last, value=(first, last)) if last > first else (first, last)
+        x, y, level = pyramid.view(*window)
+        st.line_chart(pd.DataFrame({"flux": y}, index=pd.Index(x, name="time")), use_container_width=True)
+        st.caption(f"Showing {len(x):,} of {len(pyramid):,} cadences (resolution level {level}).")
+
+    _period_search(result)
+
+    st.markdown("---")
+    st.subheader("📘 Metadata")
+    st.write(lc)
+
+
+def _period_search(result):
+    st.subheader("🔁 Period Search")
+    method = st.radio("Method:", METHODS, format_func=lambda m: "Box Least Squares" if m == "bls" else "Lomb-Scargle", horizontal=True)
+    col1, col2, col3 = st.columns(3)
+    min_period = col1.number_input("Min period (days)", min_value=0.05, value=0.5, step=0.1)
+    max_period = col2.number_input("Max period (days)", min_value=0.1, value=20.0, step=1.0)
+    count = col3.number_input("Trial periods", min_value=100, max_value=500000, value=20000, step=1000)
+
+    lc = result["lc"]
+    if st.button("🔍 Search for Periods"):
+        start("flux_period_job", _period_job, _values(lc.time), _values(lc.flux), _values(lc.flux_err),
+              method, min_period, max_period, int(count), result["target"], result["quarter"],
+              name=f"Period search for {result['target']}",
+              key=("periodogram", result["target"], result["quarter"], method, min_period, max_period, int(count)))
+
+    job = track("flux_period_job")
+    if job is not None:
+        if job.status == DONE:
+            result["periodogram"] = job.result
+        elif job.status == CANCELLED:
+            st.info("🛑 Period search cancelled.")
+        else:
+            st.error("❌ Period search failed.")
+            st.exception(job.error)
+
+    found = result.get("periodogram")
+    if found is None:
+        return
+    best = float(found["best_period"])
+    spectrum = LightCurvePyramid(found["period"], found["power"])
+    x, y, _ = spectrum.view()
+    st.line_chart(pd.DataFrame({"power": y}, index=pd.Index(x, name="period (days)")), use_container_width=True)
+    st.metric("Best period", f"{best:.5f} d")
+
+    i = int(np.argmax(found["power"]))
+    t0 = float(found["t0"][i]) if "t0" in found else 0.0
+    phase, folded = fold(_values(lc.time), _values(lc.flux), best, t0)
+    st.line_chart(pd.DataFrame({"folded flux": folded}, index=pd.Index(phase, name="phase")), use_container_width=True)
+    if "depth" in found:
+        st.caption(f"Transit duration {found['duration'][i] * 24:.2f} h, depth {found['depth'][i]:.3g}, mid-transit at {t0:.4f}.")
+
+
+def _period_job(job, t, flux, flux_err, method, min_period, max_period, count, target, quarter):
+    job.report(0.0, "⚙️ Searching the period grid...")
+    return periodogram(
+        t, flux, flux_err, method, min_period, max_period, count, target=target, quarter=quarter,
+        pool=process_pool(), progress=lambda done, total: job.report(done / total, f"⚙️ {done} / {total} chunks of the period grid"),
+    )
+
+
+def _batch_mode(mission, offline):
+    st.subheader("📚 Batch Mode")
+    st.markdown("Fetch several targets and quarters at once; quarters are downloaded in parallel and stitched into one light curve per target.")
+    targets = st.text_area("🔭 Target IDs (one per line):", value="KIC 8462852\nKIC 11446443")
+    quarters = st.text_input("📅 Quarters (e.g. 1-17 or 14,15,16):", value="14-17")
+
+    if st.button("🚀 Fetch Batch"):
+        try:
+            quarter_list = parse_quarters(quarters)
+        except ValueError:
+            st.error(f"❌ Could not read the quarter list '{quarters}'.")
+            return
+        target_list = [line for line in targets.splitlines() if line.strip()]
+        if not target_list or not quarter_list:
+            st.warning("⚠️ Enter at least one target and one quarter.")
+            return
+        start("flux_batch_job", _batch_job, target_list, quarter_list, mission, offline,
+              name=f"Batch of {len(target_list)} targets")
+
+    # Targets show up as they are stitched, before the whole batch is done
+    job = track("flux_batch_job", show_partial=lambda results: [_show_batch_target(e) for e in results.values()])
+    if job is not None:
+        if job.status == DONE:
+            st.session_state["flux_batch"] = job.result
+            for target, quarter, error in job.result["errors"]:
+                st.warning(f"⚠️ {target} quarter {quarter}: {error}")
+            built = job.result["targets"].values()
+            st.success(f"✅ Batch finished: {sum(e['lightcurve'] is not None for e in built)} of {len(built)} targets built.")
+        elif job.status == CANCELLED:
+            st.info("🛑 Batch cancelled.")
+        else:
+            st.error("❌ Batch failed.")
+            st.exception(job.error)
+
+    batch = st.session_state.get("flux_batch")
+    if batch is not None:
+        for event in batch["targets"].values():
+            _show_batch_target(event)
+
+
+def _batch_job(job, targets, quarters, mission, offline):
+    total = len(set(map(normalize_target, targets))) * len(quarters)
+    done, results, errors = 0, {}, []
+    job.report(0.0, f"0 / {total} quarters")
+    for event in fetch_batch(targets, quarters, mission, offline, extract_pool=process_pool()):
+        if event["kind"] == "quarter":
+            done += 1
+            if "error" in event:
+                errors.append((event["target"], event["quarter"], event["error"]))
+            job.report(done / total, f"{done} / {total} quarters")
+            continue
+        if event["lightcurve"] is not None:
+            event["pyramid"] = LightCurvePyramid(_values(event["lightcurve"].time), _values(event["lightcurve"].flux))
+        results[event["target"]] = event
+        job.report(message=f"{done} / {total} quarters, {event['target']} stitched", partial=dict(results))
+    return {"targets": results, "errors": errors}
+
+
+def _show_batch_target(event):
+    with st.expander(f"🌟 {event['target']}", expanded=True):
+        if event["lightcurve"] is None:
+            st.error("❌ None of the requested quarters could be fetched.")
+            return
+        pyramid = event["pyramid"]
+        x, y, level = pyramid.view()
+        st.line_chart(pd.DataFrame({"normalized flux": y}, index=pd.Index(x, name="time")), use_container_width=True)
+        st.caption(f"Quarters {', '.join(map(str, event['quarters']))}: showing {len(x):,} of {len(pyramid):,} cadences (resolution level {level}).")
+
+
+def _values(column):
+    # Plain float array from a lightkurve Time / (masked) Quantity column
+    values = getattr(column, "value", column)
+    if hasattr(values, "filled"):
+        values = values.filled(np.nan)
+    return np.asarray(values, dtype=float)
 
 
 # This function should be called from your main streamlit app router or __main__ block
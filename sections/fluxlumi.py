@@ -2,10 +2,17 @@ import streamlit as st
 import numpy as np
 import math
 import os
-import json
-import subprocess
-import matplotlib.pyplot as plt
-from helper.constant import LOVE_PATH
+import functools
+import hashlib
+import io
+import logging
+from matplotlib.figure import Figure
+from helper.figures import normalize_key, render_png
+from helper import handoff, launcher
+from helper.job_view import start, track
+from helper.jobs import CANCELLED, DONE
+
+logger = logging.getLogger(__name__)
 
 # Physical constants
 PI = math.pi
@@ -19,9 +26,12 @@ k = 1.380649e-23      # Boltzmann constant (J/K)
 L_SUN_WATT = 3.828e26 # Solar Luminosity (W)
 F_SUN_W_PER_M2 = 1361.0 # Solar Constant (W/m^2) at Earth's average distance (1 AU)
 
-# Color science
-from colour import SpectralShape, sd_blackbody, sd_to_XYZ
-from colour.models import XYZ_to_sRGB
+# Blackbody color lookup table (log-spaced temperature grid, persisted to disk)
+COLOR_LUT_T_MIN = 500.0 # K
+COLOR_LUT_T_MAX = 100_000.0 # K
+COLOR_LUT_SIZE = 1024
+COLOR_LUT_VERSION = 2 # Bumped when the stored values change meaning (2: unclipped sRGB)
+COLOR_LUT_PATH = "./cache/blackbody_srgb_lut.npz"
 
 # --- Helper Functions ---
 def sci_notation(val, precision=3):
@@ -63,69 +73,141 @@ def scientific_input(label, key_prefix, default_coeff, default_exp, exp_range=(0
         )
     return coeff * (10 ** exp), coeff, exp
 
-def accurate_color_from_temperature(T):
+def rgb_to_hex(rgb):
     """
-    Calculates the sRGB hex color perceived for a blackbody at temperature T.
-    Uses the 'colour' library for accurate color space conversion.
+    Converts an sRGB triple in [0, 1] to a hex color string.
     """
+    return '#%02x%02x%02x' % tuple((np.asarray(rgb) * 255).astype(int))
+
+def _unclipped_color_from_temperature(T):
+    from colour import SpectralShape, sd_blackbody, sd_to_XYZ
+    from colour.models import XYZ_to_sRGB
+
     shape = SpectralShape(380, 780, 5) # Define visible spectrum shape
     sd = sd_blackbody(T, shape) # Get spectral distribution for blackbody
     XYZ = sd_to_XYZ(sd) # Convert to CIE XYZ tristimulus values
-    rgb = XYZ_to_sRGB(XYZ / np.max(XYZ)) # Convert to sRGB, normalizing for peak intensity
-    rgb = np.clip(rgb, 0, 1) # Clip values to ensure they are within [0, 1] range
-    hex_color = '#%02x%02x%02x' % tuple((rgb * 255).astype(int)) # Convert to hex string
-    return hex_color, rgb
+    return XYZ_to_sRGB(XYZ / np.max(XYZ)) # Convert to sRGB, normalizing for peak intensity
 
-def get_spectrum_color(wavelength_nm):
+def exact_color_from_temperature(T):
+    """
+    Calculates the sRGB color perceived for a blackbody at temperature T.
+    Uses the 'colour' library for accurate color space conversion. This is the
+    slow reference path; the lookup table below is built from it.
+    """
+    return np.clip(_unclipped_color_from_temperature(T), 0, 1) # Clip values to ensure they are within [0, 1] range
+
+@functools.lru_cache(maxsize=None)
+def blackbody_color_lut():
+    """
+    Returns (temperatures, rgb) for the blackbody color lookup table.
+    Built once per process: loaded from COLOR_LUT_PATH when the stored grid
+    matches the current settings, otherwise rebuilt from the exact path and saved.
+    The values are stored before clipping, so interpolation follows a channel
+    exactly where it reaches 0 or 1.
+    """
+    temps = np.geomspace(COLOR_LUT_T_MIN, COLOR_LUT_T_MAX, COLOR_LUT_SIZE)
+    try:
+        with np.load(COLOR_LUT_PATH) as stored:
+            if stored["version"] == COLOR_LUT_VERSION and np.array_equal(stored["temperatures"], temps):
+                return temps, stored["rgb"]
+    except (OSError, KeyError, ValueError):
+        pass # Missing, outdated or unreadable table, rebuild below
+
+    rgb = np.array([_unclipped_color_from_temperature(T) for T in temps])
+    try:
+        os.makedirs(os.path.dirname(COLOR_LUT_PATH), exist_ok=True)
+        np.savez(COLOR_LUT_PATH, version=COLOR_LUT_VERSION, temperatures=temps, rgb=rgb)
+    except OSError as e:
+        logger.warning("Could not persist blackbody color table: %s", e)
+    return temps, rgb
+
+def color_from_temperature(T):
     """
-    Approximates the sRGB hex color for a given wavelength (380-750nm)
-    for visual representation of the spectrum.
+    Vectorized sRGB lookup for one or many blackbody temperatures.
+    Interpolates the lookup table linearly in log(T); returns an array of
+    shape T.shape + (3,) with values in [0, 1].
+    """
+    temps, lut = blackbody_color_lut()
+    log_T = np.log(np.clip(np.asarray(T, dtype=float), COLOR_LUT_T_MIN, COLOR_LUT_T_MAX))
+    log_grid = np.log(temps)
+    return np.clip(np.stack([np.interp(log_T, log_grid, lut[:, i]) for i in range(3)], axis=-1), 0, 1)
+
+def accurate_color_from_temperature(T):
+    """
+    Returns the sRGB hex color and RGB triple perceived for a blackbody at
+    temperature T. Uses the lookup table inside its range and falls back to the
+    exact 'colour' conversion outside it.
+    """
+    if COLOR_LUT_T_MIN <= T <= COLOR_LUT_T_MAX:
+        rgb = color_from_temperature(T)
+    else:
+        rgb = exact_color_from_temperature(T)
+    return rgb_to_hex(rgb), rgb
+
+def spectrum_rgb(wavelength_nm):
+    """
+    Vectorized approximation of the sRGB color for wavelengths (380-750nm)
+    for visual representation of the spectrum. Returns an array of shape
+    wavelength_nm.shape + (3,) with values in [0, 1]; wavelengths outside the
+    visible range map to black.
     This is a simplified model, not a precise colorimetric conversion.
     """
-    R, G, B = 0.0, 0.0, 0.0 # Initialize RGB components
+    wl = np.asarray(wavelength_nm, dtype=float)
 
     # Define color regions and their approximate transitions
-    if 380 <= wavelength_nm < 440:  # Violet
-        R = -(wavelength_nm - 440) / (440 - 380)
-        B = 1.0
-    elif 440 <= wavelength_nm < 490:  # Blue
-        G = (wavelength_nm - 440) / (490 - 440)
-        B = 1.0
-    elif 490 <= wavelength_nm < 510:  # Cyan
-        G = 1.0
-        B = -(wavelength_nm - 510) / (510 - 490)
-    elif 510 <= wavelength_nm < 580:  # Green
-        R = (wavelength_nm - 510) / (580 - 510)
-        G = 1.0
-    elif 580 <= wavelength_nm < 645:  # Yellow to Orange
-        R = 1.0
-        G = -(wavelength_nm - 645) / (645 - 580)
-    elif 645 <= wavelength_nm <= 750: # Red
-        R = 1.0
-    else:  # Out of visible range or invalid
-        return '#000000' # Black
+    violet = (380 <= wl) & (wl < 440)
+    blue = (440 <= wl) & (wl < 490)
+    cyan = (490 <= wl) & (wl < 510)
+    green = (510 <= wl) & (wl < 580)
+    orange = (580 <= wl) & (wl < 645) # Yellow to Orange
+    red = (645 <= wl) & (wl <= 750)
+
+    R = np.select([violet, green, orange | red], [-(wl - 440) / (440 - 380), (wl - 510) / (580 - 510), 1.0], 0.0)
+    G = np.select([blue, cyan | green, orange], [(wl - 440) / (490 - 440), 1.0, -(wl - 645) / (645 - 580)], 0.0)
+    B = np.select([violet | blue, cyan], [1.0, -(wl - 510) / (510 - 490)], 0.0)
 
     # Apply intensity fall-off at the ends of the spectrum for a more natural look
-    factor = 1.0
-    if 380 <= wavelength_nm < 420:
-        factor = 0.3 + 0.7 * (wavelength_nm - 380) / (420 - 380)
-    elif 700 < wavelength_nm <= 750:
-        factor = 0.3 + 0.7 * (750 - wavelength_nm) / (750 - 700)
+    factor = np.select(
+        [(380 <= wl) & (wl < 420), (700 < wl) & (wl <= 750)],
+        [0.3 + 0.7 * (wl - 380) / (420 - 380), 0.3 + 0.7 * (750 - wl) / (750 - 700)],
+        1.0
+    )
 
-    # Convert RGB components to 0-255 range and then to hex
-    R_int = int(255 * R * factor)
-    G_int = int(255 * G * factor)
-    B_int = int(255 * B * factor)
+    return np.stack([R, G, B], axis=-1) * factor[..., None]
 
-    return f'#{R_int:02x}{G_int:02x}{B_int:02x}'
+def get_spectrum_color(wavelength_nm):
+    """
+    Approximates the sRGB hex color for a single wavelength (380-750nm).
+    """
+    return rgb_to_hex(spectrum_rgb(wavelength_nm))
+
+@functools.lru_cache(maxsize=8)
+def visible_spectrum_strip(start_nm=380, end_nm=750, step_nm=2):
+    """
+    Returns the visible spectrum as a (1, N, 3) RGB image, one pixel per
+    `step_nm` starting at `start_nm`, for drawing with a single imshow.
+    Cached, so the strip is only computed once per process.
+    """
+    wavelengths = np.arange(start_nm, end_nm + step_nm, step_nm)
+    strip = spectrum_rgb(wavelengths)[None, :, :]
+    strip.flags.writeable = False # Shared between renders
+    return strip
 
 
 def planck_law(wavelength_m, T):
-    exp_term = (h * c) / (wavelength_m * k * T)
-    # Handle potential overflow/underflow for np.exp
-    if exp_term > 700: # np.exp(709) is approx max for float64 before inf
-        return 0.0 # Intensity is effectively zero
-    return (2 * h * c**2) / (wavelength_m**5 * (np.exp(exp_term) - 1))
+    """
+    Vectorized Planck spectral radiance B(λ, T) in W·sr⁻¹·m⁻³.
+    Accepts scalars or arrays for both arguments; the result has shape
+    T.shape + wavelength_m.shape, so an array of temperatures returns a
+    whole temperature × wavelength grid in one call.
+    """
+    wavelength_m = np.asarray(wavelength_m, dtype=float)
+    T = np.asarray(T, dtype=float)
+    exp_term = (h * c / k) / np.multiply.outer(T, wavelength_m)
+    # expm1 overflows to inf for very short wavelengths / cool stars, which
+    # drives the radiance to exactly 0 instead of needing a per-point branch
+    with np.errstate(over='ignore'):
+        return (2 * h * c**2) / (wavelength_m**5 * np.expm1(exp_term))
 
 def plot_planck_curve(T):
     """
@@ -134,21 +216,25 @@ def plot_planck_curve(T):
     """
     wavelengths_nm = np.linspace(100, 3000, 500)
     wavelengths_m = wavelengths_nm * 1e-9
-    intensities = np.array([planck_law(wl_m, T) for wl_m in wavelengths_m])
+    intensities = planck_law(wavelengths_m, T)
 
     y_max = np.max(intensities[np.isfinite(intensities)]) if np.any(np.isfinite(intensities)) else 1.0
     if y_max == 0:
         y_max = 1.0
 
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
 
-    # Draw visible spectrum background
+    # Draw visible spectrum background as a single raster image
     visible_spectrum_start_nm = 380
     visible_spectrum_end_nm = 750
     spectrum_step = 2
-    for wl in np.arange(visible_spectrum_start_nm, visible_spectrum_end_nm + spectrum_step, spectrum_step):
-        color = get_spectrum_color(wl)
-        ax.axvspan(wl, wl + spectrum_step, color=color, alpha=0.8, zorder=0)
+    strip = visible_spectrum_strip(visible_spectrum_start_nm, visible_spectrum_end_nm, spectrum_step)
+    ax.imshow(
+        strip,
+        extent=(visible_spectrum_start_nm, visible_spectrum_start_nm + strip.shape[1] * spectrum_step, 0, y_max * 1.1),
+        aspect='auto', interpolation='nearest', alpha=0.8, zorder=0
+    )
 
     # Plot the Planck curve
     ax.plot(wavelengths_nm, intensities, color='orange', linewidth=2.5, label=f'T = {T} K', zorder=1)
@@ -165,12 +251,132 @@ def plot_planck_curve(T):
     fig.tight_layout()
     return fig
 
+# --- Batch Catalog Mode ---
+CATALOG_COLUMNS = ("radius", "temperature", "distance") # m, K, m
+CATALOG_CHUNK_ROWS = 100_000 # Rows computed between progress reports
+
+def read_catalog(uploaded_file, name=None):
+    """
+    Reads an uploaded CSV or Parquet star catalog into a DataFrame with
+    lower-cased column names. `name` (default: the upload's name) picks the
+    format.
+    """
+    import pandas as pd
+
+    if (name or uploaded_file.name).lower().endswith((".parquet", ".pq")):
+        df = pd.read_parquet(uploaded_file)
+    else:
+        df = pd.read_csv(uploaded_file)
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    return df
+
+def compute_catalog(R, T, D):
+    """
+    Vectorized luminosity, flux, peak wavelength and color for arrays of
+    radius [m], temperature [K] and distance [m]. Rows with a non-positive,
+    missing or non-numeric input get NaN outputs and an empty color.
+    """
+    import pandas as pd
+
+    R, T, D = (pd.to_numeric(np.asarray(v, dtype=object).ravel(), errors="coerce").astype(float) for v in (R, T, D))
+    valid = (R > 0) & (T > 0) & (D > 0) # NaN compares False
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        L = np.where(valid, 4 * PI * R**2 * SIGMA * T**4, np.nan) # Stefan-Boltzmann Law
+        F = L / (4 * PI * D**2)
+        wavelength_nm = np.where(valid, WIEN_DISPLACEMENT / T * 1e9, np.nan) # Wien's Displacement Law
+
+    rgb = color_from_temperature(np.where(valid, T, COLOR_LUT_T_MIN))
+    packed = (rgb * 255).astype(int) @ np.array([1 << 16, 1 << 8, 1])
+    hex_color = np.where(valid, np.char.mod('#%06x', packed), "")
+
+    return {
+        "luminosity_watt": L,
+        "luminosity_solar_units": L / L_SUN_WATT,
+        "flux_watt_per_m2": F,
+        "flux_solar_units": F / F_SUN_W_PER_M2,
+        "peak_wavelength_nm": wavelength_nm,
+        "hex_color": hex_color,
+    }
+
+def batch_catalog_ui():
+    st.subheader("📂 Batch Catalog")
+    st.markdown(
+        "Upload a **CSV** or **Parquet** file with columns `radius` [m], `temperature` [K] and "
+        "`distance` [m]. Luminosity, flux, peak wavelength and color are computed for every row. "
+        "Colors are clamped to the 500 K – 100 000 K lookup table range."
+    )
+    uploaded = st.file_uploader("Star catalog", type=["csv", "parquet", "pq"])
+    if uploaded is None:
+        return
+
+    data = uploaded.getvalue()
+    digest = hashlib.sha1(data).hexdigest()
+    if st.button("🚀 Compute Catalog"):
+        start("catalog_job", _catalog_job, uploaded.name, data,
+              name=f"Catalog {uploaded.name}", key=("catalog", uploaded.name, digest))
+
+    job = track("catalog_job")
+    if job is not None:
+        if job.status == DONE:
+            st.session_state["catalog_result"] = {"digest": digest, "df": job.result}
+        elif job.status == CANCELLED:
+            st.info("🛑 Catalog computation cancelled.")
+        elif isinstance(job.error, ValueError):
+            st.error(f"❌ {job.error}")
+        else:
+            st.error("❌ Catalog computation failed.")
+            st.exception(job.error)
+
+    result = st.session_state.get("catalog_result")
+    if result is None or result["digest"] != digest:
+        return
+    df = result["df"]
+    invalid = int(df["luminosity_watt"].isna().sum())
+    st.success(f"✅ Computed {len(df) - invalid:,} of {len(df):,} stars.")
+    if invalid:
+        st.warning(f"{invalid:,} row(s) had missing, non-numeric or non-positive inputs and were left blank.")
+
+    st.dataframe(df.head(1000), use_container_width=True)
+    st.download_button(
+        "⬇️ Download Results (CSV)",
+        data=df.to_csv(index=False).encode("utf-8"),
+        file_name=f"{os.path.splitext(uploaded.name)[0]}_results.csv",
+        mime="text/csv"
+    )
+
+def _catalog_job(job, name, data):
+    job.report(0.0, "📖 Reading catalog...")
+    try:
+        df = read_catalog(io.BytesIO(data), name)
+    except Exception as e:
+        raise ValueError(f"Could not read `{name}`: {e}") from e
+
+    missing = [col for col in CATALOG_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    parts = []
+    for first in range(0, max(len(df), 1), CATALOG_CHUNK_ROWS):
+        chunk = df.iloc[first:first + CATALOG_CHUNK_ROWS]
+        parts.append(compute_catalog(chunk["radius"], chunk["temperature"], chunk["distance"]))
+        done = first + len(chunk)
+        job.report(done / max(len(df), 1), f"{done:,} / {len(df):,} stars")
+    for column in parts[0]:
+        df[column] = np.concatenate([part[column] for part in parts])
+    return df
+
 # --- Main App ---
 def app():
     st.set_page_config(page_title="Stellar Color and Luminosity Calculator", layout="centered")
     st.title("🌟 Stellar Calculator: Luminosity, Flux, and Color")
     st.markdown("Use physical laws to calculate a star's **luminosity**, **flux** at a distance, and **color** based on surface temperature.")
 
+    mode = st.radio("Choose input mode:", ["Single Star", "Batch Catalog"], horizontal=True)
+    if mode == "Batch Catalog":
+        batch_catalog_ui()
+        return
+
     # Reset button to set inputs to Sun's default values
     reset = st.button("🔁 Reset to Default (Sun's Values)")
 
@@ -217,7 +423,7 @@ def app():
         st.color_picker("🖌 Accurate Color Preview", value=hex_color, label_visibility="collapsed")
 
         # Display the Planck curve with spectrum background
-        st.pyplot(plot_planck_curve(T), use_container_width=True)
+        st.image(render_png(normalize_key("planck", T), plot_planck_curve, T), use_container_width=True)
 
         # --- Launch Visualization Button (unchanged) ---
         if st.button("🚀 Launch Visualization"):
@@ -237,8 +443,7 @@ def app():
                 "flux_solar_units": F_solar_units # Added solar units to JSON
             }
             file_path = "./visual/luminosity/data.json"
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4)
+            handoff.write_json(file_path, data)
 
             st.success(f"✅ Data saved to `{file_path}`!")
             st.json(data)
@@ -246,8 +451,10 @@ def app():
             try:
                 # Attempt to launch an external visualization (Love2D application)
                 # This part assumes Love2D is installed and configured in the system's PATH.
-                subprocess.Popen([LOVE_PATH, os.path.abspath("./visual/luminosity")])
-                st.info("🔄 Love2D visualization launched. Check your system for the pop-up window.")
+                if launcher.launch(os.path.abspath("./visual/luminosity")):
+                    st.info("🔄 Love2D visualization launched. Check your system for the pop-up window.")
+                else:
+                    st.info("🔄 Love2D visualization is already open and has been updated in place.")
             except FileNotFoundError:
                 st.error("❌ Love2D not found. Make sure it's installed and in your PATH. Skipping visualization launch.")
             except Exception as e:
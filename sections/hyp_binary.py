@@ -1,9 +1,7 @@
 import streamlit as st
 import math
 import os
-import json
-import subprocess
-from helper.constant import LOVE_PATH
+from helper import handoff, launcher
 
 G = 6.67430e-11  # gravitational constant in m^3 kg^-1 s^-2
 
@@ -86,18 +84,18 @@ def app():
             }
 
             file_path = "./visual/binary_stars/data.json"
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4)
+            handoff.write_json(file_path, data)
 
             st.success(f"✅ Data saved to `{file_path}`!")
             st.json(data)
 
-            love2d_path = LOVE_PATH  # Ensure this is in system PATH
             love_project_folder = os.path.abspath("./visual/binary_stars")
 
             try:
-                subprocess.Popen([love2d_path, love_project_folder])
-                st.info("🌀 Love2D visualization launched.")
+                if launcher.launch(love_project_folder):
+                    st.info("🌀 Love2D visualization launched.")
+                else:
+                    st.info("🔄 Love2D visualization is already open and has been updated in place.")
             except FileNotFoundError:
                 st.error("❌ Love2D not found. Please make sure it's installed and in your PATH.")
     else:
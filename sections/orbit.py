@@ -1,8 +1,8 @@
 import streamlit as st
 import math
-import subprocess
-import json, os
-from helper.constant import LOVE_PATH
+import os
+from helper import handoff, launcher
+from helper.ephemeris import ephemeris_table
 
 # Global gravitational constant
 G = 6.67430e-11  # m^3 kg^-1 s^-2
@@ -86,6 +86,9 @@ def app():
         if st.button("Launch"):
             os.makedirs("./visual/orbits", exist_ok=True)
 
+            # Precomputed positions over one period; the viewer only interpolates
+            table = ephemeris_table([a], [e], [T_seconds])
+
             data = {
                 "central_mass": {
                     "value": M,
@@ -104,30 +107,32 @@ def app():
                     }
                 ]
             }
+            ephemeris = [{"x": table["x"][0], "y": table["y"][0]}]
 
-            file_path = "./visual/orbits/data.json"
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4)
+            file_path = "./visual/orbits/data.bin"
+            handoff.write(file_path, {**data, "ephemeris": ephemeris})
 
             st.success(f"✅ Data saved to `{file_path}`!")
             st.json(data)
-            love2d_path = LOVE_PATH  # Make sure LOVE is in your system's PATH
             love_project_folder = os.path.abspath("./visual/orbits")
 
             try:
-                subprocess.Popen([love2d_path, love_project_folder])
-                st.info("🌀 Love2D visualization launched.")
+                if launcher.launch(love_project_folder):
+                    st.info("🌀 Love2D visualization launched.")
+                else:
+                    st.info("🔄 Love2D visualization is already open and has been updated in place.")
             except FileNotFoundError:
                 st.error("❌ Could not launch Love2D. Make sure it is installed and available in your PATH.")
         
         if st.button("Launch Kepler Visual"):
 
-            love2d_path = LOVE_PATH
             love_project_folder = os.path.abspath("./visual/kepler")
 
             try:
-                subprocess.Popen([love2d_path, love_project_folder])
-                st.info("🌀 Love2D visualization launched.")
+                if launcher.launch(love_project_folder):
+                    st.info("🌀 Love2D visualization launched.")
+                else:
+                    st.info("🔄 Love2D visualization is already open.")
             except FileNotFoundError:
                 st.error("❌ Love2D not found. Please make sure it's installed and in your PATH.")
 
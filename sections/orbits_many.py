@@ -1,14 +1,30 @@
 import streamlit as st
 import math
-import json
 import os
-import subprocess
-import matplotlib.pyplot as plt
-from helper.constant import LOVE_PATH
+import time
+import numpy as np
+import pandas as pd
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from helper import handoff, launcher
+from helper.figures import normalize_key, render_png
+from helper.ephemeris import ephemeris_table
+from helper.job_view import start, track
+from helper.jobs import CANCELLED, DONE
+from helper.nbody import AU, METHODS, YEAR, Trajectory, from_elements, handoff_payload, integrate, orbital_periods, random_belt
 
 # Gravitational constant
 G = 6.67430e-11  # m^3 kg^-1 s^-2
 
+METHOD_LABELS = {
+    "whfast": "Wisdom-Holman (WHFast-style, symplectic)",
+    "leapfrog": "Leapfrog (symplectic)",
+    "dop853": "DOP853 (adaptive, 8th order)",
+}
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5)) # Spreads the planets' periapses
+STREAM_SECONDS = 2.0 # Wall time between trajectory updates sent to the viewer
+PLOT_SAMPLES = 1000 # Samples per body drawn in the N-body plot
+
 # Ensure ./visual/orbit directory exists
 os.makedirs("./visual/orbits", exist_ok=True)
 
@@ -37,12 +53,170 @@ def scientific_input(label, key_prefix, default_coeff, default_exp, exp_range=(1
         )
     return coeff * (10 ** exp), coeff, exp
 
+def plot_orbital_periods(planet_names, periods_years):
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    ax.bar(planet_names, periods_years, color='royalblue')
+    ax.set_title("Orbital Periods of Planets")
+    ax.set_xlabel("Planet")
+    ax.set_ylabel("Period (years)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    for i, v in enumerate(periods_years):
+        ax.text(i, v + 0.05, f"{v:.3f} yr", ha='center', va='bottom')
+    return fig
+
+def plot_orbit_paths(planet_names, a_values, e_values, T_values):
+    table = ephemeris_table(a_values, e_values, T_values)
+
+    fig = Figure(figsize=(6, 6))
+    ax = fig.subplots()
+    ax.scatter([0], [0], color='gold', s=120, zorder=3, label="Central Object")
+    for name, x, y in zip(planet_names, table["x"], table["y"]):
+        ax.plot(np.append(x, x[0]) / AU, np.append(y, y[0]) / AU, label=name)
+    ax.set_aspect('equal')
+    ax.set_title("Orbit Paths")
+    ax.set_xlabel("x (AU)")
+    ax.set_ylabel("y (AU)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    ax.legend(fontsize='small')
+    return fig
+
+def plot_nbody_paths(names, rel):
+    fig = Figure(figsize=(6, 6))
+    ax = fig.subplots()
+    rel = rel[::max(1, math.ceil(len(rel) / PLOT_SAMPLES))] / AU
+    ax.scatter([0], [0], color='gold', s=120, zorder=3, label=names[0])
+    minor = [i for i, name in enumerate(names) if i > 0 and not name]
+    if minor:
+        ax.add_collection(LineCollection(np.transpose(rel[:, :2, minor], (2, 0, 1)), colors='gray', linewidths=0.3, alpha=0.3))
+        ax.scatter(rel[-1, 0, minor], rel[-1, 1, minor], color='gray', s=2, zorder=2)
+    for i, name in enumerate(names):
+        if i > 0 and name:
+            line, = ax.plot(rel[:, 0, i], rel[:, 1, i], linewidth=1, label=name)
+            ax.scatter(rel[-1, 0, i], rel[-1, 1, i], color=line.get_color(), s=20, zorder=4)
+    ax.autoscale_view()
+    ax.set_aspect('equal')
+    ax.set_title("N-body Orbit Paths")
+    ax.set_xlabel("x (AU)")
+    ax.set_ylabel("y (AU)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    ax.legend(fontsize='small')
+    return fig
+
+def show_nbody(trajectory, kepler_years=None):
+    count = len(trajectory)
+    if count < 2:
+        return
+    t = trajectory.t[:count]
+    rel = trajectory.relative()
+    key = normalize_key("nbody_paths", trajectory.names, count, float(t[-1]), float(np.abs(rel[-1]).sum()))
+    st.image(render_png(key, plot_nbody_paths, trajectory.names, rel), use_container_width=True)
+
+    error = trajectory.energy_error[:count]
+    st.line_chart(pd.DataFrame({"relative energy error": error}, index=pd.Index(t / YEAR, name="time (years)")), use_container_width=True)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Bodies", f"{len(trajectory.m):,}")
+    col2.metric("Steps", f"{trajectory.steps:,}")
+    col3.metric("Max |ΔE/E|", f"{np.abs(error).max():.2e}")
+
+    if kepler_years:
+        # Mean periods from the simulation next to the two-body values above
+        periods = orbital_periods(t, rel) / YEAR
+        st.dataframe(pd.DataFrame({
+            "Planet": list(kepler_years),
+            "Kepler T (years)": list(kepler_years.values()),
+            "N-body T (years)": [periods[trajectory.names.index(name)] for name in kepler_years],
+        }), hide_index=True, use_container_width=True)
+
+def _stream_to_viewer(trajectory, viewer):
+    handoff.write("./visual/orbits/data.bin", {"trajectory": handoff_payload(trajectory)})
+    if viewer is None:
+        try:
+            viewer = "launched" if launcher.launch(os.path.abspath("./visual/orbits")) else "updated"
+        except FileNotFoundError:
+            viewer = "missing"
+    return viewer
+
+def _nbody_job(job, m, pos, vel, names, method, duration, samples, stream):
+    trajectory = Trajectory(m, names, samples)
+    viewer, last_write = None, 0.0
+    for frame in integrate(m, pos, vel, duration, method, samples):
+        trajectory.append(frame)
+        job.report(frame["t"] / duration, f"{frame['t'] / YEAR:,.2f} of {duration / YEAR:,.2f} years, {frame['steps']:,} steps", partial=trajectory)
+        if stream and time.monotonic() - last_write > STREAM_SECONDS:
+            viewer = _stream_to_viewer(trajectory, viewer)
+            last_write = time.monotonic()
+    if stream:
+        viewer = _stream_to_viewer(trajectory, viewer)
+    return {"trajectory": trajectory, "viewer": viewer}
+
+def nbody_section(M, planet_data, reset):
+    st.markdown("---")
+    st.subheader("🧮 N-body Simulation")
+    st.markdown("The periods above treat each planet as alone with the star. Here all bodies are integrated **together**, so the planets pull on each other and on the star. Add a belt of small bodies to follow hundreds at once.")
+
+    method = st.selectbox("⚙️ Integrator", METHODS, format_func=METHOD_LABELS.get)
+    col1, col2 = st.columns(2)
+    years = col1.number_input("⏳ Duration (years)", min_value=0.1, max_value=10000.0, value=10.0, step=1.0)
+    samples = col2.number_input("🎞️ Samples", min_value=50, max_value=5000, value=500, step=50)
+    belt = st.slider("🌠 Belt bodies", min_value=0, max_value=500, value=0)
+    if belt:
+        belt_range = st.slider("Belt semi-major axis range (AU)", min_value=0.1, max_value=50.0, value=(2.2, 3.3), step=0.1)
+        belt_mass, _, _ = scientific_input("Mass of each belt body [kg]", "belt_m", 1.0, 18, exp_range=(0, 30), reset=reset)
+        st.caption("Set the coefficient to 0 for massless test particles, which feel the planets but pull on nothing.")
+    stream = st.checkbox("🎬 Stream the trajectories to the Love2D viewer", value=False)
+
+    if st.button("▶️ Run N-body Simulation"):
+        bound = [p for p in planet_data if p["eccentricity"] < 1]
+        if not bound:
+            st.error("🚫 At least one valid planet with eccentricity below 1 is required.")
+        else:
+            a = [p["semi_major_axis"]["value"] for p in bound]
+            e = [p["eccentricity"] for p in bound]
+            omega = GOLDEN_ANGLE * np.arange(len(bound))
+            mean_anomaly = np.zeros(len(bound))
+            masses = [p["mass"]["value"] for p in bound]
+            if belt:
+                belt_a, belt_e, belt_omega, belt_anomaly = random_belt(belt, belt_range[0] * AU, belt_range[1] * AU)
+                a, e = np.concatenate([a, belt_a]), np.concatenate([e, belt_e])
+                omega, mean_anomaly = np.concatenate([omega, belt_omega]), np.concatenate([mean_anomaly, belt_anomaly])
+                masses = np.concatenate([masses, np.full(belt, belt_mass)])
+            m, pos, vel = from_elements(M, masses, a, e, omega, mean_anomaly)
+            names = ["Central Object"] + [p["planet"] for p in bound] + [""] * belt
+            st.session_state["nbody_kepler"] = {p["planet"]: p["T_years"] for p in bound}
+            start("nbody_job", _nbody_job, m, pos, vel, names, method, years * YEAR, int(samples), stream,
+                  name=f"N-body: {len(m)} bodies over {years:g} years")
+
+    job = track("nbody_job", show_partial=show_nbody)
+    if job is not None:
+        if job.status == DONE:
+            st.session_state["nbody_result"] = job.result
+            viewer = job.result["viewer"]
+            if viewer == "launched":
+                st.info("🔀 Love2D visualization launched.")
+            elif viewer == "updated":
+                st.info("🔄 Love2D visualization is already open and has been updated in place.")
+            elif viewer == "missing":
+                st.error("❌ Could not launch Love2D. Make sure it is installed and available in your PATH.")
+        elif job.status == CANCELLED:
+            st.info("🛑 Simulation cancelled, showing the part computed so far.")
+            if job.partial is not None:
+                # The job's own trajectory is shared with its worker thread
+                st.session_state["nbody_result"] = {"trajectory": job.partial.snapshot(), "viewer": None}
+        else:
+            st.error("❌ N-body simulation failed.")
+            st.exception(job.error)
+
+    result = st.session_state.get("nbody_result")
+    if result is not None:
+        show_nbody(result["trajectory"], st.session_state.get("nbody_kepler"))
+
 def app():
     st.title("🌌 Orbital Period Calculator — Multi Launch Mode")
-    st.markdown("Calculate and **store** the orbital periods for **2 to 5 planets** orbiting one central body.")
+    st.markdown("Calculate and **store** the orbital periods for **2 to 10 planets** orbiting one central body, then integrate them together as an N-body system.")
 
     reset = st.button("🔁 Reset to Default Values")
-    num_planets = st.slider("🔢 Number of Planets", min_value=2, max_value=5, value=5)
+    num_planets = st.slider("🔢 Number of Planets", min_value=2, max_value=10, value=5)
     show_latex = st.checkbox("📜 Show LaTeX Calculation Process", value=True)
 
     st.subheader("🌞 Central Object (Star)")
@@ -103,19 +277,27 @@ def app():
         planet_names = [p["planet"] for p in planet_data]
         periods_years = [p["T_years"] for p in planet_data]
 
-        fig, ax = plt.subplots(figsize=(8, 5))
-        ax.bar(planet_names, periods_years, color='royalblue')
-        ax.set_title("Orbital Periods of Planets")
-        ax.set_xlabel("Planet")
-        ax.set_ylabel("Period (years)")
-        ax.grid(True, linestyle='--', alpha=0.6)
-        for i, v in enumerate(periods_years):
-            ax.text(i, v + 0.05, f"{v:.3f} yr", ha='center', va='bottom')
+        key = normalize_key("orbital_periods", planet_names, periods_years)
+        st.image(render_png(key, plot_orbital_periods, planet_names, periods_years), use_container_width=True)
 
-        st.pyplot(fig)
+        st.subheader("🪐 Orbit Paths")
+        orbit_args = (
+            planet_names,
+            [p["semi_major_axis"]["value"] for p in planet_data],
+            [p["eccentricity"] for p in planet_data],
+            [p["T_seconds"] for p in planet_data],
+        )
+        st.image(render_png(normalize_key("orbit_paths", *orbit_args), plot_orbit_paths, *orbit_args), use_container_width=True)
 
     if st.button("Launch"):
         if len(planet_data) >= 2:
+            # Precomputed positions over one period per planet; the viewer only interpolates
+            table = ephemeris_table(
+                [p["semi_major_axis"]["value"] for p in planet_data],
+                [p["eccentricity"] for p in planet_data],
+                [p["T_seconds"] for p in planet_data]
+            )
+
             output_data = {
                 "central_mass": {
                     "value": M,
@@ -124,21 +306,24 @@ def app():
                 },
                 "planets": planet_data
             }
+            ephemeris = [{"x": x, "y": y} for x, y in zip(table["x"], table["y"])]
 
-            file_path = "./visual/orbits/data.json"
-            with open(file_path, "w") as f:
-                json.dump(output_data, f, indent=4)
+            file_path = "./visual/orbits/data.bin"
+            handoff.write(file_path, {**output_data, "ephemeris": ephemeris})
 
             st.success(f"✅ Data saved to `{file_path}`!")
             st.json(output_data)
 
-            love2d_path = LOVE_PATH
             love_project_folder = os.path.abspath("./visual/orbits")
 
             try:
-                subprocess.Popen([love2d_path, love_project_folder])
-                st.info("🔀 Love2D visualization launched.")
+                if launcher.launch(love_project_folder):
+                    st.info("🔀 Love2D visualization launched.")
+                else:
+                    st.info("🔄 Love2D visualization is already open and has been updated in place.")
             except FileNotFoundError:
                 st.error("❌ Could not launch Love2D. Make sure it is installed and available in your PATH.")
         else:
             st.error("🚫 At least two valid planets are required to save the data.")
+
+    nbody_section(M, planet_data, reset)
@@ -1,10 +1,9 @@
 import streamlit as st
 import os
-import json
-import subprocess
 import numpy as np
-import matplotlib.pyplot as plt
-from helper.constant import LOVE_PATH
+from matplotlib.figure import Figure
+from helper.figures import normalize_key, render_png
+from helper import handoff, launcher
 
 def scientific_input(label, key_prefix, default_coeff, default_exp, exp_range=(-6, 2), reset=False):
     if reset:
@@ -31,6 +30,25 @@ def scientific_input(label, key_prefix, default_coeff, default_exp, exp_range=(-
         )
     return coeff * (10 ** exp), coeff, exp
 
+def plot_parallax_distance(p, d):
+    p_vals = np.logspace(-6, 0, 500)
+    d_vals = 1 / p_vals
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(p_vals, d_vals, label='d = 1/p', color='blue')
+    ax.scatter([p], [d], color='red', zorder=5)
+    ax.text(p, d, f"({p:.3e}, {d:.2f} pc)", color='red', ha='left', va='bottom')
+
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel("Parallax (arcsec)")
+    ax.set_ylabel("Distance (parsecs)")
+    ax.set_title("Parallax vs. Distance")
+    ax.grid(True, which='both', linestyle='--', alpha=0.5)
+    ax.legend()
+    return fig
+
 def app():
     st.title("🌌 Stellar Parallax Distance Calculator")
     st.markdown("Estimate the **distance** to a star using either the **parallax angle** or directly the **distance in parsecs**.")
@@ -63,23 +81,7 @@ def app():
         st.markdown("---")
         st.subheader("📊 Parallax-Distance Relationship")
 
-        p_vals = np.logspace(-6, 0, 500)
-        d_vals = 1 / p_vals
-
-        fig, ax = plt.subplots()
-        ax.plot(p_vals, d_vals, label='d = 1/p', color='blue')
-        ax.scatter([p], [d], color='red', zorder=5)
-        ax.text(p, d, f"({p:.3e}, {d:.2f} pc)", color='red', ha='left', va='bottom')
-
-        ax.set_xscale('log')
-        ax.set_yscale('log')
-        ax.set_xlabel("Parallax (arcsec)")
-        ax.set_ylabel("Distance (parsecs)")
-        ax.set_title("Parallax vs. Distance")
-        ax.grid(True, which='both', linestyle='--', alpha=0.5)
-        ax.legend()
-
-        st.pyplot(fig)
+        st.image(render_png(normalize_key("parallax", p, d), plot_parallax_distance, p, d), use_container_width=True)
 
         if st.button("Launch"):
             os.makedirs("./visual/parallax", exist_ok=True)
@@ -91,18 +93,18 @@ def app():
             }
 
             file_path = "./visual/parallax/data.json"
-            with open(file_path, "w", encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
+            handoff.write_json(file_path, data)
 
             st.success(f"✅ Data saved to `{file_path}`!")
             st.json(data)
 
-            love2d_path = LOVE_PATH
             love_project_folder = os.path.abspath("./visual/parallax")
 
             try:
-                subprocess.Popen([love2d_path, love_project_folder])
-                st.info("🔀 Love2D visualization launched.")
+                if launcher.launch(love_project_folder):
+                    st.info("🔀 Love2D visualization launched.")
+                else:
+                    st.info("🔄 Love2D visualization is already open.")
             except FileNotFoundError:
                 st.error("❌ Love2D not found. Please make sure it's installed and in your PATH.")
 
@@ -1,5 +1,6 @@
 import streamlit as st
 import streamlit.components.v1 as components
+from helper.map_server import map_url
 
 def app():
     st.title("🛰️ Satelite Map Viewer")
@@ -7,6 +8,6 @@ def app():
 
     st.markdown("### 🗺️ Embedded Satelite Map")
     components.html(
-        '<iframe src="https://fluffy-fenglisu-8c73f5.netlify.app/satelite/" width="100%" height="900" style="border: none;"></iframe>',
+        f'<iframe src="{map_url("satelite")}" width="100%" height="900" style="border: none;"></iframe>',
         height=900
     )
\ No newline at end of file
@@ -1,12 +1,34 @@
 import streamlit as st
 import streamlit.components.v1 as components
+from helper.map_server import map_url
+from helper.telescopes import read_sites
+
 
 def app():
     st.title("🛰️ Sky Map Viewer")
     st.markdown("Embed and explore the interactive **sky map** visualized using D3.js. Press space to pause rotation")
 
+    view = st.radio("🔭 View:", ["Full sky", "From a telescope site", "From custom coordinates"], horizontal=True)
+    params = {}
+    if view == "From a telescope site":
+        sites = read_sites()
+        if sites:
+            site = st.selectbox("📡 Site:", sites, format_func=lambda s: f"{s['name']} ({s['folder']})" if s["folder"] else s["name"])
+            params = {"lat": site["lat"], "lon": site["lon"], "height": site["alt"]}
+        else:
+            st.warning("⚠️ No telescope sites found, showing the full sky.")
+    elif view == "From custom coordinates":
+        col1, col2, col3 = st.columns(3)
+        params = {
+            "lat": col1.number_input("Latitude (°)", min_value=-90.0, max_value=90.0, value=0.0, step=0.1),
+            "lon": col2.number_input("Longitude (°)", min_value=-180.0, max_value=180.0, value=0.0, step=0.1),
+            "height": col3.number_input("Height (km)", min_value=0.0, max_value=10.0, value=0.0, step=0.1),
+        }
+    if params:
+        st.caption("Stars above the horizon as seen from the site, zenith at the centre, north up and east to the left.")
+
     st.markdown("### 🗺️ Embedded Sky Map")
     components.html(
-        '<iframe src="https://fluffy-fenglisu-8c73f5.netlify.app/skymap/" width="100%" height="900" style="border: none;"></iframe>',
+        f'<iframe src="{map_url("skymap", **params)}" width="100%" height="900" style="border: none;"></iframe>',
         height=900
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,39 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("colour")
+# helper.launcher needs the machine-local viewer config; the LUT does not
+sys.modules.setdefault("helper.constant", types.SimpleNamespace(LOVE_PATH=None))
+
+from sections import fluxlumi  # noqa: E402
+
+MAX_ERROR = 1e-3
+
+
+@pytest.fixture
+def fresh_lut(tmp_path, monkeypatch):
+    # Build the table from scratch instead of trusting a persisted one
+    monkeypatch.setattr(fluxlumi, "COLOR_LUT_PATH", str(tmp_path / "lut.npz"))
+    fluxlumi.blackbody_color_lut.cache_clear()
+    yield
+    fluxlumi.blackbody_color_lut.cache_clear()
+
+
+def test_lut_matches_exact_colors(fresh_lut):
+    # Off the table nodes, so the interpolation itself is tested
+    temps = np.geomspace(fluxlumi.COLOR_LUT_T_MIN * 1.001, fluxlumi.COLOR_LUT_T_MAX / 1.001, 301)
+    lut = fluxlumi.color_from_temperature(temps)
+    exact = np.array([fluxlumi.exact_color_from_temperature(T) for T in temps])
+    assert lut.shape == (len(temps), 3)
+    assert np.abs(lut - exact).max() < MAX_ERROR
+
+
+def test_lut_is_persisted_and_reloaded(fresh_lut):
+    temps, rgb = fluxlumi.blackbody_color_lut()
+    fluxlumi.blackbody_color_lut.cache_clear()
+    reloaded_temps, reloaded_rgb = fluxlumi.blackbody_color_lut()
+    np.testing.assert_array_equal(reloaded_temps, temps)
+    np.testing.assert_array_equal(reloaded_rgb, rgb)
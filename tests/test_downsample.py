@@ -0,0 +1,47 @@
+import numpy as np
+
+from helper.downsample import LightCurvePyramid, lttb, minmax
+
+
+def _series(n=10_000, seed=1):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 90.0, n)
+    return x, np.sin(x) + 0.1 * rng.standard_normal(n)
+
+
+def test_lttb_keeps_endpoints_and_size():
+    x, y = _series()
+    dx, dy = lttb(x, y, 500)
+    assert len(dx) == len(dy) == 500
+    assert (dx[0], dy[0], dx[-1], dy[-1]) == (x[0], y[0], x[-1], y[-1])
+    assert np.all(np.diff(dx) > 0)
+    assert np.isin(dx, x).all()
+
+
+def test_lttb_returns_short_series_unchanged():
+    x, y = _series(100)
+    dx, dy = lttb(x, y, 500)
+    assert dx is x and dy is y
+
+
+def test_minmax_keeps_extremes_of_each_bucket():
+    x, y = _series(1003)
+    bucket = 8
+    dx, dy = minmax(x, y, bucket)
+    rows = -(-len(x) // bucket)
+    assert rows <= len(dx) <= 2 * rows
+    assert np.all(np.diff(dx) > 0)
+    assert dy.max() == y.max() and dy.min() == y.min()
+    for start in range(0, len(x), bucket):
+        chunk = y[start:start + bucket]
+        assert chunk.max() in dy and chunk.min() in dy
+
+
+def test_pyramid_view_fits_max_points():
+    x, y = _series(50_000)
+    pyramid = LightCurvePyramid(x, y, max_points=1000)
+    vx, vy, level = pyramid.view()
+    assert len(vx) <= 1000 and level > 0
+    assert x[0] <= vx[0] and vx[-1] <= x[-1]
+    zx, _, zoom_level = pyramid.view(10.0, 11.0)
+    assert zoom_level == 0 and zx.min() >= 10.0 and zx.max() <= 11.0
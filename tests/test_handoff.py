@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from helper import handoff
+
+
+def test_round_trip_nested():
+    data = {
+        "name": "Kepler-11",
+        "mass": 0.95,
+        "count": 6,
+        "flag": True,
+        "samples": [1, 2.5, 3],
+        "grid": np.arange(6, dtype=np.float32),
+        "planets": [{"name": "b", "a": 0.091}, {"name": "c", "a": 0.106}],
+        "options": {"trail": 50, "label": "orbits"},
+    }
+    decoded = handoff.decode(handoff.encode(data))
+
+    assert decoded["name"] == "Kepler-11"
+    assert decoded["mass"] == 0.95
+    assert decoded["count"] == 6.0
+    assert decoded["flag"] == 1.0
+    np.testing.assert_array_equal(decoded["samples"], [1.0, 2.5, 3.0])
+    np.testing.assert_array_equal(decoded["grid"], np.arange(6.0))
+    assert decoded["planets"] == [{"name": "b", "a": 0.091}, {"name": "c", "a": 0.106}]
+    assert decoded["options"] == {"trail": 50.0, "label": "orbits"}
+
+
+def test_empty_list_round_trips_as_empty_array():
+    decoded = handoff.decode(handoff.encode({"moons": [], "planets": [{"moons": []}]}))
+    assert len(decoded["moons"]) == 0
+    assert len(decoded["planets"][0]["moons"]) == 0
+
+
+@pytest.mark.parametrize("key", ["semi.major", ""])
+def test_unrepresentable_keys_are_rejected(key):
+    with pytest.raises(ValueError):
+        handoff.encode({"orbit": {key: 1.0}})
+
+
+def test_unsupported_value_is_rejected():
+    with pytest.raises(TypeError):
+        handoff.encode({"when": object()})
+
+
+def test_bad_header_is_rejected():
+    payload = bytearray(handoff.encode({"a": 1.0}))
+    with pytest.raises(ValueError):
+        handoff.decode(b"XXXX" + bytes(payload[4:]))
+    payload[4] = handoff.HANDOFF_VERSION + 1
+    with pytest.raises(ValueError):
+        handoff.decode(bytes(payload))
+
+
+def test_write_and_read(tmp_path):
+    path = tmp_path / "data.bin"
+    handoff.write(str(path), {"t": [0.0, 1.0], "label": "x"})
+    decoded = handoff.read(str(path))
+    np.testing.assert_array_equal(decoded["t"], [0.0, 1.0])
+    assert decoded["label"] == "x"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.bin", "data.bin.seq"] # No temp file left behind
+
+
+def test_every_write_bumps_the_sequence(tmp_path):
+    path = str(tmp_path / "data.json")
+    stamps = []
+    for _ in range(3):
+        handoff.write_json(path, {"g": 9.81}) # Same size, same second
+        with open(path + handoff.SEQUENCE_SUFFIX, encoding="ascii") as f:
+            stamps.append(int(f.read()))
+    assert stamps[0] < stamps[1] < stamps[2]
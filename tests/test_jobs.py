@@ -0,0 +1,95 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from helper import jobs
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.done, f"job still {job.status}"
+    return job
+
+
+def _blocking(job, release):
+    # Reports until released, so a cancel takes effect
+    while not release.wait(0.01):
+        job.report(message="waiting")
+    return "released"
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set() # Never leave runner threads blocked for the next test
+
+
+def _owner():
+    return uuid.uuid4().hex
+
+
+def test_submit_returns_result_and_progress():
+    def work(job, a, b):
+        job.report(0.5, "half")
+        return a + b
+
+    job = _wait(jobs.submit(work, 2, 3, owner=_owner()))
+    assert (job.status, job.result, job.progress) == (jobs.DONE, 5, 1.0)
+    assert jobs.get(job.id) is job
+
+
+def test_failure_is_recorded():
+    def work(job):
+        raise RuntimeError("boom")
+
+    job = _wait(jobs.submit(work, owner=_owner()))
+    assert job.status == jobs.FAILED and str(job.error) == "boom"
+
+
+def test_same_key_shares_one_job(release):
+    key = ("test", uuid.uuid4().hex)
+    first, second = _owner(), _owner()
+    job = jobs.submit(_blocking, release, owner=first, key=key)
+    shared = jobs.submit(_blocking, release, owner=second, key=key)
+    assert shared is job
+    assert job.owners == {first, second}
+    assert job in jobs.jobs(second)
+
+    release.set()
+    _wait(job)
+    assert jobs.submit(_blocking, release, owner=_owner(), key=key) is job # Finished results are shared too
+
+
+def test_shared_job_runs_until_last_owner_cancels(release):
+    key = ("test", uuid.uuid4().hex)
+    first, second = _owner(), _owner()
+    job = jobs.submit(_blocking, release, owner=first, key=key)
+    jobs.submit(_blocking, release, owner=second, key=key)
+
+    assert jobs.cancel(job.id, first) is False
+    assert not job.cancel_requested
+    assert jobs.cancel(job.id, second) is True
+    assert _wait(job).status == jobs.CANCELLED
+
+    # A cancelled job is not handed out again for its key
+    fresh = jobs.submit(_blocking, release, owner=first, key=key)
+    assert fresh is not job
+    jobs.cancel(fresh.id)
+
+
+def test_owner_limit(release):
+    owner = _owner()
+    running = [jobs.submit(_blocking, release, owner=owner) for _ in range(jobs.MAX_ACTIVE_PER_OWNER)]
+    with pytest.raises(jobs.JobLimitError):
+        jobs.submit(_blocking, release, owner=owner)
+    jobs.submit(_blocking, release, owner=_owner()) # Other sessions are not limited by it
+
+    jobs.cancel(running[0].id, owner)
+    _wait(running[0])
+    jobs.submit(_blocking, release, owner=owner) # A slot is free again
+    release.set()
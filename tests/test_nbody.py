@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+from helper.ephemeris import solve_kepler
+from helper.nbody import AU, G, YEAR, Trajectory, from_elements, integrate, kepler_drift
+
+M_SUN = 1.989e30
+MU_SUN = G * M_SUN
+
+
+def _outer_planets():
+    # Sun, Jupiter, Saturn
+    return from_elements(M_SUN, [1.898e27, 5.683e26], [5.20 * AU, 9.58 * AU], [0.049, 0.057], [0.0, 2.4], [0.0, 1.1])
+
+
+@pytest.mark.parametrize("method, bound", [("whfast", 1e-6), ("leapfrog", 1e-5)])
+def test_symplectic_energy_error_stays_bounded(method, bound):
+    m, pos, vel = _outer_planets()
+    frames = list(integrate(m, pos, vel, 200 * YEAR, method, samples=200))
+    error = np.array([frame["energy_error"] for frame in frames])
+    assert len(frames) == 201
+    assert frames[-1]["t"] == pytest.approx(200 * YEAR)
+    assert np.abs(error).max() < bound
+    # Bounded, not drifting: the second half is no worse than twice the first
+    assert np.abs(error[100:]).max() < 2 * np.abs(error[:101]).max() + 1e-12
+
+
+def test_dop853_tracks_the_fixed_step_methods():
+    m, pos, vel = _outer_planets()
+    last = {method: list(integrate(m, pos, vel, 20 * YEAR, method, samples=20))[-1] for method in ("whfast", "dop853")}
+    rel = {method: frame["pos"][:, 1:] - frame["pos"][:, :1] for method, frame in last.items()}
+    assert np.abs(rel["whfast"] - rel["dop853"]).max() < 1e-4 * AU
+
+
+def test_whfast_needs_dominant_body_first():
+    m, pos, vel = _outer_planets()
+    with pytest.raises(ValueError):
+        next(integrate(m[::-1], pos[:, ::-1], vel[:, ::-1], YEAR, "whfast"))
+
+
+def test_kepler_drift_matches_kepler_equation():
+    a = np.array([1.0, 1.5, 5.2, 30.0]) * AU
+    e = np.array([0.0, 0.2, 0.6, 0.95])
+    # Start at periapsis on the x axis
+    Q = np.stack([a * (1 - e), np.zeros(4), np.zeros(4)])
+    V = np.stack([np.zeros(4), np.sqrt(MU_SUN * (1 + e) / (a * (1 - e))), np.zeros(4)])
+    mean_motion = np.sqrt(MU_SUN / a**3)
+
+    for fraction in (0.01, 0.3, 0.77, 2.4, -0.4):
+        dt = fraction * 2 * math.pi / mean_motion.min()
+        Q1, V1 = kepler_drift(Q.copy(), V.copy(), MU_SUN, dt)
+        E = solve_kepler(mean_motion * dt, e)
+        expected = np.stack([a * (np.cos(E) - e), a * np.sqrt(1 - e**2) * np.sin(E), np.zeros(4)])
+        np.testing.assert_allclose(Q1, expected, rtol=0, atol=1e-8 * a.max())
+        # Energy along the orbit is unchanged
+        energy0 = 0.5 * np.sum(V**2, axis=0) - MU_SUN / np.linalg.norm(Q, axis=0)
+        energy1 = 0.5 * np.sum(V1**2, axis=0) - MU_SUN / np.linalg.norm(Q1, axis=0)
+        np.testing.assert_allclose(energy1, energy0, rtol=1e-9)
+
+
+def test_kepler_drift_hyperbolic():
+    Q = np.array([[1.0 * AU], [0.0], [0.0]])
+    V = np.array([[0.0], [1.5 * math.sqrt(2 * MU_SUN / AU)], [0.0]]) # Above escape speed
+    Q1, V1 = kepler_drift(Q, V, MU_SUN, YEAR)
+    energy0 = 0.5 * np.sum(V**2) - MU_SUN / np.linalg.norm(Q)
+    energy1 = 0.5 * np.sum(V1**2) - MU_SUN / np.linalg.norm(Q1)
+    assert energy1 == pytest.approx(energy0, rel=1e-9)
+    np.testing.assert_allclose(np.cross(Q1.ravel(), V1.ravel()), np.cross(Q.ravel(), V.ravel()), rtol=1e-9)
+
+
+def test_trajectory_snapshot_is_independent():
+    m, pos, vel = _outer_planets()
+    trajectory = Trajectory(m, ["Sun", "Jupiter", "Saturn"], 10)
+    frames = integrate(m, pos, vel, YEAR, "whfast", samples=10)
+    for _ in range(4):
+        trajectory.append(next(frames))
+    snapshot = trajectory.snapshot()
+    trajectory.append(next(frames))
+    assert len(snapshot) == 4 and len(trajectory) == 5
+    np.testing.assert_array_equal(snapshot.relative(), trajectory.relative()[:4])
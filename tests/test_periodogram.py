@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from helper.periodogram import bls_chunk, period_grid, periodogram, prepare
+
+PERIOD = 3.217 # days
+DURATION = 0.12
+DEPTH = 0.01
+T0 = 1.4
+
+
+def _transits(seed=2, days=80.0, cadence=0.02):
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, days, cadence)
+    phase = np.mod(t - T0 + PERIOD / 2, PERIOD) - PERIOD / 2
+    flux = 1.0 + 0.002 * rng.standard_normal(len(t))
+    flux[np.abs(phase) < DURATION / 2] -= DEPTH
+    return t, flux, np.full(len(t), 0.002)
+
+
+def test_bls_chunk_recovers_injected_transit():
+    t, y, w = prepare(*_transits())
+    periods = period_grid(1.0, 10.0, 5000)
+    power, duration, t0, depth = bls_chunk(t, y, w, periods)
+    best = np.argmax(power)
+    assert periods[best] == pytest.approx(PERIOD, rel=2e-3)
+    assert depth[best] == pytest.approx(DEPTH, rel=0.2)
+    assert duration[best] == pytest.approx(DURATION, abs=0.05)
+    offset = np.mod(t0[best] - T0 + PERIOD / 2, PERIOD) - PERIOD / 2
+    assert abs(offset) < DURATION
+
+
+def test_chunked_periodogram_matches_single_chunk(tmp_path):
+    t, flux, err = _transits()
+    chunked = periodogram(t, flux, err, min_period=1.0, max_period=10.0, count=2000, workers=1,
+                          chunk_periods=100, cache_dir=str(tmp_path))
+    t_, y, w = prepare(t, flux, err)
+    power = bls_chunk(t_, y, w, period_grid(1.0, 10.0, 2000))[0]
+    np.testing.assert_allclose(chunked["power"], power)
+    assert float(chunked["best_period"]) == pytest.approx(PERIOD, rel=5e-3)
+
+
+def test_periodogram_rejects_bad_grid():
+    t, flux, err = _transits()
+    with pytest.raises(ValueError):
+        periodogram(t, flux, err, min_period=5.0, max_period=1.0, workers=1)
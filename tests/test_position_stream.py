@@ -0,0 +1,81 @@
+import struct
+
+import numpy as np
+
+from helper.position_stream import MISSING, empty_state, encode_frame, quantize
+
+
+def _decode(frame, previous):
+    """
+    Applies a frame to a quantized state the way the map client does.
+    """
+    seq, t, n_delta, n_reset, n_gone, count = struct.unpack_from("<IIIIII", frame, 0)
+    pos = 24
+    mask_bytes = -(-count // 8)
+    moved = np.unpackbits(np.frombuffer(frame, np.uint8, mask_bytes, pos), bitorder="little")[:count].astype(bool)
+    pos += mask_bytes + (-mask_bytes % 4)
+
+    def take(dtype, n):
+        nonlocal pos
+        values = np.frombuffer(frame, dtype, n, pos)
+        pos += values.nbytes
+        return values
+
+    reset_idx, gone_idx = take("<u4", n_reset), take("<u4", n_gone)
+    reset_alt, reset_lat, reset_lon = take("<i4", n_reset), take("<i2", n_reset), take("<i2", n_reset)
+    dlat, dlon, dalt = take("i1", n_delta), take("i1", n_delta), take("i1", n_delta)
+    assert len(frame) % 4 == 0
+
+    lat, lon, alt, valid = (a.copy() for a in previous)
+    idx = np.nonzero(moved)[0]
+    lat[idx] += dlat
+    lon[idx] = (lon[idx].astype(np.int32) + dlon + 18000) % 36000 - 18000
+    alt[idx] += dalt
+    lat[reset_idx], lon[reset_idx], alt[reset_idx], valid[reset_idx] = reset_lat, reset_lon, reset_alt, True
+    lat[gone_idx], valid[gone_idx] = MISSING, False
+    return seq, t, (lat, lon, alt, valid)
+
+
+def _assert_same(decoded, expected):
+    valid = expected[3]
+    np.testing.assert_array_equal(decoded[3], valid)
+    for got, want in zip(decoded[:3], expected[:3]):
+        np.testing.assert_array_equal(got[valid], want[valid])
+
+
+def test_keyframe_round_trip():
+    state = quantize(np.array([10.0, -45.5, 0.0]), np.array([20.0, 179.99, -180.0]), np.array([400.0, 20200.0, 35786.0]))
+    seq, t, decoded = _decode(encode_frame(7, 1000, empty_state(3), state), empty_state(3))
+    assert (seq, t) == (7, 1000)
+    _assert_same(decoded, state)
+
+
+def test_delta_reset_and_gone():
+    previous = quantize(np.array([10.0, 20.0, 30.0, 40.0]), np.array([0.0, 50.0, 100.0, 150.0]), np.full(4, 500.0))
+    current = quantize(
+        np.array([10.3, 25.0, 30.0, np.nan]), # small move, big jump, unchanged, SGP4 failure
+        np.array([0.4, 50.0, 100.0, np.nan]),
+        np.array([500.5, 500.0, 500.0, np.nan]),
+    )
+    frame = encode_frame(2, 1001, previous, current)
+    n_delta, n_reset, n_gone = struct.unpack_from("<III", frame, 8)
+    assert (n_delta, n_reset, n_gone) == (1, 1, 1)
+    _, _, decoded = _decode(frame, previous)
+    _assert_same(decoded, current)
+    assert not decoded[3][3]
+
+
+def test_reappearing_satellite_is_reset():
+    previous = quantize(np.array([np.nan]), np.array([np.nan]), np.array([np.nan]))
+    current = quantize(np.array([1.0]), np.array([2.0]), np.array([3.0]))
+    _, _, decoded = _decode(encode_frame(3, 1002, previous, current), previous)
+    _assert_same(decoded, current)
+
+
+def test_antimeridian_crossing_is_a_small_delta():
+    previous = quantize(np.array([0.0]), np.array([179.99]), np.array([400.0]))
+    current = quantize(np.array([0.0]), np.array([-179.98]), np.array([400.0]))
+    frame = encode_frame(4, 1003, previous, current)
+    assert struct.unpack_from("<II", frame, 8) == (1, 0) # One delta, no reset
+    _, _, decoded = _decode(frame, previous)
+    assert decoded[1][0] == -17998
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from helper import tle_store
+from helper.satellites import DEFAULT_TLE_PATH
+
+COUNT = 40
+
+
+def _element_sets(count=COUNT + 1):
+    with open(DEFAULT_TLE_PATH, "r", encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    return [lines[i:i + 3] for i in range(0, 3 * count, 3)]
+
+
+def _with_epoch_offset(element_set, days):
+    # Epoch is columns 19-32 of line 1 (YYDDD.DDDDDDDD)
+    name, line1, line2 = element_set
+    epoch = float(line1[20:32]) + days
+    return [name, f"{line1[:20]}{epoch:012.8f}{line1[32:]}", line2]
+
+
+def _write_tle(path, element_sets):
+    path.write_text("\n".join(line for element_set in element_sets for line in element_set) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    sets = _element_sets()
+    source = _write_tle(tmp_path / "active.tle", sets[:COUNT])
+    store_dir = str(tmp_path / "store")
+    tle_store.compile_store(source, store_dir)
+    return sets, source, store_dir
+
+
+def _satnums(store_dir):
+    return set(tle_store.TLEStore(store_dir).elements["satnum"].tolist())
+
+
+def test_merge_adds_updates_and_decays(store, tmp_path):
+    sets, source, store_dir = store
+    revision = tle_store.TLEStore(store_dir).meta["revision"]
+    updated = [_with_epoch_offset(s, 0.5) for s in sets[:5]]
+    # Object COUNT - 1 is missing (decayed), object COUNT is new
+    drop = _write_tle(tmp_path / "drop.tle", updated + sets[5:COUNT - 1] + [sets[COUNT]])
+
+    report = tle_store.merge_update(drop, source, store_dir)
+
+    assert report == {"added": 1, "updated": 5, "decayed": 1, "unchanged": COUNT - 6}
+    reopened = tle_store.TLEStore(store_dir)
+    assert reopened.meta["revision"] == revision + 1
+    assert len(reopened) == COUNT
+    decayed_satnum = int(sets[COUNT - 1][1][2:7])
+    new_satnum = int(sets[COUNT][1][2:7])
+    assert decayed_satnum not in _satnums(store_dir)
+    assert new_satnum in _satnums(store_dir)
+    assert reopened.find_satnum([decayed_satnum])[0] == -1
+    assert reopened.find_satnum([new_satnum])[0] >= 0
+
+    # Superseded and decayed element sets are kept in the history
+    history = tle_store.load_history(store_dir)
+    assert len(history) == 6
+    assert decayed_satnum in history["satnum"]
+
+
+def test_merge_without_changes_keeps_revision(store):
+    sets, source, store_dir = store
+    revision = tle_store.TLEStore(store_dir).meta["revision"]
+    report = tle_store.merge_update(source, source, store_dir)
+    assert report["unchanged"] == COUNT
+    assert tle_store.TLEStore(store_dir).meta["revision"] == revision
+
+
+def test_decay_guard_refuses_truncated_drop(store, tmp_path):
+    sets, source, store_dir = store
+    drop = _write_tle(tmp_path / "drop.tle", sets[:COUNT // 2])
+    with pytest.raises(ValueError):
+        tle_store.merge_update(drop, source, store_dir)
+    assert len(tle_store.TLEStore(store_dir)) == COUNT # Nothing written
+
+    report = tle_store.merge_update(drop, source, store_dir, force=True)
+    assert report["decayed"] == COUNT - COUNT // 2
+    assert len(tle_store.TLEStore(store_dir)) == COUNT // 2
+
+
+def test_empty_drop_is_refused(store, tmp_path):
+    _, source, store_dir = store
+    drop = tmp_path / "empty.tle"
+    drop.write_text("", encoding="utf-8")
+    with pytest.raises(ValueError):
+        tle_store.merge_update(str(drop), source, store_dir)
+
+
+def test_history_keeps_newest_epochs(store, tmp_path):
+    sets, source, store_dir = store
+    satnum = int(sets[0][1][2:7])
+    for update in range(1, tle_store.HISTORY_DEPTH + 3):
+        drop = _write_tle(tmp_path / "drop.tle", [_with_epoch_offset(sets[0], update * 0.1)] + sets[1:COUNT])
+        tle_store.merge_update(drop, source, store_dir)
+
+    history = tle_store.TLEStore(store_dir).history(satnum)
+    epochs = history["epoch_jd"] + history["epoch_fr"]
+    assert len(history) == tle_store.HISTORY_DEPTH
+    assert np.all(np.diff(epochs) > 0) # Oldest first
+    current = tle_store.TLEStore(store_dir)
+    row = current.find_satnum([satnum])[0]
+    assert epochs[-1] < current.epoch[row]
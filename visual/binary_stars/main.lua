@@ -1,4 +1,7 @@
 local json = require("json")
+-- reload.lua is shared by every viewer, from visual/shared next to this folder
+package.path = love.filesystem.getSource() .. "/../shared/?.lua;" .. package.path
+local reload = require("reload")
 
 -- Physics and orbital data
 local data = nil
@@ -12,9 +15,8 @@ local cx, cy
 local star_radius = 10
 local time = 0
 
-function love.load()
-    love.window.setTitle("Binary Star System Simulation")
-
+-- Reads the system from data.json; also called on every data change
+local function loadData()
     local fileData = love.filesystem.read("data.json")
     data = json.decode(fileData)
 
@@ -24,7 +26,16 @@ function love.load()
     cx, cy = love.graphics.getWidth() / 2, love.graphics.getHeight() / 2
 end
 
+function love.load()
+    love.window.setTitle("Binary Star System Simulation")
+
+    loadData()
+    -- Rebuild only the system (not the window) when Streamlit writes new data
+    reload.watch("data.json", loadData)
+end
+
 function love.update(dt)
+    reload.update(dt)
     time = time + dt * timeScale
 end
 
@@ -1,6 +1,9 @@
 -- Load required modules
 local json = require("json")
 local CometBackground = require("CometBackground")
+-- reload.lua is shared by every viewer, from visual/shared next to this folder
+package.path = love.filesystem.getSource() .. "/../shared/?.lua;" .. package.path
+local reload = require("reload")
 
 -- Global variables
 local data = {}
@@ -20,12 +23,12 @@ local TRAIL_DECAY = 0.08
 local stars = {}
 local starMode = false
 
-function love.load()
-    love.window.setTitle("Black Hole Visualization")
-    love.window.setMode(800, 600)
-
+-- Rebuilds the scene from data.json; also called on every data change
+local function loadData()
     local contents = love.filesystem.read("data.json")
     data = json.decode(contents)
+    particles = {}
+    externalParticles = {}
 
     centerX = love.graphics.getWidth() / 2
     centerY = love.graphics.getHeight() / 2
@@ -34,14 +37,6 @@ function love.load()
     local desiredPixelRadius = 80
     scale = desiredPixelRadius / data.schwarzschild_radius_km
 
-    -- Initialize the CometBackground component
-    cometBackgroundInstance = CometBackground.new(love.graphics.getWidth(), love.graphics.getHeight(), {
-        numComets = 70,
-        cometSpeed = 60,
-        cometTrailLength = 25,
-        cometColor = {0.7, 0.9, 1, 0.4}
-    })
-
     local visual_radius = data.schwarzschild_radius_km * scale
     local ergosphere_radius = visual_radius * 1.1
 
@@ -74,9 +69,28 @@ function love.load()
             trail = {}
         })
     end
+
+end
+
+function love.load()
+    love.window.setTitle("Black Hole Visualization")
+    love.window.setMode(800, 600)
+
+    -- Initialize the CometBackground component
+    cometBackgroundInstance = CometBackground.new(love.graphics.getWidth(), love.graphics.getHeight(), {
+        numComets = 70,
+        cometSpeed = 60,
+        cometTrailLength = 25,
+        cometColor = {0.7, 0.9, 1, 0.4}
+    })
+
+    loadData()
+    -- Rebuild only the scene (not the window or background) when Streamlit writes new data
+    reload.watch("data.json", loadData)
 end
 
 function love.update(dt)
+    reload.update(dt)
     cometBackgroundInstance:update(dt)
 
     if showErgosphere then
@@ -1,14 +1,13 @@
 local json = require("json")
+-- reload.lua is shared by every viewer, from visual/shared next to this folder
+package.path = love.filesystem.getSource() .. "/../shared/?.lua;" .. package.path
+local reload = require("reload")
 
 local PIXEL_SCALE = 200  -- Scale gravity to pixels/s²
 local timeScale = 1       -- Simulation timescale (1.0 = real time)
 
-function love.load()
-    love.window.setTitle("Planet Gravity Visualizer")
-    love.graphics.setBackgroundColor(0.1, 0.1, 0.1)
-    font = love.graphics.newFont(14)
-    love.graphics.setFont(font)
-
+-- Rebuilds the world from data.json; also called on every data change
+local function loadData()
     -- Load gravity from JSON file
     local file = love.filesystem.read("data.json")
     local parsedData = json.decode(file)
@@ -26,6 +25,17 @@ function love.load()
     rightWall = makeWall(800, 300, 20, 600)
 end
 
+function love.load()
+    love.window.setTitle("Planet Gravity Visualizer")
+    love.graphics.setBackgroundColor(0.1, 0.1, 0.1)
+    font = love.graphics.newFont(14)
+    love.graphics.setFont(font)
+
+    loadData()
+    -- Rebuild only the world (not the window or font) when Streamlit writes new data
+    reload.watch("data.json", loadData)
+end
+
 function makeWall(x, y, w, h)
     local wall = {}
     wall.body = love.physics.newBody(world, x, y, "static")
@@ -35,6 +45,7 @@ function makeWall(x, y, w, h)
 end
 
 function love.update(dt)
+    reload.update(dt)
     local scaled_dt = dt * timeScale
 
     for _, obj in ipairs(objects) do
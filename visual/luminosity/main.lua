@@ -2,6 +2,9 @@
 
 local StarSystemScene = require("StarSystemScene")
 local StarScene = require("StarScene")
+-- reload.lua is shared by every viewer, from visual/shared next to this folder
+package.path = love.filesystem.getSource() .. "/../shared/?.lua;" .. package.path
+local reload = require("reload")
 
 local currentScene -- This will hold the currently active scene object
 
@@ -15,9 +18,13 @@ function love.load()
 
     -- Call the load function of the initial scene
     currentScene:load()
+
+    -- Reload the active scene when Streamlit writes new data
+    reload.watch("data.json", function() currentScene:load() end)
 end
 
 function love.update(dt)
+    reload.update(dt)
     -- Update the current scene
     currentScene:update(dt)
 end
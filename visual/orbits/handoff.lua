@@ -0,0 +1,100 @@
+--
+-- handoff.lua
+--
+-- Reader for the binary handoff format written by helper/handoff.py.
+-- Little-endian header ("ACEB", u16 version, u16 flags, u32 count) followed by
+-- named records: 0 = float64 scalar, 1 = u32 count + packed float64 array,
+-- 2 = u32 length + utf-8 string. Dotted names ("planets.1.eccentricity") are
+-- rebuilt into nested tables, numeric parts becoming array indices.
+--
+
+local handoff = { _version = 1 }
+
+local MAGIC = "ACEB"
+local SCALAR, ARRAY, STRING = 0, 1, 2
+local ARRAY_CHUNK = 256 -- Values unpacked per love.data.unpack call
+
+local unpack = love.data.unpack
+
+
+local function set_path(root, name, value)
+    local node = root
+    local parts = {}
+    for part in string.gmatch(name, "[^%.]+") do
+        table.insert(parts, tonumber(part) or part)
+    end
+    for i = 1, #parts - 1 do
+        local key = parts[i]
+        if node[key] == nil then
+            node[key] = {}
+        end
+        node = node[key]
+    end
+    node[parts[#parts]] = value
+end
+
+
+local function read_array(bytes, pos, n)
+    local values = {}
+    local fmt = "<" .. string.rep("d", ARRAY_CHUNK)
+    local i = 0
+    while i < n do
+        local count = math.min(ARRAY_CHUNK, n - i)
+        if count < ARRAY_CHUNK then
+            fmt = "<" .. string.rep("d", count)
+        end
+        local chunk = { unpack(fmt, bytes, pos) }
+        for j = 1, count do
+            values[i + j] = chunk[j]
+        end
+        pos = chunk[count + 1]
+        i = i + count
+    end
+    return values, pos
+end
+
+
+function handoff.decode(bytes)
+    if #bytes < 12 or bytes:sub(1, 4) ~= MAGIC then
+        error("not a handoff file (bad magic)")
+    end
+    local version, _, count, pos = unpack("<I2I2I4", bytes, 5)
+    if version ~= handoff._version then
+        error("unsupported handoff version " .. tostring(version))
+    end
+
+    local result = {}
+    for _ = 1, count do
+        local name_len, kind, value, n
+        name_len, pos = unpack("<I2", bytes, pos)
+        local name = bytes:sub(pos, pos + name_len - 1)
+        pos = pos + name_len
+        kind, pos = unpack("<B", bytes, pos)
+        if kind == SCALAR then
+            value, pos = unpack("<d", bytes, pos)
+        elseif kind == ARRAY then
+            n, pos = unpack("<I4", bytes, pos)
+            value, pos = read_array(bytes, pos, n)
+        elseif kind == STRING then
+            n, pos = unpack("<I4", bytes, pos)
+            value = bytes:sub(pos, pos + n - 1)
+            pos = pos + n
+        else
+            error("unknown handoff record kind " .. tostring(kind) .. " for '" .. name .. "'")
+        end
+        set_path(result, name, value)
+    end
+    return result
+end
+
+
+function handoff.read(path)
+    local bytes = love.filesystem.read(path)
+    if not bytes then
+        return nil
+    end
+    return handoff.decode(bytes)
+end
+
+
+return handoff
@@ -1,4 +1,8 @@
 local json = require("json")
+local handoff = require("handoff")
+-- reload.lua is shared by every viewer, from visual/shared next to this folder
+package.path = love.filesystem.getSource() .. "/../shared/?.lua;" .. package.path
+local reload = require("reload")
 local planets = {}
 local central_mass
 local background
@@ -13,6 +17,14 @@ local planet_radius = 6
 local star_radius = 30
 local eccentricity = 0.6  -- assumed same for all
 local time_scale = 50000
+local max_time_scale = 2e6
+local trail_samples = 300 -- N-body trail length in samples
+local minor_radius = 1.5 -- Unnamed N-body bodies (belts) are drawn as dots
+
+-- N-body playback (data.trajectory): sampled heliocentric positions per body
+local trajectory = nil
+local sim_t = 0
+local body_colors = {} -- By name, so reloads while streaming keep the colors
 
 -- Central position
 local cx, cy
@@ -36,6 +48,105 @@ local function getPosition(t, a, e, T)
     return x, y
 end
 
+-- Interpolate a precomputed ephemeris table (one period, uniform in time)
+local function getTablePosition(t, T, ephemeris)
+    local n = #ephemeris.x
+    local phase = (t % T) / T * n
+    local i = math.floor(phase)
+    local frac = phase - i
+    local i1 = i + 1
+    local i2 = (i + 1) % n + 1
+    local x = ephemeris.x[i1] + (ephemeris.x[i2] - ephemeris.x[i1]) * frac
+    local y = ephemeris.y[i1] + (ephemeris.y[i2] - ephemeris.y[i1]) * frac
+    return x, y
+end
+
+local function getPlanetPosition(planet)
+    if planet.ephemeris then
+        return getTablePosition(planet.t, planet.T, planet.ephemeris)
+    end
+    return getPosition(planet.t, planet.a, planet.e, planet.T)
+end
+
+-- Interpolate a sampled N-body trajectory, looping over the sampled span
+local function getTrajectoryIndex(t)
+    local n = trajectory.samples
+    if n < 2 or trajectory.interval <= 0 then
+        return 1, 0
+    end
+    local phase = (t % ((n - 1) * trajectory.interval)) / trajectory.interval
+    local i = math.floor(phase)
+    return i + 1, phase - i
+end
+
+local function getTrajectoryPosition(body, i, frac)
+    local j = math.min(i + 1, trajectory.samples)
+    return body.x[i] + (body.x[j] - body.x[i]) * frac, body.y[i] + (body.y[j] - body.y[i]) * frac
+end
+
+local function loadTrajectory(data)
+    local first = trajectory == nil
+    trajectory = { interval = data.interval, samples = data.samples, bodies = {} }
+    for i, body in ipairs(data.bodies) do
+        local name = body.name or ""
+        if name ~= "" and not body_colors[name] then
+            body_colors[name] = { r = love.math.random(), g = love.math.random(), b = love.math.random() }
+        end
+        table.insert(trajectory.bodies, {
+            name = name,
+            x = body.x,
+            y = body.y,
+            central = i == 1,
+            color = body_colors[name] or { r = 0.7, g = 0.7, b = 0.7 }
+        })
+    end
+    if first then
+        -- Play about ten samples per second to start with
+        sim_t = 0
+        max_time_scale = math.max(2e6, trajectory.interval * 100)
+        time_scale = math.max(1000, math.min(trajectory.interval * 10, max_time_scale))
+    end
+end
+
+local function drawTrajectory()
+    local i, frac = getTrajectoryIndex(sim_t)
+    local minor = {}
+    for _, body in ipairs(trajectory.bodies) do
+        local x, y = getTrajectoryPosition(body, i, frac)
+        local drawX, drawY = cx + x * scale, cy + y * scale
+        if body.central then
+            love.graphics.setColor(1, 1, 0)
+            love.graphics.circle("fill", drawX, drawY, star_radius * zoom)
+        elseif body.name == "" then
+            table.insert(minor, drawX)
+            table.insert(minor, drawY)
+        else
+            -- Colored trail over the last samples
+            local trail = {}
+            for k = math.max(1, i - trail_samples), i do
+                table.insert(trail, cx + body.x[k] * scale)
+                table.insert(trail, cy + body.y[k] * scale)
+            end
+            table.insert(trail, drawX)
+            table.insert(trail, drawY)
+            love.graphics.setColor(body.color.r, body.color.g, body.color.b, 0.5)
+            if #trail >= 4 then
+                love.graphics.line(trail)
+            end
+
+            love.graphics.setColor(body.color.r, body.color.g, body.color.b)
+            love.graphics.circle("fill", drawX, drawY, planet_radius)
+            love.graphics.setColor(1, 1, 1)
+            love.graphics.print(body.name, drawX + 6, drawY + 6)
+        end
+    end
+    if #minor > 0 then
+        love.graphics.setColor(0.8, 0.8, 0.8, 0.8)
+        love.graphics.setPointSize(minor_radius * 2)
+        love.graphics.points(minor)
+    end
+end
+
 -- Calculate static ellipse points
 local function generateEllipsePoints(a, e)
     local points = {}
@@ -48,19 +159,25 @@ local function generateEllipsePoints(a, e)
     return points
 end
 
-function love.load()
-    background = love.graphics.newImage("assets/nebula.png")
-    background:setWrap("repeat", "repeat")
-    background:setFilter("nearest", "nearest")
-
-    love.graphics.setDefaultFilter("nearest", "nearest")
-    cx, cy = love.graphics.getWidth() / 2, love.graphics.getHeight() / 2
+-- Builds the orbits from the data file; also called on every data change
+local function loadData()
+    -- Prefer the binary handoff file; fall back to legacy data.json
+    local data
+    if love.filesystem.getInfo("data.bin") then
+        data = handoff.read("data.bin")
+    else
+        data = json.decode(love.filesystem.read("data.json"))
+    end
 
-    local file = love.filesystem.read("data.json")
-    local data = json.decode(file)
+    planets = {}
+    if data.trajectory then
+        loadTrajectory(data.trajectory)
+        return
+    end
+    trajectory = nil
     central_mass = data.central_mass.value
 
-    for _, planet in ipairs(data.planets) do
+    for i, planet in ipairs(data.planets) do
         local a = planet.semi_major_axis.value
         local T = planet.T_seconds
         local e = planet.eccentricity or 0.0
@@ -76,6 +193,7 @@ function love.load()
             T = T,
             e = e,
             t = math.random() * T,
+            ephemeris = data.ephemeris and data.ephemeris[i],
             color = color,
             path = {},
             ellipse_points = generateEllipsePoints(a, e)
@@ -83,10 +201,28 @@ function love.load()
     end
 end
 
+function love.load()
+    background = love.graphics.newImage("assets/nebula.png")
+    background:setWrap("repeat", "repeat")
+    background:setFilter("nearest", "nearest")
+
+    love.graphics.setDefaultFilter("nearest", "nearest")
+    cx, cy = love.graphics.getWidth() / 2, love.graphics.getHeight() / 2
+
+    loadData()
+    -- Rebuild only the orbits (not the window or assets) when Streamlit writes new data
+    reload.watch({ "data.bin", "data.json" }, loadData)
+end
+
 function love.update(dt)
+    reload.update(dt)
+    if trajectory then
+        sim_t = sim_t + dt * time_scale
+        return
+    end
     for _, planet in ipairs(planets) do
         planet.t = planet.t + dt * time_scale
-        local x, y = getPosition(planet.t, planet.a, planet.e, planet.T)
+        local x, y = getPlanetPosition(planet)
         table.insert(planet.path, { x = x, y = y })
         if #planet.path > 1000 then
             table.remove(planet.path, 1)
@@ -101,8 +237,12 @@ function love.draw()
     scale = base_scale * zoom
 
     -- Draw central star with zoom-scaled size
-    love.graphics.setColor(1, 1, 0)
-    love.graphics.circle("fill", cx, cy, star_radius * zoom)
+    if trajectory then
+        drawTrajectory()
+    else
+        love.graphics.setColor(1, 1, 0)
+        love.graphics.circle("fill", cx, cy, star_radius * zoom)
+    end
 
     for _, planet in ipairs(planets) do
         -- White Elliptical Path
@@ -128,7 +268,7 @@ function love.draw()
         end
 
         -- Current position
-        local x, y = getPosition(planet.t, planet.a, planet.e, planet.T)
+        local x, y = getPlanetPosition(planet)
         local drawX = cx + x * scale
         local drawY = cy + y * scale
 
@@ -144,6 +284,10 @@ function love.draw()
     love.graphics.setColor(1, 1, 1)
     love.graphics.print("Zoom: " .. string.format("%.2f", zoom) .. "x", 10, 10)
     love.graphics.print("Time Scale: " .. string.format("%.0f", time_scale) .. "x", 10, 30)
+    if trajectory then
+        love.graphics.print("N-body: " .. string.format("%.2f", sim_t / 31557600) .. " years, "
+            .. #trajectory.bodies .. " bodies", 10, 50)
+    end
 end
 
 function love.keypressed(key)
@@ -154,7 +298,7 @@ function love.keypressed(key)
     elseif key == "left" then
         time_scale = math.max(1000, time_scale / 2)
     elseif key == "right" then
-        time_scale = math.min(2e6, time_scale * 2)
+        time_scale = math.min(max_time_scale, time_scale * 2)
     elseif key == "w" then
         planet_radius = planet_radius + 1
     elseif key == "s" then
@@ -1,5 +1,8 @@
 -- Load JSON and gravity from file
 local json = require("json")
+-- reload.lua is shared by every viewer, from visual/shared next to this folder
+package.path = love.filesystem.getSource() .. "/../shared/?.lua;" .. package.path
+local reload = require("reload")
 
 -- Gravity data
 local gravity_data
@@ -53,12 +56,30 @@ local function reset_ball()
     ball.speed_y = -initial_velocity
 end
 
+-- Re-read data.json and re-derive the gravity-dependent values in place
+local function reload_gravity()
+    gravity_data = json.decode(love.filesystem.read("data.json"))
+    planet_name = gravity_data.planet or "Unknown"
+
+    world_gravity = gravity_data.gravity_m_per_s2 or earth_gravity
+    gravity_scale = world_gravity / earth_gravity
+    ball_weight = ball_mass * world_gravity
+    initial_velocity = math.sqrt(2 * world_gravity * initial_height)
+
+    ball.gravity = world_gravity
+    ball.weight = ball_weight
+    reset_ball()
+end
+
 function love.load()
     love.window.setTitle("Accurate Pong: Mass & Gravity Physics")
     love.window.setMode(window_width, window_height)
+    reload.watch("data.json", reload_gravity)
 end
 
 function love.update(dt)
+    reload.update(dt)
+
     -- Adjust paddle speed based on gravity
     local paddle_penalty = 1 - 0.2 * math.min(gravity_scale, 5) / 5
     player.speed = base_player_speed * paddle_penalty
@@ -1,13 +1,14 @@
 local json = require("json")
+-- reload.lua is shared by every viewer, from visual/shared next to this folder
+package.path = love.filesystem.getSource() .. "/../shared/?.lua;" .. package.path
+local reload = require("reload")
 
 -- Constants
 local scale_factor = 1e-5 -- Scale meters to pixels
 local G = 50000 -- Simulated gravity
 
-function love.load()
-    love.window.setTitle("Roche Limit Simulation")
-    love.window.setMode(1000, 600)
-
+-- Rebuilds the scene from data.json; also called on every data change
+local function loadData()
     local file = love.filesystem.read("data.json")
     local data = json.decode(file)
 
@@ -43,8 +44,18 @@ function love.load()
     trail = {}
 end
 
+function love.load()
+    love.window.setTitle("Roche Limit Simulation")
+    love.window.setMode(1000, 600)
+
+    loadData()
+    -- Rebuild only the scene (not the window) when Streamlit writes new data
+    reload.watch("data.json", loadData)
+end
+
 
 function love.update(dt)
+    reload.update(dt)
     if not moon.is_collapsed then
         moon.angle = moon.angle + moon.orbit_speed * dt
         moon.x = planet.x + moon.orbit_radius * math.cos(moon.angle)
@@ -0,0 +1,73 @@
+--
+-- reload.lua
+--
+-- Watches the data file(s) written by the Streamlit launcher and calls back
+-- when one of them changes, so a long-lived viewer updates in place instead
+-- of the app spawning a new window for every Launch click.
+--
+-- One copy for all viewers: each main.lua adds visual/shared to package.path.
+-- helper/handoff.py writes a "<file>.seq" sidecar with a new sequence stamp
+-- after every rewrite, which is compared instead of the file's modtime (1 s
+-- resolution, so a same-size rewrite within a second would be missed).
+-- Files without a sidecar fall back to modtime and size.
+--
+
+local reload = {}
+
+local POLL_INTERVAL = 0.5 -- Seconds between file checks
+
+local watched = {}
+local callback = nil
+local elapsed = 0
+
+
+local function stamp(path)
+    local info = love.filesystem.getInfo(path)
+    if not info then
+        return nil
+    end
+    if love.filesystem.getInfo(path .. ".seq") then
+        local seq = love.filesystem.read(path .. ".seq")
+        if seq and seq ~= "" then
+            return "seq:" .. seq
+        end
+    end
+    return tostring(info.modtime) .. ":" .. tostring(info.size)
+end
+
+
+function reload.watch(paths, fn)
+    if type(paths) == "string" then
+        paths = { paths }
+    end
+    watched = {}
+    for _, path in ipairs(paths) do
+        watched[path] = stamp(path) or false
+    end
+    callback = fn
+    elapsed = 0
+end
+
+
+function reload.update(dt)
+    if not callback then
+        return
+    end
+    elapsed = elapsed + dt
+    if elapsed < POLL_INTERVAL then
+        return
+    end
+    elapsed = 0
+
+    for path, last in pairs(watched) do
+        local current = stamp(path) or false
+        if current and current ~= last then
+            watched[path] = current
+            callback(path)
+            return
+        end
+    end
+end
+
+
+return reload